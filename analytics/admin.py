@@ -0,0 +1,7 @@
+from django.contrib import admin
+from .models import Rollup
+
+@admin.register(Rollup)
+class RollupAdmin(admin.ModelAdmin):
+    list_display = ('metric', 'day', 'age_bucket', 'phase', 'value', 'count')
+    list_filter = ('metric', 'age_bucket', 'phase')
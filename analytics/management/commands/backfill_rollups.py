@@ -0,0 +1,68 @@
+import multiprocessing
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from analytics.models import Rollup, UserContribution
+from analytics.rollups import compute_contributions, dump_cells
+from users.models import User
+
+
+def _compute_chunk(user_ids):
+    return {user_id: dump_cells(cells) for user_id, cells in compute_contributions(user_ids).items() if cells}
+
+
+class Command(BaseCommand):
+    help = ('Rebuilds the population rollups from scratch, computing chunks of users in parallel. '
+            'Changes made while it runs are picked up by the regular incremental updates afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(), help='Processes computing chunks.')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Users per chunk.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+        size = options['chunk_size']
+        chunks = [user_ids[i:i + size] for i in range(0, len(user_ids), size)]
+
+        if options['workers'] > 1 and len(chunks) > 1:
+            # Forked workers must not share the parent's connections.
+            connections.close_all()
+            pool = multiprocessing.get_context('fork').Pool(options['workers'])
+            results = pool.imap_unordered(_compute_chunk, chunks)
+        else:
+            pool = None
+            results = map(_compute_chunk, chunks)
+
+        totals = Counter()
+        try:
+            with transaction.atomic():
+                Rollup.objects.all().delete()
+                UserContribution.objects.all().delete()
+                for done, contributions in enumerate(results, 1):
+                    UserContribution.objects.bulk_create(
+                        [UserContribution(user_id=user_id, cells=cells) for user_id, cells in contributions.items()],
+                        batch_size=500,
+                    )
+                    for cells in contributions.values():
+                        for metric, day, bucket, phase, value, count in cells:
+                            totals[metric, day, bucket, phase, value] += count
+                    self.stdout.write(f'{done}/{len(chunks)} chunks')
+                Rollup.objects.bulk_create(
+                    [
+                        Rollup(metric=metric, day=day, age_bucket=bucket, phase=phase, value=value, count=count)
+                        for (metric, day, bucket, phase, value), count in totals.items()
+                    ],
+                    batch_size=1000,
+                )
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rolled up {len(user_ids)} users into {len(totals)} cells in {time.perf_counter() - started:.1f}s.'
+        ))
@@ -0,0 +1,35 @@
+from django.db import models
+
+class Rollup(models.Model):
+    """
+    Anonymized population histogram cell: how many times `value` of `metric`
+    was seen on `day` for users in `age_bucket` during cycle `phase`.
+
+    Metrics are 'cycle_length' (value = length in days, on the day the next
+    cycle started), 'logs' (daily logs, value ''), 'mood' (value = mood) and
+    'symptom' (value = symptom name).
+    """
+    metric = models.CharField(max_length=16)
+    day = models.DateField()
+    age_bucket = models.CharField(max_length=8)
+    phase = models.CharField(max_length=12, blank=True)
+    value = models.CharField(max_length=100, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'day', 'age_bucket', 'phase', 'value'], name='unique_rollup_cell'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.day} {self.age_bucket} {self.phase} {self.value}: {self.count}"
+
+class UserContribution(models.Model):
+    """
+    The rollup cells one user currently contributes, so a change to their data
+    can be applied to the rollups as a delta. Keyed by the plain id so the
+    contribution outlives the user and can be subtracted after deletion.
+    """
+    user_id = models.BigIntegerField(primary_key=True)
+    cells = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,221 @@
+"""
+Incremental population rollups.
+
+Each user's data maps to a multiset of rollup cells (metric, day, age bucket,
+phase, value). The cells a user currently contributes are kept in
+UserContribution, so when their data changes only the difference between the
+old and the new cells is applied to the Rollup table. A change batch costs
+a few queries for the changed users, whatever the size of the population.
+"""
+from collections import Counter
+from datetime import date
+from itertools import groupby
+
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from cycles.models import Cycle, DailyLog
+from cycles.phases import (
+    DEFAULT_CYCLE_LENGTH, MAX_CYCLE_LENGTH, MIN_CYCLE_LENGTH, average_cycle_length, build_timeline,
+)
+from users.models import User, UserProfile
+from .models import Rollup, UserContribution
+
+AGE_BUCKETS = ((18, '<18'), (25, '18-24'), (30, '25-29'), (35, '30-34'), (40, '35-39'), (None, '40+'))
+UNKNOWN_AGE = 'unknown'
+
+
+def age_bucket(age):
+    if age is None:
+        return UNKNOWN_AGE
+    for limit, label in AGE_BUCKETS:
+        if limit is None or age < limit:
+            return label
+
+
+def phases(days, cycles, average_cycle, today):
+    """
+    Yield the cycle phase of each of `days` given the user's (start, end)
+    cycles sorted by start, from the same PhaseTimeline the calendar and
+    predictions use; '' when the timeline has no phase for the day.
+    """
+    cycles = cycles[::-1]
+    cycle_length = average_cycle_length([start for start, _ in cycles[:6]]) or average_cycle or DEFAULT_CYCLE_LENGTH
+    timeline = build_timeline(cycles, cycle_length, today)
+    for day in days:
+        yield timeline.phase(day) or ''
+
+
+def compute_contributions(user_ids):
+    """
+    Return {user_id: Counter of cells} for `user_ids`, in four queries.
+    Users without data (or deleted ones) get an empty Counter.
+    """
+    profiles = dict(
+        (user_id, (age, average_cycle)) for user_id, age, average_cycle in
+        UserProfile.objects.filter(user_id__in=user_ids).values_list('user_id', 'age', 'average_cycle')
+    )
+    cycles = {
+        user_id: [(start, end) for _, start, end in rows] for user_id, rows in groupby(
+            Cycle.objects.filter(user_id__in=user_ids).order_by('user_id', 'start_date').values_list('user_id', 'start_date', 'end_date'),
+            key=lambda row: row[0],
+        )
+    }
+    logs = {
+        user_id: list(rows) for user_id, rows in groupby(
+            DailyLog.objects.filter(user_id__in=user_ids).order_by('user_id', 'date').values_list('user_id', 'id', 'date', 'mood'),
+            key=lambda row: row[0],
+        )
+    }
+    symptoms = {}
+    for log_id, name in DailyLog.symptoms.through.objects.filter(
+        dailylog__user_id__in=user_ids
+    ).values_list('dailylog_id', 'symptom__name'):
+        symptoms.setdefault(log_id, []).append(name)
+
+    today = timezone.now().date()
+    contributions = {}
+    for user_id in user_ids:
+        age, average_cycle = profiles.get(user_id, (None, 28))
+        bucket = age_bucket(age)
+        user_cycles = cycles.get(user_id, [])
+        user_logs = logs.get(user_id, [])
+        cells = Counter()
+
+        for (previous, _), (start, _) in zip(user_cycles, user_cycles[1:]):
+            length = (start - previous).days
+            if MIN_CYCLE_LENGTH < length < MAX_CYCLE_LENGTH:
+                cells['cycle_length', start, bucket, '', str(length)] += 1
+
+        log_phases = phases([day for _, _, day, _ in user_logs], user_cycles, average_cycle, today)
+        for (_, log_id, day, mood), phase in zip(user_logs, log_phases):
+            cells['logs', day, bucket, phase, ''] += 1
+            if mood:
+                cells['mood', day, bucket, phase, mood] += 1
+            for name in symptoms.get(log_id, ()):
+                cells['symptom', day, bucket, phase, name] += 1
+
+        contributions[user_id] = cells
+    return contributions
+
+
+def dump_cells(cells):
+    return [[metric, day.isoformat(), bucket, phase, value, count] for (metric, day, bucket, phase, value), count in cells.items()]
+
+
+def load_cells(rows):
+    return Counter({(metric, date.fromisoformat(day), bucket, phase, value): count for metric, day, bucket, phase, value, count in rows})
+
+
+def apply_delta(delta):
+    """
+    Add `delta` (a Counter of cells, negative counts allowed) to the rollups
+    and delete the cells it brings to zero. Must run inside a transaction.
+
+    Cells are added to with an upsert, count = count + delta, so runs for
+    different users adding to the same cell at the same time, new cells
+    included, all count.
+    """
+    delta = [(cell, count) for cell, count in delta.items() if count]
+    if not delta:
+        return
+    quote = connection.ops.quote_name
+    table = quote(Rollup._meta.db_table)
+    keys = ', '.join(quote(column) for column in ('metric', 'day', 'age_bucket', 'phase', 'value'))
+    count = quote('count')
+    with connection.cursor() as cursor:
+        for start in range(0, len(delta), 500):
+            batch = delta[start:start + 500]
+            params = []
+            for (metric, day, bucket, phase, value), n in batch:
+                params += [metric, connection.ops.adapt_datefield_value(day), bucket, phase, value, n]
+            cursor.execute(
+                f'INSERT INTO {table} ({keys}, {count}) VALUES {", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(batch))} '
+                f'ON CONFLICT ({keys}) DO UPDATE SET {count} = {table}.{count} + EXCLUDED.{count}',
+                params,
+            )
+    Rollup.objects.filter(
+        count=0, metric__in={cell[0] for cell, _ in delta}, day__in={cell[1] for cell, _ in delta},
+    ).delete()
+
+
+def update_users(user_ids):
+    """
+    Bring the rollups up to date with the current data of `user_ids`.
+
+    The users' rows are locked before their data is read, so runs for the
+    same user take turns and each one computes its delta against the cells
+    the previous one stored.
+    """
+    user_ids = sorted(set(user_ids))
+    with transaction.atomic():
+        list(User.objects.select_for_update().filter(pk__in=user_ids).order_by('pk').values_list('pk', flat=True))
+        # Deleted users have no row left to lock; their contribution is.
+        stored = {
+            contribution.user_id: contribution
+            for contribution in UserContribution.objects.select_for_update().filter(user_id__in=user_ids).order_by('pk')
+        }
+        new = compute_contributions(user_ids)
+        delta = Counter()
+        changed, created, emptied = [], [], []
+        for user_id in user_ids:
+            contribution = stored.get(user_id)
+            delta.update(new[user_id])
+            if contribution is not None:
+                delta.subtract(load_cells(contribution.cells))
+            if not new[user_id]:
+                if contribution is not None:
+                    emptied.append(user_id)
+            elif contribution is None:
+                created.append(UserContribution(user_id=user_id, cells=dump_cells(new[user_id])))
+            else:
+                contribution.cells = dump_cells(new[user_id])
+                changed.append(contribution)
+        apply_delta(delta)
+        UserContribution.objects.bulk_update(changed, ['cells', 'updated_at'], batch_size=500)
+        UserContribution.objects.bulk_create(created, batch_size=500)
+        UserContribution.objects.filter(user_id__in=emptied).delete()
+
+
+def population_stats(start=None, end=None, min_count=0):
+    """
+    Cycle-length histograms by age bucket, symptom prevalence and mood mix by
+    phase between `start` and `end`, from the rollups alone. Cells and phases
+    seen fewer than `min_count` times are left out.
+    """
+    queryset = Rollup.objects.all()
+    if start is not None:
+        queryset = queryset.filter(day__gte=start)
+    if end is not None:
+        queryset = queryset.filter(day__lte=end)
+    totals = queryset.values_list('metric', 'age_bucket', 'phase', 'value').annotate(total=Sum('count')).order_by()
+
+    lengths, logs, moods, symptoms = {}, Counter(), {}, {}
+    for metric, bucket, phase, value, total in totals:
+        phase = phase or 'unknown'
+        if metric == 'cycle_length':
+            bucket_lengths = lengths.setdefault(bucket, Counter())
+            bucket_lengths[int(value)] += total
+        elif metric == 'logs':
+            logs[phase] += total
+        elif metric == 'mood':
+            moods.setdefault(phase, Counter())[value] += total
+        elif metric == 'symptom':
+            symptoms.setdefault(phase, Counter())[value] += total
+
+    def shares(counts_by_phase):
+        return {
+            phase: {value: round(count / logs[phase], 4) for value, count in sorted(counts.items()) if count >= min_count}
+            for phase, counts in sorted(counts_by_phase.items()) if logs[phase] >= min_count
+        }
+
+    return {
+        'cycle_length': {
+            bucket: {str(length): count for length, count in sorted(counts.items()) if count >= min_count}
+            for bucket, counts in sorted(lengths.items())
+        },
+        'symptom_prevalence': shares(symptoms),
+        'mood_mix': shares(moods),
+        'logs_by_phase': {phase: count for phase, count in sorted(logs.items()) if count >= min_count},
+    }
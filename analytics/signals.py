@@ -0,0 +1,19 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from cycles.models import Cycle, DailyLog
+from users.models import UserProfile
+from .tasks import update_rollups
+
+
+@receiver([post_save, post_delete], sender=Cycle)
+@receiver([post_save, post_delete], sender=DailyLog)
+@receiver([post_save, post_delete], sender=UserProfile)
+def population_data_changed(sender, instance, **kwargs):
+    update_rollups.enqueue(instance.user_id)
+
+
+@receiver(m2m_changed, sender=DailyLog.symptoms.through)
+def daily_log_symptoms_changed(sender, instance, action, reverse, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and not reverse:
+        update_rollups.enqueue(instance.user_id)
@@ -0,0 +1,11 @@
+from tasks.queue import task
+from .rollups import update_users
+
+
+@task(batch=True)
+def update_rollups(calls):
+    """
+    Apply the data changes queued since the last run to the population
+    rollups, once per user.
+    """
+    update_users({user_id for (user_id,) in calls})
@@ -0,0 +1,74 @@
+from collections import Counter
+from datetime import date
+
+from django.test import TestCase
+
+from cycles.models import Cycle, DailyLog, Symptom
+from users.models import User, UserProfile
+from .models import Rollup, UserContribution
+from .rollups import compute_contributions, update_users
+
+
+class RollupDeltaTests(TestCase):
+    """
+    Rollups kept up to date by deltas match a full recompute.
+    """
+    def setUp(self):
+        self.users = []
+        for index, age in enumerate((23, 23, 41)):
+            user = User.objects.create_user(email=f'user{index}@example.com', password='pw123456')
+            UserProfile.objects.create(user=user, name='A', age=age)
+            Cycle.objects.create(user=user, start_date=date(2025, 1, 1), end_date=date(2025, 1, 5))
+            Cycle.objects.create(user=user, start_date=date(2025, 1, 29), end_date=date(2025, 2, 2))
+            self.users.append(user)
+        self.user_ids = [user.pk for user in self.users]
+        self.cramps = Symptom.objects.create(name='Cramps')
+        for user in self.users[:2]:
+            DailyLog.objects.create(user=user, date=date(2025, 1, 2), mood='SAD').symptoms.set([self.cramps])
+        self.update()
+
+    def update(self):
+        update_users(self.user_ids)
+
+    def assertMatchesRecompute(self):
+        expected = Counter()
+        for cells in compute_contributions(list(User.objects.values_list('pk', flat=True))).values():
+            expected.update(cells)
+        stored = Counter({
+            (row.metric, row.day, row.age_bucket, row.phase, row.value): row.count for row in Rollup.objects.all()
+        })
+        self.assertEqual(stored, +expected)
+        self.assertFalse(Rollup.objects.filter(count__lte=0).exists())
+
+    def test_initial(self):
+        self.assertMatchesRecompute()
+        self.assertEqual(Rollup.objects.get(metric='mood', value='SAD').count, 2)
+
+    def test_write(self):
+        DailyLog.objects.create(user=self.users[2], date=date(2025, 1, 20), mood='HAPPY').symptoms.set([self.cramps])
+        self.update()
+        self.assertMatchesRecompute()
+
+    def test_edit(self):
+        DailyLog.objects.filter(user=self.users[0]).update(mood='ANXIOUS')
+        Cycle.objects.filter(user=self.users[1], start_date=date(2025, 1, 29)).update(start_date=date(2025, 1, 31))
+        self.update()
+        self.assertMatchesRecompute()
+        self.assertEqual(Rollup.objects.get(metric='mood', value='SAD').count, 1)
+
+    def test_delete(self):
+        DailyLog.objects.filter(user=self.users[0]).delete()
+        self.update()
+        self.assertMatchesRecompute()
+
+    def test_user_deletion(self):
+        deleted = self.users[1].pk
+        self.users[1].delete()
+        self.update()
+        self.assertMatchesRecompute()
+        self.assertFalse(UserContribution.objects.filter(user_id=deleted).exists())
+
+    def test_repeated_update_is_a_no_op(self):
+        before = list(Rollup.objects.order_by('pk').values_list('pk', 'count'))
+        self.update()
+        self.assertEqual(list(Rollup.objects.order_by('pk').values_list('pk', 'count')), before)
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import PopulationStatsView
+
+urlpatterns = [
+    path('population/', PopulationStatsView.as_view(), name='population-stats'),
+]
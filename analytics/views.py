@@ -0,0 +1,24 @@
+from datetime import date
+
+from django.conf import settings
+from rest_framework import status, views
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .rollups import population_stats
+
+
+class PopulationStatsView(views.APIView):
+    """
+    Anonymized population statistics, answered from the rollup tables.
+    Optional `from` and `to` query parameters (YYYY-MM-DD) limit the period.
+    """
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        try:
+            start = date.fromisoformat(request.query_params['from']) if 'from' in request.query_params else None
+            end = date.fromisoformat(request.query_params['to']) if 'to' in request.query_params else None
+        except ValueError:
+            return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(population_stats(start, end, min_count=settings.ANALYTICS_MIN_CELL_COUNT))
@@ -4,8 +4,14 @@ set -o errexit
 
 pip install -r requirements.txt
 
+# Pre-generate the OpenAPI schema; /api/schema/ serves these files.
+mkdir -p openapi
+python manage.py spectacular --file openapi/schema.yaml
+python manage.py spectacular --format openapi-json --file openapi/schema.json
+
 python manage.py collectstatic --no-input
-python manage.py migrate
+# Only migrate when there are unapplied migrations.
+python manage.py migrate --check || python manage.py migrate
 
 # Create superuser from environment variables
 python manage.py createsuperuser_from_env || true
\ No newline at end of file
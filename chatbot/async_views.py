@@ -0,0 +1,69 @@
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from her_saheli_backend.async_views import AsyncAPIView, JSONResponse
+from her_saheli_backend.renderers import FastJSONRenderer
+from .limits import chat_limiter
+from .pipeline import reply, stream_reply
+from .serializers import ChatbotQuerySerializer
+
+
+class EventStreamResponse(StreamingHttpResponse):
+    """
+    Server-sent events response that runs `on_close` once the server is done
+    with it, whether the stream completed or the client went away.
+    """
+    def __init__(self, events, on_close):
+        super().__init__(events, content_type='text/event-stream')
+        self['Cache-Control'] = 'no-cache'
+        # Stop nginx style proxies from buffering the stream.
+        self['X-Accel-Buffering'] = 'no'
+        self._on_close = on_close
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            if self._on_close is not None:
+                on_close, self._on_close = self._on_close, None
+                on_close()
+
+
+class AsyncChatbotQueryView(AsyncAPIView):
+    """
+    Async variant of ChatbotQueryView, served when ASYNC_VIEWS is enabled.
+    """
+    async def post(self, request, *args, **kwargs):
+        serializer = ChatbotQuerySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with chat_limiter.slot(request.user.pk):
+            response_text = await reply(request.user, serializer.validated_data['message'])
+
+        return JSONResponse({"response": response_text}, status=status.HTTP_200_OK)
+
+
+class ChatbotStreamView(AsyncAPIView):
+    """
+    Stream the reply to a chat message as server-sent events.
+
+    Each chunk arrives as `data: {"token": "..."}` and the stream ends with
+    an `event: done` carrying the complete `response`. Under ASGI no worker
+    is held while the provider is generating.
+    """
+    renderer = FastJSONRenderer()
+
+    async def post(self, request, *args, **kwargs):
+        serializer = ChatbotQuerySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        user = request.user
+        chat_limiter.acquire(user.pk)
+        events = self._events(user, serializer.validated_data['message'])
+        return EventStreamResponse(events, on_close=lambda: chat_limiter.release(user.pk))
+
+    async def _events(self, user, message):
+        chunks = []
+        async for chunk in stream_reply(user, message):
+            chunks.append(chunk)
+            yield b'data: ' + self.renderer.render({'token': chunk}) + b'\n\n'
+        yield b'event: done\ndata: ' + self.renderer.render({'response': ''.join(chunks)}) + b'\n\n'
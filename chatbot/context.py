@@ -0,0 +1,145 @@
+from collections import Counter
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from cycles.models import Cycle, DailyLog
+from cycles.phases import average_cycle_length
+from postpartum.models import PostpartumMoodLog
+from pregnancy.models import PregnancyProfile
+from .models import UserHealthSummary
+
+# Days of daily and postpartum logs summarized.
+RECENT_DAYS = 14
+# Sections over the last RECENT_DAYS, rebuilt on the first read of a new day
+# as well as on writes.
+WINDOWED_SECTIONS = ('daily_logs', 'postpartum')
+
+
+def _summarize_cycles(user_id):
+    periods = list(Cycle.objects.filter(user_id=user_id).order_by('-start_date').values_list('start_date', 'end_date')[:6])
+    if not periods:
+        return {}
+    return {
+        'average_length': average_cycle_length([start for start, _ in periods]),
+        'recent_periods': [[start.isoformat(), end.isoformat() if end else None] for start, end in periods[:3]],
+        'ongoing': periods[0][1] is None,
+    }
+
+
+def _summarize_daily_logs(user_id):
+    since = timezone.now().date() - timedelta(days=RECENT_DAYS)
+    logs = DailyLog.objects.filter(user_id=user_id, date__gte=since)
+    rows = list(logs.values_list('date', 'mood', 'pain_level'))
+    if not rows:
+        return {}
+    pains = [pain for _, _, pain in rows if pain is not None]
+    symptoms = Counter(logs.values_list('symptoms__name', flat=True).exclude(symptoms__name=None))
+    return {
+        'since': since.isoformat(),
+        'days_logged': len(rows),
+        'moods': dict(Counter(mood for _, mood, _ in rows if mood).most_common(3)),
+        'average_pain': round(sum(pains) / len(pains), 1) if pains else None,
+        'symptoms': dict(symptoms.most_common(5)),
+    }
+
+
+def _summarize_pregnancy(user_id):
+    due_date = PregnancyProfile.objects.filter(user_id=user_id).values_list('estimated_due_date', flat=True).first()
+    return {'due_date': due_date.isoformat()} if due_date else {}
+
+
+def _summarize_postpartum(user_id):
+    since = timezone.now().date() - timedelta(days=RECENT_DAYS)
+    moods = list(PostpartumMoodLog.objects.filter(user_id=user_id, date__gte=since).values_list('mood', flat=True))
+    if not moods:
+        return {}
+    return {'since': since.isoformat(), 'moods': dict(Counter(moods).most_common(3)), 'latest': moods[0]}
+
+
+SECTIONS = {
+    'cycles': _summarize_cycles,
+    'daily_logs': _summarize_daily_logs,
+    'pregnancy': _summarize_pregnancy,
+    'postpartum': _summarize_postpartum,
+}
+
+
+def _counts(counts):
+    return ', '.join(f'{name} x{count}' for name, count in counts.items())
+
+
+def render_summary(sections, token_budget):
+    """
+    Render summary sections as short lines of text, most important first,
+    dropping whatever does not fit in roughly `token_budget` tokens.
+    """
+    lines = []
+    cycles = sections.get('cycles')
+    if cycles:
+        periods = '; '.join(f"{start} to {end or 'ongoing'}" for start, end in cycles['recent_periods'])
+        line = f'Recent periods: {periods}.'
+        if cycles['average_length']:
+            line += f" Average cycle length {cycles['average_length']} days."
+        lines.append(line)
+    pregnancy = sections.get('pregnancy')
+    if pregnancy:
+        lines.append(f"Pregnant, estimated due date {pregnancy['due_date']}.")
+    logs = sections.get('daily_logs')
+    if logs:
+        line = f"Since {logs['since']}: logged {logs['days_logged']} days"
+        if logs['moods']:
+            line += f"; moods {_counts(logs['moods'])}"
+        if logs['average_pain'] is not None:
+            line += f"; average pain {logs['average_pain']}/5"
+        if logs['symptoms']:
+            line += f"; symptoms {_counts(logs['symptoms'])}"
+        lines.append(line + '.')
+    postpartum = sections.get('postpartum')
+    if postpartum:
+        lines.append(f"Postpartum moods since {postpartum['since']}: {_counts(postpartum['moods'])}; latest {postpartum['latest']}.")
+
+    # Roughly four characters per token.
+    budget = token_budget * 4
+    text = ''
+    for line in lines:
+        if len(text) + len(line) + 1 > budget:
+            break
+        text += line + '\n'
+    return text.strip()
+
+
+def refresh_summary(user_id, *names):
+    """
+    Recompute the named sections of a user's summary, re-render its text and
+    return it. Each section reads a bounded window, independent of how much
+    history the user has.
+    """
+    today = timezone.now().date().isoformat()
+    updates = {name: SECTIONS[name](user_id) for name in names}
+    with transaction.atomic():
+        summary, _ = UserHealthSummary.objects.select_for_update().get_or_create(user_id=user_id)
+        summary.sections.update(updates)
+        summary.rendered_on.update(dict.fromkeys(names, today))
+        summary.text = render_summary(summary.sections, settings.CHATBOT_CONTEXT_TOKEN_BUDGET)
+        summary.save()
+    return summary.text
+
+
+async def aget_context(user):
+    """
+    Return the user's rendered summary ('' if there is none), in a single
+    query unless its windowed sections were last computed before today.
+    """
+    row = await UserHealthSummary.objects.filter(user=user).values_list('text', 'rendered_on').afirst()
+    if row is None:
+        return ''
+    text, rendered_on = row
+    today = timezone.now().date().isoformat()
+    stale = [name for name in WINDOWED_SECTIONS if rendered_on.get(name) != today]
+    if stale:
+        text = await sync_to_async(refresh_summary)(user.pk, *stale)
+    return text or ''
@@ -0,0 +1,44 @@
+import threading
+from collections import OrderedDict, deque
+
+from django.conf import settings
+
+
+class ConversationHistory:
+    """
+    Bounded in-process store of recent (message, reply) pairs per user.
+
+    Each user keeps at most `max_turns` exchanges and at most `max_users`
+    users are held, evicting the least recently active one.
+    """
+    def __init__(self, max_turns, max_users):
+        self.max_turns = max_turns
+        self.max_users = max_users
+        self._conversations = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            turns = self._conversations.get(user_id)
+            return list(turns) if turns else []
+
+    def append(self, user_id, message, reply):
+        with self._lock:
+            turns = self._conversations.get(user_id)
+            if turns is None:
+                turns = self._conversations[user_id] = deque(maxlen=self.max_turns)
+                if len(self._conversations) > self.max_users:
+                    self._conversations.popitem(last=False)
+            else:
+                self._conversations.move_to_end(user_id)
+            turns.append((message, reply))
+
+    def clear(self, user_id):
+        with self._lock:
+            self._conversations.pop(user_id, None)
+
+
+conversation_history = ConversationHistory(
+    max_turns=settings.CHATBOT_HISTORY_TURNS,
+    max_users=settings.CHATBOT_HISTORY_MAX_USERS,
+)
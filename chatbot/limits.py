@@ -0,0 +1,47 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from rest_framework import exceptions, status
+
+
+class TooManyChats(exceptions.APIException):
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    default_detail = 'You already have a chat in progress. Please wait for it to finish.'
+    default_code = 'too_many_chats'
+
+
+class ChatConcurrencyLimiter:
+    """
+    Caps the number of chats each user can have in flight in this process.
+    """
+    def __init__(self, max_per_user):
+        self.max_per_user = max_per_user
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, user_id):
+        with self._lock:
+            active = self._active.get(user_id, 0)
+            if active >= self.max_per_user:
+                raise TooManyChats()
+            self._active[user_id] = active + 1
+
+    def release(self, user_id):
+        with self._lock:
+            active = self._active.get(user_id, 0) - 1
+            if active > 0:
+                self._active[user_id] = active
+            else:
+                self._active.pop(user_id, None)
+
+    @contextmanager
+    def slot(self, user_id):
+        self.acquire(user_id)
+        try:
+            yield
+        finally:
+            self.release(user_id)
+
+
+chat_limiter = ChatConcurrencyLimiter(settings.CHATBOT_MAX_CONCURRENT_CHATS)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userhealthsummary',
+            name='rendered_on',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -1,3 +1,19 @@
 from django.db import models
+from users.models import User
 
-# Create your models here.
+class UserHealthSummary(models.Model):
+    """
+    Compact per-user summary of cycles, recent logs, pregnancy and postpartum
+    data used as chatbot context. Each section is refreshed when its source
+    model is written, and the ones over recent days also on the first read
+    of a new day; `text` is the rendered, token-budgeted summary.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='health_summary')
+    sections = models.JSONField(default=dict)
+    # Date each section was last computed, as an ISO string by section name.
+    rendered_on = models.JSONField(default=dict)
+    text = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Health summary for {self.user.email}"
@@ -0,0 +1,45 @@
+from .context import aget_context
+from .history import conversation_history
+from .providers import get_provider
+from .retrieval import faq_index, normalize_question, reply_cache
+
+
+async def stream_reply(user, message):
+    """
+    Stream the assistant's reply to `message` and record the exchange in the
+    user's conversation history once it completes.
+
+    Questions matching an FAQ are answered with it directly; only the rest
+    reach the provider, along with the user's health summary and recent
+    conversation. Replies are memoized only for users with neither, so
+    personalized answers are never shared.
+    """
+    context = await aget_context(user)
+    history = conversation_history.get(user.pk)
+    shared = not (context or history)
+    question = normalize_question(message)
+    version = await faq_index.arefresh()
+
+    answer = reply_cache.get(question, version) if shared else None
+    if answer is None:
+        answer = faq_index.match(message)
+
+    if answer is not None:
+        yield answer
+    else:
+        chunks = []
+        async for chunk in get_provider().stream(message, history, context):
+            chunks.append(chunk)
+            yield chunk
+        answer = ''.join(chunks)
+
+    if shared:
+        reply_cache.set(question, version, answer)
+    conversation_history.append(user.pk, message, answer)
+
+
+async def reply(user, message):
+    """
+    Return the assistant's complete reply to `message`.
+    """
+    return ''.join([chunk async for chunk in stream_reply(user, message)])
@@ -0,0 +1,52 @@
+import asyncio
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class BaseProvider:
+    """
+    Interface for the assistant backends behind the chatbot.
+
+    `stream()` is an async generator yielding the reply as text chunks, so a
+    provider waiting on a remote model never blocks a worker thread. Real
+    providers should do their network I/O with an async client.
+    """
+    async def stream(self, message, history, context):
+        """
+        Yield the reply to `message`. `history` is a list of earlier
+        (message, reply) pairs for the same user, oldest first, and
+        `context` a short text summary of the user's health data.
+        """
+        raise NotImplementedError('Chatbot providers must implement .stream()')
+        yield  # Makes this an async generator, like the implementations.
+
+
+class LocalProvider(BaseProvider):
+    """
+    Deterministic stand-in used until a real assistant is configured, and in
+    tests. Streams a fixed reply word by word.
+    """
+    reply = (
+        "Thank you for your question! Our AI companion is still in training and will be available soon. "
+        "Please always consult a doctor for medical advice."
+    )
+
+    def __init__(self, token_delay=0):
+        self.token_delay = token_delay
+
+    async def stream(self, message, history, context):
+        words = self.reply.split(' ')
+        for i, word in enumerate(words):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield word if i == len(words) - 1 else word + ' '
+
+
+@lru_cache(maxsize=None)
+def get_provider():
+    """
+    Return the provider configured by CHATBOT_PROVIDER.
+    """
+    return import_string(settings.CHATBOT_PROVIDER)(**settings.CHATBOT_PROVIDER_OPTIONS)
@@ -0,0 +1,170 @@
+import math
+import re
+import threading
+import zlib
+from collections import Counter, OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from content.models import StaticContent
+
+FAQ_VERSION_KEY = 'chatbot:faq-version'
+
+# Hashed feature space for the n-gram vectors.
+DIMENSIONS = 1 << 20
+
+_non_word = re.compile(r'[^\w\s]+')
+_spaces = re.compile(r'\s+')
+
+
+def normalize_question(text):
+    """
+    Lowercase, drop punctuation and collapse whitespace, so trivially
+    different phrasings of a question share one cache key.
+    """
+    return _spaces.sub(' ', _non_word.sub(' ', text.lower())).strip()
+
+
+def _features(text):
+    """
+    Hashed word unigrams and character trigrams of normalized `text`.
+    """
+    features = Counter()
+    for word in text.split():
+        features[zlib.crc32(b'w:' + word.encode()) % DIMENSIONS] += 1
+    padded = f' {text} '
+    for i in range(len(padded) - 2):
+        features[zlib.crc32(padded[i:i + 3].encode()) % DIMENSIONS] += 1
+    return features
+
+
+def _unit(weights):
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    return {bucket: w / norm for bucket, w in weights.items()} if norm else {}
+
+
+class FAQIndex:
+    """
+    In-process TF-IDF similarity index over FAQ titles and bodies.
+
+    Every FAQ contributes two entries, its title and its body, and a question
+    is scored against both with cosine similarity through an inverted index,
+    so matching costs only the postings of the question's own n-grams. The
+    index is rebuilt lazily whenever StaticContent changes (see signals).
+    """
+    def __init__(self):
+        self._version = None
+        self._answers = []
+        self._entries = []
+        self._postings = {}
+        self._idf = {}
+        self._default_idf = 1.0
+        self._lock = threading.Lock()
+
+    def build(self, faqs):
+        """
+        Index `faqs`, an iterable of (title, body) pairs.
+        """
+        answers, documents = [], []
+        for title, body in faqs:
+            answers.append(body)
+            documents.append((len(answers) - 1, _features(normalize_question(title))))
+            documents.append((len(answers) - 1, _features(normalize_question(body))))
+
+        document_frequency = Counter()
+        for _, features in documents:
+            document_frequency.update(features.keys())
+        count = len(documents)
+        idf = {bucket: math.log((1 + count) / (1 + df)) + 1 for bucket, df in document_frequency.items()}
+
+        postings = defaultdict(list)
+        entries = []
+        for answer_index, features in documents:
+            vector = _unit({b: (1 + math.log(tf)) * idf[b] for b, tf in features.items()})
+            for bucket, weight in vector.items():
+                postings[bucket].append((len(entries), weight))
+            entries.append(answer_index)
+
+        self._answers, self._entries, self._postings = answers, entries, dict(postings)
+        self._idf, self._default_idf = idf, math.log(1 + count) + 1
+
+    def search(self, question):
+        """
+        Return (answer, similarity) for the closest FAQ, or (None, 0.0).
+        """
+        features = _features(normalize_question(question))
+        vector = _unit({
+            b: (1 + math.log(tf)) * self._idf.get(b, self._default_idf) for b, tf in features.items()
+        })
+        scores = defaultdict(float)
+        for bucket, weight in vector.items():
+            for entry, entry_weight in self._postings.get(bucket, ()):
+                scores[entry] += weight * entry_weight
+        if not scores:
+            return None, 0.0
+        entry, score = max(scores.items(), key=lambda item: item[1])
+        return self._answers[self._entries[entry]], score
+
+    def _faqs(self):
+        return StaticContent.objects.filter(content_type=StaticContent.ContentType.FAQ).order_by('id').values_list('title', 'body')
+
+    async def arefresh(self):
+        """
+        Rebuild the index if the FAQs changed since it was built, and return
+        the FAQ version it now reflects.
+        """
+        version = await cache.aget(FAQ_VERSION_KEY, 0)
+        if version != self._version:
+            faqs = [faq async for faq in self._faqs()]
+            with self._lock:
+                self.build(faqs)
+                self._version = version
+        return version
+
+    def match(self, question):
+        """
+        Return the FAQ answer for `question` if it clears CHATBOT_FAQ_MATCH_THRESHOLD.
+        """
+        answer, score = self.search(question)
+        return answer if score >= settings.CHATBOT_FAQ_MATCH_THRESHOLD else None
+
+
+class ReplyCache:
+    """
+    LRU memo of replies keyed by normalized question. Entries remember the FAQ
+    version they were computed against and are ignored once it changes.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._replies = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, question, version):
+        with self._lock:
+            entry = self._replies.get(question)
+            if entry is None or entry[0] != version:
+                return None
+            self._replies.move_to_end(question)
+            return entry[1]
+
+    def set(self, question, version, reply):
+        with self._lock:
+            self._replies[question] = (version, reply)
+            self._replies.move_to_end(question)
+            if len(self._replies) > self.max_size:
+                self._replies.popitem(last=False)
+
+
+faq_index = FAQIndex()
+reply_cache = ReplyCache(settings.CHATBOT_REPLY_CACHE_SIZE)
+
+
+def invalidate_faqs():
+    """
+    Mark the FAQ index and memoized replies stale in every process sharing the cache.
+    """
+    try:
+        cache.incr(FAQ_VERSION_KEY)
+    except ValueError:
+        cache.set(FAQ_VERSION_KEY, 1, timeout=None)
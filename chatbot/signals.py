@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from content.models import StaticContent
+from cycles.models import Cycle, DailyLog
+from postpartum.models import PostpartumMoodLog
+from pregnancy.models import PregnancyProfile
+from users.models import User
+from .retrieval import invalidate_faqs
+from .tasks import refresh_summaries
+
+SUMMARY_SECTIONS = {
+    Cycle: 'cycles',
+    DailyLog: 'daily_logs',
+    PregnancyProfile: 'pregnancy',
+    PostpartumMoodLog: 'postpartum',
+}
+
+
+@receiver([post_save, post_delete], sender=StaticContent)
+def static_content_changed(sender, instance, **kwargs):
+    # Not before commit: a process rebuilding the index in between would read
+    # the old FAQs and cache them under the new version.
+    transaction.on_commit(invalidate_faqs)
+
+
+def _deleting_user(origin):
+    if isinstance(origin, QuerySet):
+        return origin.model is User
+    return isinstance(origin, User)
+
+
+def _queue_refresh(user_id, section):
+    # Runs once the write commits, off the request path.
+    refresh_summaries.enqueue(user_id, section)
+
+
+@receiver([post_save, post_delete], sender=Cycle)
+@receiver([post_save, post_delete], sender=DailyLog)
+@receiver([post_save, post_delete], sender=PregnancyProfile)
+@receiver([post_save, post_delete], sender=PostpartumMoodLog)
+def health_data_changed(sender, instance, **kwargs):
+    # Nothing to summarize when the rows go away with their user.
+    if _deleting_user(kwargs.get('origin')):
+        return
+    _queue_refresh(instance.user_id, SUMMARY_SECTIONS[sender])
+
+
+@receiver(m2m_changed, sender=DailyLog.symptoms.through)
+def daily_log_symptoms_changed(sender, instance, action, reverse, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and not reverse:
+        _queue_refresh(instance.user_id, 'daily_logs')
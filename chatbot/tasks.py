@@ -0,0 +1,18 @@
+from collections import defaultdict
+
+from users.models import User
+from tasks.queue import task
+from .context import refresh_summary
+
+
+@task(batch=True)
+def refresh_summaries(calls):
+    """
+    Refresh the summary sections queued since the last run, once per user.
+    """
+    sections = defaultdict(set)
+    for user_id, section in calls:
+        sections[user_id].add(section)
+    # Users deleted in the meantime have no summary left to refresh.
+    for user_id in User.objects.filter(pk__in=sections).values_list('pk', flat=True):
+        refresh_summary(user_id, *sorted(sections[user_id]))
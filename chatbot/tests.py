@@ -1,3 +1,108 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.db import transaction
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from content.models import StaticContent
+from cycles.models import DailyLog
+from users.models import User
+from .context import RECENT_DAYS, aget_context, refresh_summary
+from .history import conversation_history
+from .limits import chat_limiter
+from .pipeline import reply
+from .providers import BaseProvider
+from .retrieval import FAQIndex, reply_cache
+
+
+class HistoryProvider(BaseProvider):
+    """
+    Replies with how many earlier exchanges it was given.
+    """
+    async def stream(self, message, history, context):
+        yield f'{len(history)} earlier exchanges'
+
+
+@mock.patch('chatbot.pipeline.get_provider', HistoryProvider)
+class ReplyCacheTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(email='alice@example.com', password='pw123456')
+        self.bob = User.objects.create_user(email='bob@example.com', password='pw123456')
+        self.addCleanup(reply_cache._replies.clear)
+        for user in (self.alice, self.bob):
+            self.addCleanup(conversation_history.clear, user.pk)
+
+    async def test_replies_shaped_by_history_are_not_shared(self):
+        self.assertEqual(await reply(self.alice, 'Hello'), '0 earlier exchanges')
+        self.assertEqual(await reply(self.alice, 'Is this normal?'), '1 earlier exchanges')
+        self.assertEqual(await reply(self.bob, 'Is this normal?'), '0 earlier exchanges')
+
+    async def test_replies_without_history_are_shared(self):
+        self.assertEqual(await reply(self.alice, 'Is this normal?'), '0 earlier exchanges')
+        conversation_history.clear(self.alice.pk)
+        with mock.patch.object(HistoryProvider, 'stream') as stream:
+            self.assertEqual(await reply(self.bob, 'Is this normal?'), '0 earlier exchanges')
+        stream.assert_not_called()
+
+
+@mock.patch('chatbot.pipeline.get_provider', HistoryProvider)
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-sse'}})
+class StreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='streamer@example.com', password='pw123456')
+        self.client = AsyncClient(AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.addCleanup(reply_cache._replies.clear)
+        self.addCleanup(conversation_history.clear, self.user.pk)
+
+    async def test_reply_streams_as_events(self):
+        response = await self.client.post('/api/chatbot/stream/', {'message': 'Hello'}, content_type='application/json')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        response.close()
+        self.assertEqual(body, (
+            b'data: {"token":"0 earlier exchanges"}\n\n'
+            b'event: done\ndata: {"response":"0 earlier exchanges"}\n\n'
+        ))
+        self.assertEqual(conversation_history.get(self.user.pk), [('Hello', '0 earlier exchanges')])
+        self.assertNotIn(self.user.pk, chat_limiter._active)
+
+    async def test_invalid_message(self):
+        response = await self.client.post('/api/chatbot/stream/', {}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn(self.user.pk, chat_limiter._active)
+
+
+class HealthSummaryTests(TestCase):
+    def test_recent_sections_move_with_the_day(self):
+        user = User.objects.create_user(email='quiet@example.com', password='pw123456')
+        today = timezone.now().date()
+        DailyLog.objects.create(user=user, date=today, mood='SAD')
+        refresh_summary(user.pk, 'cycles', 'daily_logs', 'pregnancy', 'postpartum')
+        self.assertIn('moods SAD x1', async_to_sync(aget_context)(user))
+
+        # No writes since; RECENT_DAYS later the log has left the window.
+        later = timezone.now() + timedelta(days=RECENT_DAYS + 1)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.assertEqual(async_to_sync(aget_context)(user), '')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-faqs'}})
+class FAQIndexTests(TestCase):
+    def test_index_changes_after_commit(self):
+        index = FAQIndex()
+        refresh = async_to_sync(index.arefresh)
+        question = 'Is spotting between periods normal?'
+        refresh()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                StaticContent.objects.create(
+                    title=question, body='Often, yes.',
+                    content_type=StaticContent.ContentType.FAQ, relevant_mode='menstrual',
+                )
+                refresh()
+                self.assertIsNone(index.match(question))
+        refresh()
+        self.assertEqual(index.match(question), 'Often, yes.')
@@ -1,6 +1,14 @@
+from django.conf import settings
 from django.urls import path
 from .views import ChatbotQueryView
+from .async_views import ChatbotStreamView
+
+if settings.ASYNC_VIEWS:
+    from .async_views import AsyncChatbotQueryView as ChatbotQueryView
 
 urlpatterns = [
     path('query/', ChatbotQueryView.as_view(), name='chatbot-query'),
-]
\ No newline at end of file
+    # Server-sent events variant of the query endpoint
+    # Maps to /api/chatbot/stream/
+    path('stream/', ChatbotStreamView.as_view(), name='chatbot-stream'),
+]
@@ -1,13 +1,26 @@
+from asgiref.sync import async_to_sync
 from rest_framework import views, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from .limits import chat_limiter
+from .pipeline import reply
+from .serializers import ChatbotQuerySerializer
 
 class ChatbotQueryView(views.APIView):
+    """
+    Answer a chat message in a single JSON response.
+    Clients that can consume server-sent events should prefer ChatbotStreamView.
+    """
     permission_classes = (IsAuthenticated,)
 
     def post(self, request, *args, **kwargs):
-        # The user's message is in request.data['message'], but we ignore it for the MVP.
+        serializer = ChatbotQuerySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with chat_limiter.slot(request.user.pk):
+            response_text = async_to_sync(reply)(request.user, serializer.validated_data['message'])
+
         response_data = {
-            "response": "Thank you for your question! Our AI companion is still in training and will be available soon. Please always consult a doctor for medical advice."
+            "response": response_text
         }
-        return Response(response_data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(response_data, status=status.HTTP_200_OK)
@@ -0,0 +1,18 @@
+from django.utils.decorators import method_decorator
+from her_saheli_backend.async_views import AsyncAPIView, JSONResponse
+from her_saheli_backend.caching import cache_response
+from her_saheli_backend.replicas import use_replica
+from .models import StaticContent
+from .serializers import StaticContentReadSerializer
+from .signals import CONTENT_NAMESPACE
+from .views import filter_static_content
+
+class AsyncStaticContentView(AsyncAPIView):
+    """
+    Async variant of StaticContentView, served when ASYNC_VIEWS is enabled.
+    """
+    @method_decorator(cache_response(CONTENT_NAMESPACE))
+    @method_decorator(use_replica)
+    async def get(self, request):
+        queryset = filter_static_content(StaticContent.objects.all(), request.GET)
+        return JSONResponse(await StaticContentReadSerializer.alist(queryset))
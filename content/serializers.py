@@ -1,7 +1,12 @@
 from rest_framework import serializers
+from her_saheli_backend.serializers import ValuesSerializer
 from .models import StaticContent
 
 class StaticContentSerializer(serializers.ModelSerializer):
     class Meta:
         model = StaticContent
-        fields = ('id', 'title', 'body', 'content_type', 'relevant_mode', 'week_of_pregnancy')
\ No newline at end of file
+        fields = ('id', 'title', 'body', 'content_type', 'relevant_mode', 'week_of_pregnancy')
+
+class StaticContentReadSerializer(ValuesSerializer):
+    model = StaticContent
+    fields = StaticContentSerializer.Meta.fields
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from her_saheli_backend.caching import invalidate_namespace
+from .models import StaticContent
+
+# Cache namespace of every response built from static content.
+CONTENT_NAMESPACE = 'content'
+
+
+@receiver([post_save, post_delete], sender=StaticContent)
+def static_content_changed(sender, instance, **kwargs):
+    invalidate_namespace(CONTENT_NAMESPACE)
@@ -1,3 +1,33 @@
 from django.test import TestCase
 
-# Create your tests here.
+from her_saheli_backend.renderers import FastJSONRenderer
+from .models import StaticContent
+from .serializers import StaticContentReadSerializer, StaticContentSerializer
+
+
+class StaticContentReadSerializerTests(TestCase):
+    """
+    StaticContentReadSerializer renders byte for byte what StaticContentSerializer does.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        StaticContent.objects.create(
+            title='Week 12', body='Ｂaby is the size of a plum.\n"Rest" often.', content_type='GUIDE',
+            relevant_mode='pregnancy', week_of_pregnancy=12,
+        )
+        StaticContent.objects.create(title='Hydrate', body='Drink water.', content_type='TIP', relevant_mode='menstrual')
+        cls.content = StaticContent.objects.order_by('pk')
+
+    def test_list(self):
+        render = FastJSONRenderer().render
+        self.assertEqual(
+            render(StaticContentReadSerializer.list(self.content)),
+            render(StaticContentSerializer(self.content, many=True).data),
+        )
+
+    async def test_alist(self):
+        render = FastJSONRenderer().render
+        self.assertEqual(
+            render(await StaticContentReadSerializer.alist(self.content)),
+            render(StaticContentSerializer([item async for item in self.content], many=True).data),
+        )
@@ -1,6 +1,10 @@
+from django.conf import settings
 from django.urls import path
 from .views import StaticContentView
 
+if settings.ASYNC_VIEWS:
+    from .async_views import AsyncStaticContentView as StaticContentView
+
 urlpatterns = [
     path('', StaticContentView.as_view(), name='static-content-list'),
 ]
\ No newline at end of file
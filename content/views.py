@@ -1,8 +1,37 @@
+from django.utils.decorators import method_decorator
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from her_saheli_backend.caching import cache_response
+from her_saheli_backend.replicas import use_replica
 from .models import StaticContent
-from .serializers import StaticContentSerializer
+from .serializers import StaticContentSerializer, StaticContentReadSerializer
+from .signals import CONTENT_NAMESPACE
 
+def filter_static_content(queryset, params):
+    """
+    Apply the `mode`, `type` and `week` query parameter filters.
+    """
+    # Filter by relevant health mode
+    mode = params.get('mode')
+    if mode:
+        queryset = queryset.filter(relevant_mode__iexact=mode)
+        
+    # Filter by content type
+    content_type = params.get('type')
+    if content_type:
+        queryset = queryset.filter(content_type__iexact=content_type)
+
+    # Filter by week of pregnancy (only for pregnancy guides)
+    week = params.get('week')
+    if week and week.isdigit():
+        queryset = queryset.filter(week_of_pregnancy=int(week))
+        
+    return queryset
+
+
+@method_decorator(cache_response(CONTENT_NAMESPACE), name='get')
+@method_decorator(use_replica, name='get')
 class StaticContentView(generics.ListAPIView):
     """
     List static content like tips, guides, and FAQs.
@@ -15,21 +44,11 @@ class StaticContentView(generics.ListAPIView):
     permission_classes = (IsAuthenticated,)
 
     def get_queryset(self):
-        queryset = StaticContent.objects.all()
-        
-        # Filter by relevant health mode
-        mode = self.request.query_params.get('mode')
-        if mode:
-            queryset = queryset.filter(relevant_mode__iexact=mode)
-            
-        # Filter by content type
-        content_type = self.request.query_params.get('type')
-        if content_type:
-            queryset = queryset.filter(content_type__iexact=content_type)
+        return filter_static_content(StaticContent.objects.all(), self.request.query_params)
 
-        # Filter by week of pregnancy (only for pregnancy guides)
-        week = self.request.query_params.get('week')
-        if week and week.isdigit():
-            queryset = queryset.filter(week_of_pregnancy=int(week))
-            
-        return queryset
\ No newline at end of file
+    def list(self, request, *args, **kwargs):
+        # Unpaginated lists skip model instantiation entirely.
+        if self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(StaticContentReadSerializer.list(queryset))
\ No newline at end of file
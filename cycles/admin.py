@@ -1,19 +1,41 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from her_saheli_backend.admin import UserDataAdmin
 from .models import Cycle, Symptom, DailyLog
+from .repair import merge_cycles, repair_users
 
 @admin.register(Symptom)
 class SymptomAdmin(admin.ModelAdmin):
+    list_display = ('name', 'key', 'bit')
     search_fields = ('name',)
+    readonly_fields = ('key', 'bit')
+    ordering = ('name',)
 
 @admin.register(Cycle)
-class CycleAdmin(admin.ModelAdmin):
+class CycleAdmin(UserDataAdmin):
     list_display = ('user', 'start_date', 'end_date')
-    search_fields = ('user__username',)
-    list_filter = ('start_date',)
+    date_hierarchy = 'start_date'
+    actions = ('repair_histories', 'merge_selected')
+
+    @admin.action(description="Repair the selected cycles' users' histories", permissions=('change', 'delete'))
+    def repair_histories(self, request, queryset):
+        totals = repair_users(set(queryset.values_list('user_id', flat=True)))
+        self.message_user(request, (
+            f'Repaired {totals["users"]} users: {totals["inverted"]} inverted cycles, '
+            f'{totals["merged"]} cycles merged away.'
+        ))
+
+    @admin.action(description='Merge the selected cycles into one', permissions=('change', 'delete'))
+    def merge_selected(self, request, queryset):
+        cycles = list(queryset)
+        if len({cycle.user_id for cycle in cycles}) != 1:
+            self.message_user(request, 'Only cycles of one user can be merged.', messages.ERROR)
+            return
+        cycle = merge_cycles(cycles)
+        self.message_user(request, f'Merged {len(cycles)} cycles into {cycle.start_date} - {cycle.end_date or "ongoing"}.')
 
 @admin.register(DailyLog)
-class DailyLogAdmin(admin.ModelAdmin):
+class DailyLogAdmin(UserDataAdmin):
     list_display = ('user', 'date', 'mood', 'pain_level')
-    search_fields = ('user__username',)
-    list_filter = ('date', 'mood')
-    filter_horizontal = ('symptoms',)
\ No newline at end of file
+    list_filter = ('mood',)
+    date_hierarchy = 'date'
+    autocomplete_fields = ('user', 'symptoms')
@@ -0,0 +1,129 @@
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.timezone import now
+from rest_framework import status
+from her_saheli_backend.async_views import AsyncAPIView, JSONResponse
+from her_saheli_backend.caching import cache_response
+from her_saheli_backend.idempotency import idempotent
+from her_saheli_backend.replicas import use_replica
+from .models import Cycle, DailyLog
+from .phases import get_timeline
+from .serializers import CycleSerializer, DailyLogReadSerializer
+from .views import (
+    build_predictions, period_dates, save_daily_log, save_symptom_log,
+    validate_log_fields, mood_log_fields, symptom_log_fields,
+)
+
+
+class AsyncCycleLogView(AsyncAPIView):
+    """
+    Async variant of CycleLogView, served when ASYNC_VIEWS is enabled.
+    """
+    @method_decorator(cache_response('user'))
+    @method_decorator(use_replica)
+    async def get(self, request):
+        timeline = await sync_to_async(get_timeline)(request.user)
+        return JSONResponse(period_dates(timeline, timezone.now().date()))
+
+    @method_decorator(idempotent)
+    async def post(self, request):
+        data = request.data
+        user = request.user
+
+        if 'end_date' in data:
+            last_cycle = await Cycle.objects.filter(user=user, end_date__isnull=True).order_by('-start_date').afirst()
+            
+            if last_cycle:
+                serializer = CycleSerializer(last_cycle, data=data, partial=True)
+                if serializer.is_valid():
+                    # Additional validation to prevent end_date from being before start_date
+                    if serializer.validated_data.get('end_date') < last_cycle.start_date:
+                        return JSONResponse({"end_date": ["End date cannot be before the start date."]}, status=status.HTTP_400_BAD_REQUEST)
+                    for attr, value in serializer.validated_data.items():
+                        setattr(last_cycle, attr, value)
+                    await last_cycle.asave()
+                    return JSONResponse(CycleSerializer(last_cycle).data, status=status.HTTP_200_OK)
+                return JSONResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            else:
+                return JSONResponse({"error": "No active period found to end."}, status=status.HTTP_400_BAD_REQUEST)
+
+        elif 'start_date' in data:
+            if await Cycle.objects.filter(user=user, end_date__isnull=True).aexists():
+                return JSONResponse({"error": "An active period already exists. End it before starting a new one."}, status=status.HTTP_400_BAD_REQUEST)
+
+            serializer = CycleSerializer(data=data)
+            if serializer.is_valid():
+                cycle = await Cycle.objects.acreate(user=user, **serializer.validated_data)
+                return JSONResponse(CycleSerializer(cycle).data, status=status.HTTP_201_CREATED)
+            return JSONResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        return JSONResponse({"error": "Provide 'start_date' to begin a period or 'end_date' to end the current one."}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncDailyLogView(AsyncAPIView):
+    """
+    Async variant of DailyLogView, served when ASYNC_VIEWS is enabled.
+    """
+    @method_decorator(cache_response('user'))
+    async def get(self, request, date_str):
+        try:
+            log_date = timezone.datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError:
+            return JSONResponse({"error": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        data = await DailyLogReadSerializer.aget(DailyLog.objects.filter(user=request.user, date=log_date))
+        if data is None:
+            return JSONResponse(status=status.HTTP_404_NOT_FOUND)
+        return JSONResponse(data)
+
+    @method_decorator(idempotent)
+    async def post(self, request, date_str):
+        try:
+            log_date = timezone.datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError:
+            return JSONResponse({"error": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        # Symptom validation in DailyLogSerializer is sync ORM work.
+        data, response_status = await sync_to_async(save_daily_log)(request.user, log_date, request.data)
+        return JSONResponse(data, status=response_status)
+
+
+class AsyncUnifiedPredictionView(AsyncAPIView):
+    """
+    Async variant of UnifiedPredictionView, served when ASYNC_VIEWS is enabled.
+    """
+    @method_decorator(cache_response('user'))
+    @method_decorator(use_replica)
+    async def get(self, request):
+        timeline = await sync_to_async(get_timeline)(request.user)
+
+        if len(timeline.cycles) < 2:
+            return JSONResponse({"message": "Not enough cycle data to make a prediction."}, status=status.HTTP_404_NOT_FOUND)
+
+        return JSONResponse(build_predictions(timeline))
+
+
+class AsyncSymptomLogView(AsyncAPIView):
+    """
+    Async variant of SymptomLogView, served when ASYNC_VIEWS is enabled.
+    """
+    @method_decorator(idempotent)
+    async def post(self, request, *args, **kwargs):
+        values, errors = validate_log_fields(symptom_log_fields(request.data))
+        if errors:
+            return JSONResponse(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        await sync_to_async(save_symptom_log)(request.user, values, request.data.get('symptoms', []))
+        return JSONResponse(status=status.HTTP_200_OK)
+
+
+class AsyncMoodLogView(AsyncAPIView):
+    """
+    Async variant of MoodLogView, served when ASYNC_VIEWS is enabled.
+    """
+    @method_decorator(idempotent)
+    async def post(self, request, *args, **kwargs):
+        values, errors = validate_log_fields(mood_log_fields(request.data))
+        if errors:
+            return JSONResponse(errors, status=status.HTTP_400_BAD_REQUEST)
+        await DailyLog.objects.aupdate_or_create(user=request.user, date=now().date(), defaults=values)
+        return JSONResponse(status=status.HTTP_200_OK)
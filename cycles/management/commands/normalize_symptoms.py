@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from cycles.models import Symptom
+from cycles.symptoms import merge_duplicate_symptoms
+
+
+class Command(BaseCommand):
+    help = ('Merges symptoms that are spellings or aliases of the same symptom, renames them to their '
+            'canonical names and refreshes the symptom masks of daily logs. Run after editing the aliases '
+            'in cycles/symptoms.py.')
+
+    def handle(self, *args, **options):
+        merged = merge_duplicate_symptoms()
+        self.stdout.write(self.style.SUCCESS(
+            f'Merged {merged} duplicate symptoms; {Symptom.objects.count()} symptoms remain.'
+        ))
@@ -0,0 +1,63 @@
+import multiprocessing
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from cycles.models import Cycle
+from cycles.repair import repair_user, scan_users
+
+
+def _scan_chunk(user_ids):
+    return list(scan_users(user_ids))
+
+
+class Command(BaseCommand):
+    help = ('Repairs corrupted cycle histories: swaps inverted start and end dates and merges overlapping '
+            'or adjacent cycles. Users are scanned in parallel chunks; each user needing repair is then '
+            'fixed in a transaction of its own.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, nargs='+', help='Only these user ids; all users by default.')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be repaired without saving.')
+        parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(), help='Processes scanning chunks.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Users per chunk.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        users = Cycle.objects.order_by('user_id').values_list('user_id', flat=True).distinct()
+        if options['users']:
+            users = users.filter(user_id__in=options['users'])
+        user_ids = list(users)
+        size = options['chunk_size']
+        chunks = [user_ids[i:i + size] for i in range(0, len(user_ids), size)]
+
+        if options['workers'] > 1 and len(chunks) > 1:
+            # Forked workers must not share the parent's connections.
+            connections.close_all()
+            pool = multiprocessing.get_context('fork').Pool(options['workers'])
+            results = pool.imap_unordered(_scan_chunk, chunks)
+        else:
+            pool = None
+            results = map(_scan_chunk, chunks)
+
+        # Workers only read; repairs run here, where their signals and
+        # on-commit hooks take effect.
+        totals = Counter()
+        try:
+            for done, dirty in enumerate(results, 1):
+                for user_id in dirty:
+                    totals += repair_user(user_id, options['dry_run'])
+                self.stdout.write(f'{done}/{len(chunks)} chunks, {totals["users"]} users repaired')
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        verb = 'Would repair' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {totals["users"]} of {len(user_ids)} users: {totals["inverted"]} inverted cycles, '
+            f'{totals["merged"]} cycles merged away, {totals["updated"]} cycles updated '
+            f'in {time.perf_counter() - started:.1f}s.'
+        ))
@@ -0,0 +1,120 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:40
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of the vocabulary and merge in cycles/symptoms.py as of this
+# migration, so later edits there don't change what it does.
+CANONICAL_SYMPTOMS = {
+    'Cramps': ('cramping', 'menstrual cramps', 'period cramps', 'period pain'),
+    'Headache': ('head ache', 'headaches'),
+    'Bloating': ('bloated', 'bloat'),
+    'Cravings': ('craving', 'food cravings'),
+    'Fatigue': ('tired', 'tiredness', 'exhaustion'),
+    'Acne': ('pimples', 'breakouts', 'breakout'),
+    'Back pain': ('backache', 'back ache', 'lower back pain'),
+    'Breast tenderness': ('tender breasts', 'sore breasts', 'breast pain'),
+    'Nausea': ('nauseous', 'nauseated'),
+    'Mood swings': ('moodiness',),
+    'Insomnia': ('sleeplessness', 'trouble sleeping'),
+    'Spotting': ('light bleeding',),
+}
+
+MASK_BITS = 63
+
+
+def _clean(name):
+    return re.sub(r'\s+', ' ', name).strip()
+
+
+def _fold(name):
+    key = _clean(name).casefold()
+    return key[:-1] if key.endswith('s') and not key.endswith('ss') else key
+
+
+ALIASES = {
+    _fold(alias): canonical
+    for canonical, aliases in CANONICAL_SYMPTOMS.items() for alias in (canonical, *aliases)
+}
+
+
+def symptom_key(name):
+    key = _fold(name)
+    return _fold(ALIASES[key]) if key in ALIASES else key
+
+
+def canonical_name(name):
+    return ALIASES.get(_fold(name), _clean(name))
+
+
+def merge_symptoms(apps, schema_editor):
+    """
+    Merge symptoms whose names resolve to the same key into the oldest one,
+    then key, rename and number every symptom and fill in the log masks.
+    """
+    Symptom = apps.get_model('cycles', 'Symptom')
+    DailyLog = apps.get_model('cycles', 'DailyLog')
+    Through = DailyLog.symptoms.through
+
+    groups = {}
+    for symptom in Symptom.objects.order_by('pk'):
+        groups.setdefault(symptom_key(symptom.name), []).append(symptom)
+
+    merged = {duplicate.pk: symptoms[0].pk for symptoms in groups.values() for duplicate in symptoms[1:]}
+    if merged:
+        Through.objects.bulk_create(
+            [
+                Through(dailylog_id=log_id, symptom_id=merged[symptom_id])
+                for log_id, symptom_id in Through.objects.filter(symptom_id__in=merged).values_list('dailylog_id', 'symptom_id')
+            ],
+            ignore_conflicts=True,
+            batch_size=1000,
+        )
+        Through.objects.filter(symptom_id__in=merged).delete()
+        Symptom.objects.filter(pk__in=merged).delete()
+
+    order = list(CANONICAL_SYMPTOMS)
+    kept = sorted(
+        (symptoms[0] for symptoms in groups.values()),
+        key=lambda s: (order.index(canonical_name(s.name)) if canonical_name(s.name) in order else len(order), s.pk),
+    )
+    free = iter(range(MASK_BITS))
+    for symptom in kept:
+        symptom.key, symptom.name, symptom.bit = symptom_key(symptom.name), canonical_name(symptom.name), next(free, None)
+    Symptom.objects.bulk_update(kept, ['name', 'key', 'bit'], batch_size=500)
+
+    bits = {symptom.pk: symptom.bit for symptom in kept}
+    masks = {}
+    for log_id, symptom_id in Through.objects.values_list('dailylog_id', 'symptom_id'):
+        if bits[symptom_id] is not None:
+            masks[log_id] = masks.get(log_id, 0) | 1 << bits[symptom_id]
+    DailyLog.objects.bulk_update(
+        [DailyLog(pk=log_id, symptom_mask=mask) for log_id, mask in masks.items()], ['symptom_mask'], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cycles', '0003_dailylog_energy_level_dailylog_notes_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='symptom',
+            name='key',
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='symptom',
+            name='bit',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='dailylog',
+            name='symptom_mask',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(merge_symptoms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Separate from 0004 so the constraint isn't added in the transaction
+    # that rewrote the symptom rows (pending trigger events on PostgreSQL).
+
+    dependencies = [
+        ('cycles', '0004_symptom_vocabulary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='symptom',
+            name='key',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from users.models import User
+from .symptoms import symptom_key
 
 class Cycle(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cycles')
@@ -8,13 +9,24 @@ class Cycle(models.Model):
 
     class Meta:
         ordering = ['-start_date']
+        # The admin lists cycles newest first and navigates them by date.
+        indexes = [models.Index(fields=['start_date'], name='cycle_start_date_idx')]
 
     def __str__(self):
-        return f"Cycle for {self.user.username} starting {self.start_date}"
+        return f"Cycle for {self.user.email} starting {self.start_date}"
 
 class Symptom(models.Model):
     name = models.CharField(max_length=100, unique=True)
-    
+    # Spelling-independent key, see cycles/symptoms.py.
+    key = models.CharField(max_length=100, unique=True)
+    # Position in DailyLog.symptom_mask; None once all bits are taken.
+    bit = models.PositiveSmallIntegerField(null=True, blank=True, unique=True)
+
+    def save(self, *args, **kwargs):
+        if not self.key:
+            self.key = symptom_key(self.name)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
@@ -36,11 +48,15 @@ class DailyLog(models.Model):
     symptom_severity = models.PositiveSmallIntegerField(null=True, blank=True) # For severity from symptoms screen
     energy_level = models.PositiveSmallIntegerField(null=True, blank=True)     # For energy from mood screen
     notes = models.TextField(blank=True, null=True)                             # For notes from both screens
+    # Bits of `symptoms`, kept up to date by cycles.signals.
+    symptom_mask = models.BigIntegerField(default=0, editable=False)
 
 
     class Meta:
         ordering = ['-date']
         unique_together = ('user', 'date')
+        # The admin lists logs newest first and navigates them by date.
+        indexes = [models.Index(fields=['date'], name='dailylog_date_idx')]
 
     def __str__(self):
-        return f"Log for {self.user.username} on {self.date}"
\ No newline at end of file
+        return f"Log for {self.user.email} on {self.date}"
\ No newline at end of file
@@ -0,0 +1,214 @@
+"""
+Insight pattern rules.
+
+A PatternRule describes a recurring pattern around period starts: a window
+of days relative to the start (-3 to -1 is the three days before it), a
+condition on the daily logs in that window, and the fraction of cycles it
+must hold in. Rules are registered with `register`.
+
+All registered rules are compiled together: each distinct log feature they
+use (a mood, a symptom, a field above a value) becomes one bitmap over the
+days, and each field averaged becomes one pair of prefix sums, all built in a
+single pass over one query's logs. A window check is then a few integer
+operations per cycle, however many rules share the logs.
+"""
+from datetime import timedelta
+
+from .models import DailyLog, Symptom
+from .symptoms import symptom_key
+
+class Mood:
+    """
+    The day's mood is `mood`.
+    """
+    def __init__(self, mood):
+        self.feature = ('mood', mood)
+
+
+class HasSymptom:
+    """
+    The day's log includes the symptom `name` (any spelling).
+    """
+    def __init__(self, name):
+        self.feature = ('symptom', symptom_key(name))
+
+
+class Above:
+    """
+    The day's `field` is logged and greater than `value`.
+    """
+    def __init__(self, field, value):
+        self.feature = ('above', field, value)
+
+
+class Any:
+    """
+    At least one day in the window matches `predicate`.
+    """
+    def __init__(self, predicate):
+        self.predicate = predicate
+
+
+class MeanAbove:
+    """
+    The mean of `field` over the days it was logged in the window exceeds `value`.
+    """
+    def __init__(self, field, value):
+        self.field = field
+        self.value = value
+
+
+class PatternRule:
+    def __init__(self, title, description, icon, window, condition, threshold=0.5):
+        self.title = title
+        self.description = description
+        self.icon = icon
+        self.window = window
+        self.condition = condition
+        self.threshold = threshold
+
+    def as_pattern(self):
+        return {'title': self.title, 'description': self.description, 'icon': self.icon}
+
+
+registry = []
+_compiled = None
+
+
+def register(*rules):
+    global _compiled
+    registry.extend(rules)
+    _compiled = None
+
+
+def compiled_rules():
+    global _compiled
+    if _compiled is None:
+        _compiled = CompiledRules(registry)
+    return _compiled
+
+
+class CompiledRules:
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.features = sorted({
+            rule.condition.predicate.feature for rule in self.rules if isinstance(rule.condition, Any)
+        }, key=repr)
+        self.averaged = sorted({rule.condition.field for rule in self.rules if isinstance(rule.condition, MeanAbove)})
+        self.first_offset = min((rule.window[0] for rule in self.rules), default=0)
+        self.last_offset = max((rule.window[1] for rule in self.rules), default=0)
+        self.fields = sorted(
+            {field for kind, field, *_ in self.features if kind == 'above'} | set(self.averaged)
+        )
+        self.symptom_keys = sorted({feature[1] for feature in self.features if feature[0] == 'symptom'})
+
+    def _log_matrix(self, user, low, high):
+        """
+        One row per logged day from `low` to `high`: (date, mood, symptom_mask, *fields).
+        """
+        return DailyLog.objects.filter(user=user, date__range=(low, high)).values_list(
+            'date', 'mood', 'symptom_mask', *self.fields,
+        )
+
+    def evaluate(self, user, period_starts):
+        """
+        The patterns, in registration order, that hold around `period_starts`.
+        """
+        if not self.rules or not period_starts:
+            return []
+        low = min(period_starts) + timedelta(days=self.first_offset)
+        high = max(period_starts) + timedelta(days=self.last_offset)
+        length = (high - low).days + 1
+
+        symptoms = {key: (pk, bit) for pk, key, bit in Symptom.objects.filter(
+            key__in=self.symptom_keys,
+        ).values_list('pk', 'key', 'bit')} if self.symptom_keys else {}
+        symptom_bits = {key: bit for key, (_, bit) in symptoms.items() if bit is not None}
+        unmasked = {pk: key for key, (pk, bit) in symptoms.items() if bit is None}
+
+        # Features are looked up by the value seen, so a row costs the same
+        # however many rules test moods or symptoms.
+        bitmaps = dict.fromkeys(self.features, 0)
+        field_index = {field: 3 + i for i, field in enumerate(self.fields)}
+        by_mood = {feature[1]: feature for feature in self.features if feature[0] == 'mood'}
+        by_bit = {
+            symptom_bits[feature[1]]: feature for feature in self.features
+            if feature[0] == 'symptom' and feature[1] in symptom_bits
+        }
+        tracked_mask = sum(1 << bit for bit in by_bit)
+        above = [(field_index[feature[1]], feature[2], feature) for feature in self.features if feature[0] == 'above']
+        sums = {field: [0] * (length + 1) for field in self.averaged}
+        counts = {field: [0] * (length + 1) for field in self.averaged}
+
+        for row in self._log_matrix(user, low, high):
+            day, mood, symptom_mask = row[:3]
+            position = (day - low).days
+            flag = 1 << position
+            if mood in by_mood:
+                bitmaps[by_mood[mood]] |= flag
+            symptom_mask &= tracked_mask
+            while symptom_mask:
+                lowest = symptom_mask & -symptom_mask
+                bitmaps[by_bit[lowest.bit_length() - 1]] |= flag
+                symptom_mask ^= lowest
+            for index, threshold, feature in above:
+                if row[index] is not None and row[index] > threshold:
+                    bitmaps[feature] |= flag
+            for field in self.averaged:
+                value = row[field_index[field]]
+                if value is not None:
+                    sums[field][position + 1] += value
+                    counts[field][position + 1] += 1
+        if unmasked:
+            # Symptoms past the last mask bit are read from the through table.
+            for day, symptom_id in DailyLog.symptoms.through.objects.filter(
+                dailylog__user=user, dailylog__date__range=(low, high), symptom_id__in=unmasked,
+            ).values_list('dailylog__date', 'symptom_id'):
+                bitmaps[('symptom', unmasked[symptom_id])] |= 1 << (day - low).days
+        for field in self.averaged:
+            for i in range(length):
+                sums[field][i + 1] += sums[field][i]
+                counts[field][i + 1] += counts[field][i]
+
+        patterns = []
+        for rule in self.rules:
+            first, last = rule.window
+            width = (1 << (last - first + 1)) - 1
+            matched = 0
+            for start in period_starts:
+                offset = (start - low).days
+                if isinstance(rule.condition, Any):
+                    matched += bool(bitmaps[rule.condition.predicate.feature] >> (offset + first) & width)
+                else:
+                    field = rule.condition.field
+                    total = sums[field][offset + last + 1] - sums[field][offset + first]
+                    logged = counts[field][offset + last + 1] - counts[field][offset + first]
+                    matched += bool(logged and total > rule.condition.value * logged)
+            if matched / len(period_starts) >= rule.threshold:
+                patterns.append(rule.as_pattern())
+        return patterns
+
+
+register(
+    PatternRule(
+        'Pre-Menstrual Fatigue',
+        "You often feel fatigued in the 3 days leading up to your period. Consider prioritizing rest during this time.",
+        'moon',
+        window=(-3, -1),
+        condition=Any(Mood(DailyLog.Mood.FATIGUED)),
+    ),
+    PatternRule(
+        'Menstrual Pain',
+        "You tend to experience higher pain levels during the first 2 days of your period. Gentle exercise or a heat pack may help.",
+        'fitness',
+        window=(0, 1),
+        condition=MeanAbove('pain_level', 3),  # e.g., pain level > 3 out of 5
+    ),
+    PatternRule(
+        'Dietary Pattern',
+        "Increased cravings seem to be common for you in the 5 days before your period starts.",
+        'nutrition',
+        window=(-5, -1),
+        condition=Any(HasSymptom('Cravings')),
+    ),
+)
@@ -0,0 +1,170 @@
+"""
+Per-day cycle phases.
+
+A user's cycles are turned into a PhaseTimeline: one byte of phase flags per
+day, from the first logged period to the predicted next one. The calendar,
+predictions and insights all answer their questions by slicing it, and it is
+cached per user until their cycles or profile change.
+
+Within each cycle, ovulation is placed LUTEAL_DAYS before the next period
+starts (the predicted one for the latest cycle) and the fertile window is the
+FERTILE_DAYS before ovulation plus ovulation day itself. Days can carry
+several flags, e.g. a short cycle's fertile window may overlap its period.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from her_saheli_backend.caching import namespace_versions, tiered_cache, user_namespace
+
+MENSTRUAL = 1
+FOLLICULAR = 2
+FERTILE = 4
+OVULATION = 8
+LUTEAL = 16
+# Derived from the predicted next period rather than a logged one.
+PREDICTED = 32
+
+# Most specific first; phase() names a day by the first flag it carries.
+PHASE_NAMES = (
+    (MENSTRUAL, 'menstrual'),
+    (OVULATION, 'ovulation'),
+    (FERTILE, 'fertile'),
+    (LUTEAL, 'luteal'),
+    (FOLLICULAR, 'follicular'),
+)
+
+LUTEAL_DAYS = 14
+FERTILE_DAYS = 5
+DEFAULT_CYCLE_LENGTH = 28
+# Gaps between period starts outside these (exclusive) bounds are taken as
+# missed or duplicated logs, not cycles.
+MIN_CYCLE_LENGTH = 15
+MAX_CYCLE_LENGTH = 45
+
+
+def average_cycle_length(cycle_starts):
+    """
+    Average of the plausible gaps between cycle start dates (newest first), or None.
+    """
+    cycle_lengths = []
+    for i in range(len(cycle_starts) - 1):
+        if cycle_starts[i] and cycle_starts[i+1]:
+            length = (cycle_starts[i] - cycle_starts[i+1]).days
+            if MIN_CYCLE_LENGTH < length < MAX_CYCLE_LENGTH:
+                cycle_lengths.append(length)
+
+    if not cycle_lengths:
+        return None
+    return sum(cycle_lengths) // len(cycle_lengths)
+
+
+class PhaseTimeline:
+    """
+    Phase flags for every day from `first` on, one byte per day.
+
+    `cycles` are the user's (start_date, end_date) pairs, newest first, and
+    `cycle_length` the length the next period is predicted with.
+    """
+    def __init__(self, first, flags, cycles, cycle_length):
+        self.first = first
+        self.flags = bytes(flags)
+        self.cycles = cycles
+        self.cycle_length = cycle_length
+
+    @property
+    def last(self):
+        return self.first + timedelta(days=len(self.flags) - 1)
+
+    def flags_on(self, day):
+        index = (day - self.first).days
+        return self.flags[index] if 0 <= index < len(self.flags) else 0
+
+    def phase(self, day):
+        """
+        The name of `day`'s phase, or None outside the timeline.
+        """
+        flags = self.flags_on(day)
+        for flag, name in PHASE_NAMES:
+            if flags & flag:
+                return name
+        return None
+
+    def days(self, start, end, flags):
+        """
+        The days from `start` to `end` inclusive that carry all of `flags`.
+        """
+        low = max((start - self.first).days, 0)
+        high = min((end - self.first).days, len(self.flags) - 1)
+        return [self.first + timedelta(days=i) for i in range(low, high + 1) if self.flags[i] & flags == flags]
+
+
+def build_timeline(cycles, cycle_length, today):
+    """
+    Build the PhaseTimeline of (start_date, end_date) `cycles`, newest first.
+    An ongoing period lasts until `today`; the period after the latest cycle
+    is predicted `cycle_length` days after its start.
+    """
+    if not cycles:
+        return PhaseTimeline(today, b'', (), cycle_length)
+
+    starts = sorted(start for start, _ in cycles)
+    predicted_start = starts[-1] + timedelta(days=cycle_length)
+    periods = [(start, end or today) for start, end in cycles if start <= (end or today)]
+
+    # From the first period, or the predicted fertile window if that is
+    # earlier, to the predicted period.
+    first = min(starts[0], predicted_start - timedelta(days=LUTEAL_DAYS + FERTILE_DAYS))
+    last = max([predicted_start, starts[-1]] + [end for _, end in periods])
+    flags = bytearray((last - first).days + 1)
+
+    def mark(start, end, flag):
+        # Fertile windows of the first cycle can start before the timeline.
+        for i in range(max((start - first).days, 0), (end - first).days + 1):
+            flags[i] |= flag
+
+    for start, end in periods:
+        mark(start, end, MENSTRUAL)
+
+    for index, start in enumerate(starts):
+        predicted = index == len(starts) - 1
+        next_start = predicted_start if predicted else starts[index + 1]
+        extra = PREDICTED if predicted else 0
+        ovulation = next_start - timedelta(days=LUTEAL_DAYS)
+        fertile_start = ovulation - timedelta(days=FERTILE_DAYS)
+        mark(fertile_start, ovulation, FERTILE | extra)
+        mark(ovulation, ovulation, OVULATION | extra)
+        for i in range((start - first).days, (next_start - first).days):
+            if not flags[i] & (MENSTRUAL | FERTILE):
+                flags[i] |= (LUTEAL if first + timedelta(days=i) > ovulation else FOLLICULAR) | extra
+    mark(predicted_start, predicted_start, MENSTRUAL | PREDICTED)
+
+    return PhaseTimeline(first, flags, tuple(cycles), cycle_length)
+
+
+def compute_timeline(user_id, today):
+    from users.models import UserProfile
+    from .models import Cycle
+
+    cycles = list(Cycle.objects.filter(user_id=user_id).values_list('start_date', 'end_date'))
+    cycle_length = average_cycle_length([start for start, _ in cycles[:6]])
+    if cycle_length is None:
+        cycle_length = UserProfile.objects.filter(user_id=user_id).values_list('average_cycle', flat=True).first()
+    if cycle_length is None:
+        cycle_length = DEFAULT_CYCLE_LENGTH
+    return build_timeline(cycles, cycle_length, today)
+
+
+def get_timeline(user):
+    """
+    `user`'s PhaseTimeline as of today, from the tiered cache when their
+    cycles and profile haven't changed since it was built.
+    """
+    today = timezone.now().date()
+    namespace = user_namespace(user.pk)
+    key = f'phases:{user.pk}:{namespace_versions([namespace])[namespace]}:{today}'
+    timeline, _ = tiered_cache.get_or_compute(
+        key, lambda: compute_timeline(user.pk, today), settings.CACHE_RESPONSE_TIMEOUT, 'phase-timeline',
+    )
+    return timeline
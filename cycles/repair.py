@@ -0,0 +1,154 @@
+"""
+Repairs of corrupted cycle histories.
+
+A user's cycles should be separate periods, but imports and double taps
+leave some ending before they start, overlapping each other, or starting on
+or right after the day the previous one ended, which should have been one
+period. `plan_repair` finds all three with one sweep over a user's cycles
+sorted by start date; `repair_user` applies the plan with a bulk update and
+delete in a transaction of its own.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models.signals import post_save
+
+from .models import Cycle
+
+ONE_DAY = timedelta(days=1)
+
+
+def _normalized(start, end):
+    return (end, start) if end is not None and end < start else (start, end)
+
+
+def _span(periods):
+    """
+    The (start_date, end_date) spanning (start_date, end_date) `periods`,
+    sorted by start; ongoing if the last to start is and nothing ends later.
+    """
+    ended = [end for _, end in periods if end is not None]
+    last_start, last_end = periods[-1]
+    if last_end is None and (not ended or max(ended) < last_start):
+        return periods[0][0], None
+    return periods[0][0], max(ended)
+
+
+def plan_repair(cycles):
+    """
+    Plan the repair of one user's (pk, start_date, end_date) `cycles`.
+    Returns ({pk: (start_date, end_date)} to update, [pks] to delete,
+    number of inverted cycles).
+
+    Inverted cycles get their dates swapped. Cycles that overlap or are
+    adjacent are merged into the earliest one, spanning them all; an ongoing
+    cycle (no end date) is only merged with cycles starting by the next day,
+    and the merged cycle stays ongoing if it is the last to start.
+    """
+    fixed, inverted = [], 0
+    for pk, start, end in cycles:
+        if (start, end) != _normalized(start, end):
+            start, end = _normalized(start, end)
+            inverted += 1
+        fixed.append((start, pk, end))
+    fixed.sort()
+
+    updates, deletes = {}, []
+    group = []
+
+    def close(group):
+        updates[group[0][1]] = _span([(start, end) for start, _, end in group])
+        deletes.extend(pk for _, pk, _ in group[1:])
+
+    reach = None
+    for start, pk, end in fixed:
+        if group and start <= reach + ONE_DAY:
+            group.append((start, pk, end))
+            reach = max(reach, end or start)
+            continue
+        if group:
+            close(group)
+        group = [(start, pk, end)]
+        reach = end or start
+    if group:
+        close(group)
+
+    original = {pk: (start, end) for pk, start, end in cycles}
+    updates = {pk: dates for pk, dates in updates.items() if dates != original[pk]}
+    return updates, deletes, inverted
+
+
+def scan_users(user_ids):
+    """
+    Plan repairs for `user_ids` with one query. Returns {user_id: plan} for
+    the users whose cycles need repairing.
+    """
+    by_user = {}
+    for user_id, pk, start, end in Cycle.objects.filter(user_id__in=user_ids).order_by().values_list(
+        'user_id', 'pk', 'start_date', 'end_date',
+    ):
+        by_user.setdefault(user_id, []).append((pk, start, end))
+    plans = {}
+    for user_id, cycles in by_user.items():
+        plan = plan_repair(cycles)
+        if plan[0] or plan[1]:
+            plans[user_id] = plan
+    return plans
+
+
+def repair_user(user_id, dry_run=False):
+    """
+    Repair `user_id`'s cycles in one transaction, with their rows locked so
+    the plan can't go stale meanwhile. Returns a Counter of what was done.
+    """
+    with transaction.atomic():
+        cycles = {cycle.pk: cycle for cycle in Cycle.objects.select_for_update().filter(user_id=user_id)}
+        updates, deletes, inverted = plan_repair(
+            [(cycle.pk, cycle.start_date, cycle.end_date) for cycle in cycles.values()],
+        )
+        if not (updates or deletes):
+            return Counter()
+        if not dry_run:
+            changed = []
+            for pk, (start, end) in updates.items():
+                cycle = cycles[pk]
+                cycle.start_date, cycle.end_date = start, end
+                changed.append(cycle)
+            Cycle.objects.bulk_update(changed, ['start_date', 'end_date'])
+            # bulk_update sends no signals; caches, rollups and chatbot
+            # summaries follow cycles through post_save.
+            for cycle in changed:
+                post_save.send(
+                    sender=Cycle, instance=cycle, created=False, update_fields=frozenset(['start_date', 'end_date']),
+                    raw=False, using=Cycle.objects.db,
+                )
+            Cycle.objects.filter(pk__in=deletes).delete()
+    return Counter(users=1, inverted=inverted, merged=len(deletes), updated=len(updates))
+
+
+def repair_users(user_ids, dry_run=False):
+    """
+    Repair the cycles of every user in `user_ids` that needs it, one
+    transaction per user. Returns a Counter of what was done.
+    """
+    totals = Counter()
+    for user_id in scan_users(user_ids):
+        totals += repair_user(user_id, dry_run)
+    return totals
+
+
+def merge_cycles(cycles):
+    """
+    Merge `cycles`, all one user's, into the earliest one, spanning them all.
+    """
+    periods = sorted(
+        ((*_normalized(cycle.start_date, cycle.end_date), cycle.pk, cycle) for cycle in cycles),
+        key=lambda period: (period[0], period[2]),
+    )
+    keep = periods[0][3]
+    with transaction.atomic():
+        keep.start_date, keep.end_date = _span([(start, end) for start, end, _, _ in periods])
+        keep.save(update_fields=['start_date', 'end_date'])
+        Cycle.objects.filter(pk__in=[pk for _, _, pk, _ in periods[1:]]).delete()
+    return keep
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from her_saheli_backend.serializers import ValuesSerializer
 from .models import Cycle, DailyLog, Symptom
 
 class CycleSerializer(serializers.ModelSerializer):
@@ -17,4 +18,7 @@ class DailyLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = DailyLog
         fields = ('date', 'mood', 'pain_level', 'symptoms', 'symptom_severity', 'energy_level', 'notes')
-        
\ No newline at end of file
+
+class DailyLogReadSerializer(ValuesSerializer):
+    model = DailyLog
+    fields = DailyLogSerializer.Meta.fields
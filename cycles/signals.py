@@ -0,0 +1,38 @@
+from django.db.models import F, Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from her_saheli_backend.caching import invalidate_user_cache
+from .models import Cycle, DailyLog, Symptom
+from .symptoms import refresh_symptom_masks
+
+
+@receiver([post_save, post_delete], sender=Cycle)
+@receiver([post_save, post_delete], sender=DailyLog)
+def cycle_data_changed(sender, instance, **kwargs):
+    invalidate_user_cache(instance.user_id)
+
+
+@receiver(m2m_changed, sender=DailyLog.symptoms.through)
+def daily_log_symptoms_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            # set_symptoms() writes the mask itself once set() is done.
+            if not getattr(instance, '_defer_symptom_mask', False):
+                refresh_symptom_masks([instance.pk])
+            invalidate_user_cache(instance.user_id)
+    elif action == 'pre_clear':
+        instance._cleared_logs = list(instance.dailylog_set.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        log_ids = instance.__dict__.pop('_cleared_logs', []) if action == 'post_clear' else pk_set
+        refresh_symptom_masks(log_ids)
+
+
+@receiver(post_delete, sender=Symptom)
+def symptom_deleted(sender, instance, **kwargs):
+    # The through rows go without m2m_changed; drop the bit before it's reused.
+    if instance.bit is not None:
+        bit = 1 << instance.bit
+        DailyLog.objects.annotate(
+            has_bit=F('symptom_mask').bitand(bit),
+        ).filter(~Q(has_bit=0)).update(symptom_mask=F('symptom_mask').bitand(~bit))
@@ -0,0 +1,206 @@
+"""
+Symptom vocabulary.
+
+Symptom names arrive as free text, so every name is resolved to a canonical
+key first: case, spacing and a trailing plural 's' are ignored and known
+aliases map to their canonical symptom. "cramps", "Cramps" and "cramp" are
+all the one 'Cramps' symptom.
+
+Each symptom also gets a bit (0-62, while they last), and DailyLog keeps the
+bits of its symptoms in `symptom_mask`, so symptom counts can be taken from
+the logs alone instead of joining the symptoms through table.
+"""
+import re
+
+from django.db import IntegrityError, transaction
+
+# Canonical name: aliases. Canonical symptoms take the lowest bits, in this order.
+CANONICAL_SYMPTOMS = {
+    'Cramps': ('cramping', 'menstrual cramps', 'period cramps', 'period pain'),
+    'Headache': ('head ache', 'headaches'),
+    'Bloating': ('bloated', 'bloat'),
+    'Cravings': ('craving', 'food cravings'),
+    'Fatigue': ('tired', 'tiredness', 'exhaustion'),
+    'Acne': ('pimples', 'breakouts', 'breakout'),
+    'Back pain': ('backache', 'back ache', 'lower back pain'),
+    'Breast tenderness': ('tender breasts', 'sore breasts', 'breast pain'),
+    'Nausea': ('nauseous', 'nauseated'),
+    'Mood swings': ('moodiness',),
+    'Insomnia': ('sleeplessness', 'trouble sleeping'),
+    'Spotting': ('light bleeding',),
+}
+
+MASK_BITS = 63  # DailyLog.symptom_mask is a signed 64-bit integer.
+
+
+def _clean(name):
+    return re.sub(r'\s+', ' ', name).strip()
+
+
+def _fold(name):
+    key = _clean(name).casefold()
+    return key[:-1] if key.endswith('s') and not key.endswith('ss') else key
+
+
+ALIASES = {}
+for canonical, aliases in CANONICAL_SYMPTOMS.items():
+    for alias in (canonical, *aliases):
+        ALIASES[_fold(alias)] = canonical
+
+
+def symptom_key(name):
+    """
+    The key `name` is stored under; equal for all spellings of a symptom.
+    """
+    key = _fold(name)
+    return _fold(ALIASES[key]) if key in ALIASES else key
+
+
+def canonical_name(name):
+    return ALIASES.get(_fold(name), _clean(name))
+
+
+def resolve_symptoms(names, Symptom=None):
+    """
+    Return the Symptom rows for free-text `names`, creating missing ones.
+    """
+    if Symptom is None:
+        from .models import Symptom
+    wanted = {}
+    for name in names:
+        if isinstance(name, str) and _clean(name):
+            wanted.setdefault(symptom_key(name), canonical_name(name))
+    if not wanted:
+        return []
+    existing = {symptom.key: symptom for symptom in Symptom.objects.filter(key__in=wanted)}
+    missing = [Symptom(name=name, key=key) for key, name in wanted.items() if key not in existing]
+    if missing:
+        # Another request may create the same symptom meanwhile.
+        Symptom.objects.bulk_create(missing, ignore_conflicts=True)
+        existing = {symptom.key: symptom for symptom in Symptom.objects.filter(key__in=wanted)}
+        assign_bits([symptom for symptom in existing.values() if symptom.bit is None], Symptom)
+    return list(existing.values())
+
+
+def assign_bits(symptoms, Symptom=None):
+    """
+    Give `symptoms` free mask bits, canonical symptoms first; symptoms left
+    without one once all MASK_BITS are taken are only counted through joins.
+    """
+    if Symptom is None:
+        from .models import Symptom
+    order = list(CANONICAL_SYMPTOMS)
+    symptoms = sorted(symptoms, key=lambda s: (order.index(s.name) if s.name in order else len(order), s.pk))
+    for symptom in symptoms:
+        while True:
+            taken = set(Symptom.objects.filter(bit__isnull=False).values_list('bit', flat=True))
+            free = [bit for bit in range(MASK_BITS) if bit not in taken]
+            if not free:
+                return
+            try:
+                with transaction.atomic():
+                    if Symptom.objects.filter(pk=symptom.pk, bit__isnull=True).update(bit=free[0]):
+                        symptom.bit = free[0]
+                    else:
+                        # Another request numbered it first; use its bit.
+                        symptom.bit = Symptom.objects.values_list('bit', flat=True).get(pk=symptom.pk)
+                break
+            except IntegrityError:
+                continue  # Taken concurrently, try the next free bit.
+
+
+def mask_of(bits):
+    mask = 0
+    for bit in bits:
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
+
+
+def set_symptoms(log, symptoms):
+    """
+    Set `log`'s symptoms to the Symptom rows `symptoms`, then write its mask
+    once; the m2m_changed handler would refresh it after every step of set().
+    """
+    from .models import DailyLog
+    log._defer_symptom_mask = True
+    try:
+        log.symptoms.set(symptoms)
+    finally:
+        del log._defer_symptom_mask
+    mask = mask_of(symptom.bit for symptom in symptoms)
+    if mask != log.symptom_mask:
+        log.symptom_mask = mask
+        DailyLog.objects.filter(pk=log.pk).update(symptom_mask=mask)
+
+
+def refresh_symptom_masks(log_ids=None, DailyLog=None, batch_size=1000):
+    """
+    Recompute DailyLog.symptom_mask from the symptoms through table, for
+    `log_ids` or for every log.
+    """
+    if DailyLog is None:
+        from .models import DailyLog
+    Through = DailyLog.symptoms.through
+    logs = DailyLog.objects.order_by('pk')
+    if log_ids is not None:
+        logs = logs.filter(pk__in=log_ids)
+    ids = list(logs.values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        bits = {log_id: [] for log_id in chunk}
+        for log_id, bit in Through.objects.filter(dailylog_id__in=chunk).values_list('dailylog_id', 'symptom__bit'):
+            bits[log_id].append(bit)
+        DailyLog.objects.bulk_update(
+            [DailyLog(pk=log_id, symptom_mask=mask_of(log_bits)) for log_id, log_bits in bits.items()],
+            ['symptom_mask'],
+        )
+
+
+def merge_duplicate_symptoms(Symptom=None, DailyLog=None):
+    """
+    Merge symptoms whose names resolve to the same key into the oldest one,
+    moving their daily logs over in bulk, then key, rename and number every
+    symptom and refresh the masks of logs with symptoms. Returns how many
+    symptoms were merged away.
+    """
+    if Symptom is None:
+        from .models import Symptom
+    if DailyLog is None:
+        from .models import DailyLog
+    Through = DailyLog.symptoms.through
+
+    groups = {}
+    for symptom in Symptom.objects.order_by('pk'):
+        groups.setdefault(symptom_key(symptom.name), []).append(symptom)
+
+    with transaction.atomic():
+        merged = {}
+        for symptoms in groups.values():
+            for duplicate in symptoms[1:]:
+                merged[duplicate.pk] = symptoms[0].pk
+        if merged:
+            Through.objects.bulk_create(
+                [
+                    Through(dailylog_id=log_id, symptom_id=merged[symptom_id])
+                    for log_id, symptom_id in Through.objects.filter(symptom_id__in=merged).values_list('dailylog_id', 'symptom_id')
+                ],
+                ignore_conflicts=True,
+                batch_size=1000,
+            )
+            Through.objects.filter(symptom_id__in=merged).delete()
+            Symptom.objects.filter(pk__in=merged).delete()
+
+        kept = []
+        for key, symptoms in groups.items():
+            keep = symptoms[0]
+            keep.key, keep.name = key, canonical_name(keep.name)
+            kept.append(keep)
+        # Clear the keys first; with a changed alias list they can move between rows.
+        Symptom.objects.bulk_update(
+            [Symptom(pk=symptom.pk, key=f'#{symptom.pk}') for symptom in kept], ['key'], batch_size=500,
+        )
+        Symptom.objects.bulk_update(kept, ['name', 'key'], batch_size=500)
+        assign_bits([symptom for symptom in kept if symptom.bit is None], Symptom)
+        refresh_symptom_masks(set(Through.objects.values_list('dailylog_id', flat=True)), DailyLog)
+    return len(merged)
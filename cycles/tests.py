@@ -1,3 +1,254 @@
-from django.test import TestCase
+import random
+from datetime import date, timedelta
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from her_saheli_backend.caching import SHARED_CACHE, _version_key, user_namespace
+from her_saheli_backend.renderers import FastJSONRenderer
+from users.models import User
+from .models import Cycle, DailyLog, Symptom
+from .patterns import Above, Any, CompiledRules, HasSymptom, MeanAbove, Mood, PatternRule
+from .phases import FERTILE, FOLLICULAR, LUTEAL, MENSTRUAL, OVULATION, PREDICTED, build_timeline
+from .repair import plan_repair, repair_user
+from .serializers import DailyLogReadSerializer, DailyLogSerializer
+from .symptoms import assign_bits, mask_of
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-shared'},
+    'local': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-local'},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def client_for(self, email, start):
+        user = User.objects.create_user(email=email, password='pw123456')
+        Cycle.objects.create(user=user, start_date=start, end_date=start)
+        client = APIClient()
+        client.force_authenticate(user)
+        return user, client
+
+    def test_users_with_equal_versions_get_their_own_responses(self):
+        alice, alice_client = self.client_for('alice@example.com', date(2025, 1, 3))
+        bob, bob_client = self.client_for('bob@example.com', date(2025, 2, 7))
+        for user in (alice, bob):
+            caches[SHARED_CACHE].set(_version_key(user_namespace(user.pk)), 12345, timeout=None)
+
+        self.assertEqual(alice_client.get('/api/cycle/').json(), ['2025-01-03'])
+        response = bob_client.get('/api/cycle/')
+        self.assertEqual(response['X-Cache'], 'miss')
+        self.assertEqual(response.json(), ['2025-02-07'])
+        self.assertEqual(bob_client.get('/api/cycle/')['X-Cache'], 'local')
+
+
+class DailyLogReadSerializerTests(TestCase):
+    """
+    DailyLogReadSerializer renders byte for byte what DailyLogSerializer does.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='reader@example.com', password='pw123456')
+        cramps, headache, bloating = (Symptom.objects.create(name=name) for name in ('Cramps', 'Headache', 'Bloating'))
+        full = DailyLog.objects.create(
+            user=cls.user, date=date(2025, 3, 2), mood='SAD', pain_level=4, symptom_severity=3,
+            energy_level=2, notes='Ünïcode "quoted" notes',
+        )
+        full.symptoms.set([bloating, cramps, headache])
+        DailyLog.objects.create(user=cls.user, date=date(2025, 3, 1))
+        DailyLog.objects.create(user=cls.user, date=date(2025, 3, 3), mood='HAPPY').symptoms.set([headache])
+        cls.logs = DailyLog.objects.filter(user=cls.user)
+
+    def assertRendersLike(self, data, expected):
+        render = FastJSONRenderer().render
+        self.assertEqual(render(data), render(expected))
+
+    def test_list(self):
+        self.assertRendersLike(DailyLogReadSerializer.list(self.logs), DailyLogSerializer(self.logs, many=True).data)
+
+    def test_get(self):
+        for log in self.logs:
+            self.assertRendersLike(
+                DailyLogReadSerializer.get(self.logs.filter(pk=log.pk)), DailyLogSerializer(log).data,
+            )
+        self.assertIsNone(DailyLogReadSerializer.get(self.logs.none()))
+
+    async def test_async(self):
+        expected = await sync_to_async(lambda: DailyLogSerializer(self.logs, many=True).data)()
+        self.assertRendersLike(await DailyLogReadSerializer.alist(self.logs), expected)
+        self.assertRendersLike(await DailyLogReadSerializer.aget(self.logs), expected[0])
+
+
+class SymptomMaskTests(TestCase):
+    def test_bit_assigned_concurrently_is_reloaded(self):
+        symptom = Symptom.objects.create(name='Hiccups')
+        Symptom.objects.filter(pk=symptom.pk).update(bit=40)
+        assign_bits([symptom])
+        self.assertEqual(symptom.bit, 40)
+
+    def test_mask_follows_replaced_symptoms(self):
+        user = User.objects.create_user(email='masked@example.com', password='pw123456')
+        client = APIClient()
+        client.force_authenticate(user)
+        for names in (['Cramps', 'Headache'], ['bloated', 'headaches', 'Acne'], []):
+            self.assertEqual(client.post('/api/symptoms/', {'symptoms': names}, format='json').status_code, 200)
+            log = DailyLog.objects.get(user=user)
+            self.assertEqual(log.symptom_mask, mask_of(symptom.bit for symptom in log.symptoms.all()))
+        self.assertEqual(log.symptom_mask, 0)
+
+
+class MoodLogTests(TestCase):
+    def test_mood_must_be_a_string(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(email='moody@example.com', password='pw123456'))
+        for mood in (5, ['happy'], {'mood': 'happy'}):
+            response = client.post('/api/mood/', {'mood': mood}, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('mood', response.json())
+        self.assertEqual(client.post('/api/mood/', {'mood': 'happy'}, format='json').status_code, 200)
+
+
+class RepairTests(TestCase):
+    def plan(self, *cycles):
+        return plan_repair([(pk, start, end) for pk, (start, end) in enumerate(cycles, 1)])
+
+    def test_clean_history_needs_nothing(self):
+        self.assertEqual(
+            self.plan((date(2025, 1, 1), date(2025, 1, 5)), (date(2025, 1, 7), None)), ({}, [], 0),
+        )
+
+    def test_inverted(self):
+        self.assertEqual(self.plan((date(2025, 1, 5), date(2025, 1, 1))), ({1: (date(2025, 1, 1), date(2025, 1, 5))}, [], 1))
+
+    def test_overlapping_and_adjacent_merge_into_the_earliest(self):
+        updates, deletes, _ = self.plan(
+            (date(2025, 1, 3), date(2025, 1, 8)),
+            (date(2025, 1, 1), date(2025, 1, 5)),
+            (date(2025, 1, 9), date(2025, 1, 10)),
+            (date(2025, 1, 12), date(2025, 1, 13)),
+        )
+        self.assertEqual(updates, {2: (date(2025, 1, 1), date(2025, 1, 10))})
+        self.assertEqual(deletes, [1, 3])
+
+    def test_contained_cycle_is_dropped(self):
+        self.assertEqual(self.plan((date(2025, 1, 1), date(2025, 1, 10)), (date(2025, 1, 3), date(2025, 1, 4))), ({}, [2], 0))
+
+    def test_ongoing(self):
+        # Stays ongoing when it starts last, ends with the others otherwise.
+        self.assertEqual(
+            self.plan((date(2025, 1, 1), date(2025, 1, 3)), (date(2025, 1, 4), None)),
+            ({1: (date(2025, 1, 1), None)}, [2], 0),
+        )
+        self.assertEqual(
+            self.plan((date(2025, 1, 1), None), (date(2025, 1, 2), date(2025, 1, 4))),
+            ({1: (date(2025, 1, 1), date(2025, 1, 4))}, [2], 0),
+        )
+        self.assertEqual(self.plan((date(2025, 1, 1), None), (date(2025, 1, 3), None)), ({}, [], 0))
+
+    def test_repair_user(self):
+        user = User.objects.create_user(email='repaired@example.com', password='pw123456')
+        for start, end in ((date(2025, 1, 5), date(2025, 1, 1)), (date(2025, 1, 4), date(2025, 1, 7)), (date(2025, 2, 1), None)):
+            Cycle.objects.create(user=user, start_date=start, end_date=end)
+        dates = lambda: list(Cycle.objects.filter(user=user).order_by('start_date').values_list('start_date', 'end_date'))
+        before = dates()
+
+        self.assertEqual(repair_user(user.pk, dry_run=True), {'users': 1, 'inverted': 1, 'merged': 1, 'updated': 1})
+        self.assertEqual(dates(), before)
+        repair_user(user.pk)
+        self.assertEqual(dates(), [(date(2025, 1, 1), date(2025, 1, 7)), (date(2025, 2, 1), None)])
+        self.assertEqual(repair_user(user.pk), {})
+
+
+class PhaseTimelineTests(TestCase):
+    def test_phases(self):
+        timeline = build_timeline([(date(2025, 2, 1), date(2025, 2, 5)), (date(2025, 1, 1), date(2025, 1, 5))], 28, date(2025, 2, 10))
+        self.assertEqual((timeline.first, timeline.last), (date(2025, 1, 1), date(2025, 3, 1)))
+        expected = {
+            date(2025, 1, 5): MENSTRUAL,
+            date(2025, 1, 6): FOLLICULAR,
+            date(2025, 1, 13): FERTILE,
+            date(2025, 1, 18): FERTILE | OVULATION,
+            date(2025, 1, 19): LUTEAL,
+            date(2025, 1, 31): LUTEAL,
+            date(2025, 2, 1): MENSTRUAL,
+            date(2025, 2, 6): FOLLICULAR | PREDICTED,
+            date(2025, 2, 10): FERTILE | PREDICTED,
+            date(2025, 2, 15): FERTILE | OVULATION | PREDICTED,
+            date(2025, 2, 16): LUTEAL | PREDICTED,
+            date(2025, 3, 1): MENSTRUAL | PREDICTED,
+        }
+        self.assertEqual({day: timeline.flags_on(day) for day in expected}, expected)
+        self.assertEqual(timeline.days(date(2025, 1, 1), date(2025, 2, 28), OVULATION), [date(2025, 1, 18), date(2025, 2, 15)])
+        self.assertEqual(timeline.phase(date(2025, 2, 15)), 'ovulation')
+        self.assertIsNone(timeline.phase(date(2025, 3, 2)))
+
+    def test_ongoing_period_lasts_until_today(self):
+        timeline = build_timeline([(date(2025, 2, 1), None)], 28, date(2025, 2, 3))
+        self.assertEqual(timeline.days(date(2025, 1, 1), date(2025, 3, 31), MENSTRUAL), [
+            date(2025, 2, 1), date(2025, 2, 2), date(2025, 2, 3), date(2025, 3, 1),
+        ])
+
+    def test_fertile_window_can_overlap_a_short_cycles_period(self):
+        timeline = build_timeline([(date(2025, 1, 20), date(2025, 1, 22)), (date(2025, 1, 1), date(2025, 1, 7))], 19, date(2025, 1, 25))
+        self.assertEqual(timeline.flags_on(date(2025, 1, 2)), MENSTRUAL | FERTILE)
+        self.assertEqual(timeline.phase(date(2025, 1, 2)), 'menstrual')
+        self.assertEqual(timeline.flags_on(date(2025, 1, 6)), MENSTRUAL | FERTILE | OVULATION)
+
+    def test_no_cycles(self):
+        self.assertEqual(build_timeline([], 28, date(2025, 1, 1)).flags, b'')
+
+
+class PatternRuleTests(TestCase):
+    """
+    Compiled rules find what checking every window day by day finds.
+    """
+    def test_matches_checking_each_window(self):
+        user = User.objects.create_user(email='patterns@example.com', password='pw123456')
+        cravings = Symptom.objects.create(name='Cravings')
+        assign_bits([cravings])
+        # No mask bit: read through the join table instead.
+        hiccups = Symptom.objects.create(name='Hiccups')
+        rng = random.Random(7)
+        starts = [date(2025, 1, 1) + timedelta(days=28 * i + rng.randint(-2, 2)) for i in range(6)]
+        for day in range(-10, 180):
+            if rng.random() < 0.6:
+                log = DailyLog.objects.create(
+                    user=user, date=date(2025, 1, 1) + timedelta(days=day), mood=rng.choice(['SAD', 'HAPPY', '']),
+                    pain_level=rng.choice([None, 1, 3, 5]), energy_level=rng.choice([None, 2, 4]),
+                )
+                log.symptoms.set(rng.sample([cravings, hiccups], rng.randint(0, 2)))
+
+        conditions = {
+            'sad': ((-3, -1), Any(Mood('SAD')), lambda log: log.mood == 'SAD'),
+            'cravings': ((-5, -1), Any(HasSymptom('food cravings')), lambda log: cravings in log.symptoms.all()),
+            'hiccups': ((-2, 0), Any(HasSymptom('Hiccups')), lambda log: hiccups in log.symptoms.all()),
+            'energy': ((-1, 2), Any(Above('energy_level', 3)), lambda log: (log.energy_level or 0) > 3),
+            'pain': ((0, 1), MeanAbove('pain_level', 3), None),
+        }
+        rules = [
+            PatternRule(f'{name} {threshold}', '', '', window=window, condition=condition, threshold=threshold)
+            for name, (window, condition, _) in conditions.items() for threshold in (0.25, 0.5, 0.75)
+        ]
+        logs = {log.date: log for log in DailyLog.objects.filter(user=user).prefetch_related('symptoms')}
+
+        def holds(name, start):
+            (first, last), condition, test = conditions[name]
+            window = [logs[day] for day in (start + timedelta(days=i) for i in range(first, last + 1)) if day in logs]
+            if test is not None:
+                return any(test(log) for log in window)
+            pains = [log.pain_level for log in window if log.pain_level is not None]
+            return bool(pains) and sum(pains) / len(pains) > condition.value
+
+        expected = [
+            rule.as_pattern() for rule in rules
+            if sum(holds(rule.title.split()[0], start) for start in starts) / len(starts) >= rule.threshold
+        ]
+        self.assertIsNone(Symptom.objects.get(pk=hiccups.pk).bit)
+        self.assertEqual(CompiledRules(rules).evaluate(user, starts), expected)
+        self.assertTrue(0 < len(expected) < len(rules), expected)
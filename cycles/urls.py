@@ -1,6 +1,15 @@
+from django.conf import settings
 from django.urls import path
 from .views import CycleLogView, UnifiedPredictionView, DailyLogView, DayLogToggleView, InsightsView
 
+if settings.ASYNC_VIEWS:
+    # Native async variants of the hot endpoints for ASGI deployments
+    from .async_views import (
+        AsyncCycleLogView as CycleLogView,
+        AsyncUnifiedPredictionView as UnifiedPredictionView,
+        AsyncDailyLogView as DailyLogView,
+    )
+
 urlpatterns = [
     path('', CycleLogView.as_view(), name='cycle-log'),
 
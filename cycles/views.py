@@ -3,40 +3,168 @@ from django.utils import timezone
 from rest_framework import views, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Avg
+from django.db import transaction
+from django.db.models import Count
 from .models import Cycle, DailyLog, Symptom
-from .serializers import CycleSerializer, DailyLogSerializer
+from .patterns import compiled_rules
+from .phases import (
+    FERTILE, FERTILE_DAYS, LUTEAL_DAYS, MENSTRUAL, OVULATION, PREDICTED, average_cycle_length, get_timeline,
+)
+from .serializers import CycleSerializer, DailyLogSerializer, DailyLogReadSerializer
+from .symptoms import resolve_symptoms, set_symptoms
+from django.utils.decorators import method_decorator
 from django.utils.timezone import now
+from her_saheli_backend.caching import cache_response
+from her_saheli_backend.idempotency import idempotent
+from her_saheli_backend.replicas import use_replica
+
+
+def symptom_counts(logs, split_date):
+    """
+    (symptom, logs with it before `split_date`, logs with it from then on) for
+    every symptom in `logs`, in id order. Symptoms with a bit are counted from
+    the logs' symptom masks; only those without one need the through table.
+    """
+    counts = {}
+    for day, mask in logs.values_list('date', 'symptom_mask'):
+        half = 0 if day < split_date else 1
+        while mask:
+            low = mask & -mask
+            counts.setdefault(low.bit_length() - 1, [0, 0])[half] += 1
+            mask ^= low
+
+    by_symptom = {}
+    for symptom in Symptom.objects.filter(bit__in=counts):
+        by_symptom[symptom] = counts[symptom.bit]
+    unmasked = {symptom.pk: symptom for symptom in Symptom.objects.filter(bit__isnull=True)}
+    if unmasked:
+        for day, symptom_id in logs.filter(symptoms__in=list(unmasked)).values_list('date', 'symptoms'):
+            by_symptom.setdefault(unmasked[symptom_id], [0, 0])[0 if day < split_date else 1] += 1
+    return [(symptom, before, after) for symptom, (before, after) in sorted(by_symptom.items(), key=lambda item: item[0].pk)]
+
+
+def build_predictions(timeline):
+    """
+    Build the next period, ovulation and fertile window events from the
+    predicted part of a PhaseTimeline.
+    """
+    latest_start = max(start for start, _ in timeline.cycles)
+    predicted_next_start = latest_start + timedelta(days=timeline.cycle_length)
+    window = (predicted_next_start - timedelta(days=LUTEAL_DAYS + FERTILE_DAYS), predicted_next_start)
+
+    predicted_next_start = timeline.days(*window, MENSTRUAL | PREDICTED)[-1]
+    estimated_ovulation = timeline.days(*window, OVULATION | PREDICTED)[0]
+
+    predictions_list = []
+
+    predictions_list.append({
+        "date": predicted_next_start.strftime('%Y-%m-%d'),
+        "type": "next_period"
+    })
+
+    predictions_list.append({
+        "date": estimated_ovulation.strftime('%Y-%m-%d'),
+        "type": "ovulation_day"
+    })
+
+    for fertile_day in timeline.days(*window, FERTILE | PREDICTED):
+        predictions_list.append({
+            "date": fertile_day.strftime('%Y-%m-%d'),
+            "type": "fertile_window"
+        })
+
+    return predictions_list
+
+
+def period_dates(timeline, today):
+    """
+    Every logged period day as 'YYYY-MM-DD', newest period first. An ongoing
+    period runs until `today`.
+    """
+    return [
+        day.strftime('%Y-%m-%d')
+        for start, end in timeline.cycles
+        for day in timeline.days(start, end or today, MENSTRUAL)
+    ]
+
+
+def save_daily_log(user, log_date, data):
+    """
+    Create or partially update the user's log for `log_date`.
+    Input is validated before anything is written, then the log is upserted
+    on (user, date). Returns (response data, status code).
+    """
+    serializer = DailyLogSerializer(data=data, partial=True)
+    if not serializer.is_valid():
+        return serializer.errors, status.HTTP_400_BAD_REQUEST
+
+    values = dict(serializer.validated_data)
+    symptoms = values.pop('symptoms', None)
+    # The date in the URL identifies the log.
+    values.pop('date', None)
+
+    with transaction.atomic():
+        log, created = DailyLog.objects.update_or_create(user=user, date=log_date, defaults=values)
+        if symptoms is not None:
+            set_symptoms(log, symptoms)
+    return DailyLogSerializer(log).data, status.HTTP_201_CREATED if created else status.HTTP_200_OK
+
+
+def save_symptom_log(user, values, names):
+    """
+    Upsert today's log with validated `values` and set its symptoms to the
+    free-text `names`, in one transaction.
+    """
+    symptoms = resolve_symptoms(names)
+    with transaction.atomic():
+        log, _ = DailyLog.objects.update_or_create(user=user, date=now().date(), defaults=values)
+        set_symptoms(log, symptoms)
+
+
+def validate_log_fields(fields):
+    """
+    Validate DailyLog fields posted by the mood and symptom screens.
+    Returns (validated values, errors).
+    """
+    serializer = DailyLogSerializer(data=fields, partial=True)
+    if serializer.is_valid():
+        return serializer.validated_data, None
+    return None, serializer.errors
+
+
+def mood_log_fields(data):
+    mood = data.get('mood') or ''
+    fields = {
+        # Anything but a string is left for the serializer to reject.
+        'mood': mood.upper() if isinstance(mood, str) else mood,
+        'energy_level': data.get('energy_level'),
+    }
+    if 'notes' in data:
+        fields['notes'] = data.get('notes')
+    return fields
+
+
+def symptom_log_fields(data):
+    fields = {'symptom_severity': data.get('severity')}
+    if 'notes' in data:
+        fields['notes'] = data.get('notes')
+    return fields
 
 
 class CycleLogView(views.APIView):
     """
     Handles listing cycles (GET) and logging period start/end (POST).
     """
+    @method_decorator(cache_response('user'))
+    @method_decorator(use_replica)
     def get(self, request):
         """
         List all individual period dates for the authenticated user in a flat list.
         e.g., ["2025-10-01", "2025-10-02", ...]
         """
-        cycles = Cycle.objects.filter(user=request.user)
-        all_period_dates = []
-        
-        for cycle in cycles:
-            start_date = cycle.start_date
-            # If end_date is None, it's an ongoing period. Use today's date as the end for display purposes.
-            end_date = cycle.end_date if cycle.end_date else timezone.now().date()
-            
-            # Ensure start_date is not after end_date for the loop
-            if start_date > end_date:
-                continue
-
-            current_date = start_date
-            while current_date <= end_date:
-                all_period_dates.append(current_date.strftime('%Y-%m-%d'))
-                current_date += timedelta(days=1)
-                
-        return Response(all_period_dates)
+        return Response(period_dates(get_timeline(request.user), timezone.now().date()))
 
+    @method_decorator(idempotent)
     def post(self, request):
         """
         Create a new cycle (log period start) or update the last cycle (log period end).
@@ -74,28 +202,25 @@ class CycleLogView(views.APIView):
         return Response({"error": "Provide 'start_date' to begin a period or 'end_date' to end the current one."}, status=status.HTTP_400_BAD_REQUEST)
 
 class DailyLogView(views.APIView):
+    @method_decorator(cache_response('user'))
     def get(self, request, date_str):
         try:
             log_date = timezone.datetime.strptime(date_str, '%Y-%m-%d').date()
-            log = DailyLog.objects.get(user=request.user, date=log_date)
-            serializer = DailyLogSerializer(log)
-            return Response(serializer.data)
-        except DailyLog.DoesNotExist:
-            return Response(status=status.HTTP_404_NOT_FOUND)
+            data = DailyLogReadSerializer.get(DailyLog.objects.filter(user=request.user, date=log_date))
+            if data is None:
+                return Response(status=status.HTTP_404_NOT_FOUND)
+            return Response(data)
         except ValueError:
             return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
 
+    @method_decorator(idempotent)
     def post(self, request, date_str):
         try:
             log_date = timezone.datetime.strptime(date_str, '%Y-%m-%d').date()
-            log, created = DailyLog.objects.get_or_create(user=request.user, date=log_date)
-            serializer = DailyLogSerializer(log, data=request.data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except ValueError:
             return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        data, response_status = save_daily_log(request.user, log_date, request.data)
+        return Response(data, status=response_status)
 
 
 class UnifiedPredictionView(views.APIView):
@@ -104,53 +229,15 @@ class UnifiedPredictionView(views.APIView):
     Types can be 'next_period', 'ovulation_day', or 'fertile_window'.
     e.g., [{'date': '...', 'type': 'next_period'}, ...]
     """
+    @method_decorator(cache_response('user'))
+    @method_decorator(use_replica)
     def get(self, request):
-        cycles = Cycle.objects.filter(user=request.user).order_by('-start_date')[:6]
-        
-        if cycles.count() < 2:
-            return Response({"message": "Not enough cycle data to make a prediction."}, status=status.HTTP_404_NOT_FOUND)
-
-        cycle_lengths = []
-        for i in range(len(cycles) - 1):
-            if cycles[i].start_date and cycles[i+1].start_date:
-                length = (cycles[i].start_date - cycles[i+1].start_date).days
-                if 15 < length < 45: 
-                    cycle_lengths.append(length)
-
-        if not cycle_lengths:
-            avg_cycle_length = request.user.profile.average_cycle if hasattr(request.user, 'profile') else 28
-        else:
-            avg_cycle_length = sum(cycle_lengths) // len(cycle_lengths)
-
-        last_cycle_start = cycles[0].start_date
-        predicted_next_start = last_cycle_start + timedelta(days=avg_cycle_length)
-        
-        estimated_ovulation = predicted_next_start - timedelta(days=14)
-        
-        fertile_window_start = estimated_ovulation - timedelta(days=5)
-        fertile_window_end = estimated_ovulation
-
-        predictions_list = []
+        timeline = get_timeline(request.user)
 
-        predictions_list.append({
-            "date": predicted_next_start.strftime('%Y-%m-%d'),
-            "type": "next_period"
-        })
-
-        predictions_list.append({
-            "date": estimated_ovulation.strftime('%Y-%m-%d'),
-            "type": "ovulation_day"
-        })
-
-        current_date = fertile_window_start
-        while current_date <= fertile_window_end:
-            predictions_list.append({
-                "date": current_date.strftime('%Y-%m-%d'),
-                "type": "fertile_window"
-            })
-            current_date += timedelta(days=1)
+        if len(timeline.cycles) < 2:
+            return Response({"message": "Not enough cycle data to make a prediction."}, status=status.HTTP_404_NOT_FOUND)
 
-        return Response(predictions_list)
+        return Response(build_predictions(timeline))
 
 
 class DayLogToggleView(views.APIView):
@@ -159,12 +246,15 @@ class DayLogToggleView(views.APIView):
     POST to add a day.
     DELETE to remove a day.
     """
+    throttle_scope = 'day_log_toggle'
+
     def _parse_date(self, date_str):
         try:
             return timezone.datetime.strptime(date_str, '%Y-%m-%d').date()
         except ValueError:
             return None
 
+    @method_decorator(idempotent)
     def post(self, request, date_str):
         """
         Add a period log for a specific day.
@@ -251,104 +341,30 @@ class InsightsView(views.APIView):
 
     def _identify_user_patterns(self, user, cycles):
         """
-        Analyzes user logs to find recurring patterns related to their cycle.
+        Finds the registered patterns (cycles/patterns.py) that recur around
+        the starts of `cycles`, (start_date, end_date) pairs.
         """
-        patterns = []
-        
-        if cycles.count() < 3:
+        if len(cycles) < 3:
             return []
+        return compiled_rules().evaluate(user, [start for start, _ in cycles])
 
-        num_cycles_to_check = len(cycles)
-
-        fatigue_days_before_period = 3
-        fatigue_threshold_percentage = 0.5 
-        fatigue_incident_count = 0
-        
-        for cycle in cycles:
-            period_start = cycle.start_date
-            window_start = period_start - timedelta(days=fatigue_days_before_period)
-            
-            if DailyLog.objects.filter(
-                user=user, 
-                date__range=(window_start, period_start - timedelta(days=1)),
-                mood=DailyLog.Mood.FATIGUED
-            ).exists():
-                fatigue_incident_count += 1
-        
-        if (fatigue_incident_count / num_cycles_to_check) >= fatigue_threshold_percentage:
-            patterns.append({
-                'title': 'Pre-Menstrual Fatigue',
-                'description': f"You often feel fatigued in the {fatigue_days_before_period} days leading up to your period. Consider prioritizing rest during this time.",
-                'icon': 'moon',
-            })
-
-        pain_days_into_period = 2
-        pain_threshold_level = 3 # e.g., pain level > 3 out of 5
-        pain_threshold_percentage = 0.5
-        pain_incident_count = 0
-
-        for cycle in cycles:
-            period_start = cycle.start_date
-            window_end = period_start + timedelta(days=pain_days_into_period - 1)
-            
-            avg_pain_result = DailyLog.objects.filter(
-                user=user,
-                date__range=(period_start, window_end),
-                pain_level__isnull=False
-            ).aggregate(avg_pain=Avg('pain_level'))
-
-            if avg_pain_result['avg_pain'] and avg_pain_result['avg_pain'] > pain_threshold_level:
-                pain_incident_count += 1
-
-        if (pain_incident_count / num_cycles_to_check) >= pain_threshold_percentage:
-             patterns.append({
-                'title': 'Menstrual Pain',
-                'description': f"You tend to experience higher pain levels during the first {pain_days_into_period} days of your period. Gentle exercise or a heat pack may help.",
-                'icon': 'fitness',
-            })
-        
-        try:
-            cravings_symptom = Symptom.objects.get(name__iexact='Cravings')
-            cravings_days_before_period = 5
-            cravings_threshold_percentage = 0.5
-            cravings_incident_count = 0
-
-            for cycle in cycles:
-                period_start = cycle.start_date
-                window_start = period_start - timedelta(days=cravings_days_before_period)
-
-                if DailyLog.objects.filter(
-                    user=user,
-                    date__range=(window_start, period_start - timedelta(days=1)),
-                    symptoms=cravings_symptom
-                ).exists():
-                    cravings_incident_count += 1
-            
-            if (cravings_incident_count / num_cycles_to_check) >= cravings_threshold_percentage:
-                patterns.append({
-                    'title': 'Dietary Pattern',
-                    'description': f"Increased cravings seem to be common for you in the {cravings_days_before_period} days before your period starts.",
-                    'icon': 'nutrition',
-                })
-        except Symptom.DoesNotExist:
-            pass
-
-        return patterns
-
+    @method_decorator(cache_response('user'))
+    @method_decorator(use_replica)
     def get(self, request):
         user = request.user
 
-        cycles = Cycle.objects.filter(user=user, end_date__isnull=False).order_by('-start_date')[:6]
+        # The six latest completed cycles, newest first.
+        cycles = [(start, end) for start, end in get_timeline(user).cycles if end is not None][:6]
         
         cycle_length_data = {
             'labels': [],
             'data': []
         }
         
-        if cycles.count() > 1:
+        if len(cycles) > 1:
             for i in range(len(cycles) - 1, 0, -1):
-                current_cycle_start = cycles[i-1].start_date
-                previous_cycle_start = cycles[i].start_date
+                current_cycle_start = cycles[i-1][0]
+                previous_cycle_start = cycles[i][0]
                 length = (current_cycle_start - previous_cycle_start).days
                 
                 if 15 < length < 45: # Basic validation
@@ -362,25 +378,13 @@ class InsightsView(views.APIView):
         logs_last_six_months = DailyLog.objects.filter(user=user, date__gte=six_months_ago)
         
         symptom_analysis = []
-        if logs_last_six_months.exists():
-            total_logs_count = logs_last_six_months.count()
-            logged_symptoms = Symptom.objects.filter(dailylog__in=logs_last_six_months).distinct()
-
-            for symptom in logged_symptoms:
-                total_count = logs_last_six_months.filter(symptoms=symptom).count()
+        total_logs_count = logs_last_six_months.count()
+        if total_logs_count:
+            for symptom, count_first_half, count_second_half in symptom_counts(logs_last_six_months, three_months_ago):
+                total_count = count_first_half + count_second_half
                 frequency_percent = (total_count / total_logs_count) * 100 if total_logs_count > 0 else 0
                 frequency = f"{int(frequency_percent)}%"
 
-                count_first_half = logs_last_six_months.filter(
-                    symptoms=symptom, 
-                    date__lt=three_months_ago
-                ).count()
-                
-                count_second_half = logs_last_six_months.filter(
-                    symptoms=symptom, 
-                    date__gte=three_months_ago
-                ).count()
-
                 trend = 'stable'
                 if count_first_half > 0:
                     if count_second_half > count_first_half * 1.2:
@@ -408,40 +412,22 @@ class InsightsView(views.APIView):
 
 class SymptomLogView(views.APIView):
     permission_classes = (IsAuthenticated,)
+    @method_decorator(idempotent)
     def post(self, request, *args, **kwargs):
-        log_date = now().date()
-        log, _ = DailyLog.objects.get_or_create(user=request.user, date=log_date)
-        
-        symptom_names = request.data.get('symptoms', [])
-        symptoms_qs = Symptom.objects.filter(name__in=symptom_names)
-        
-        existing_symptom_names = list(symptoms_qs.values_list('name', flat=True))
-        new_symptoms_to_create = []
-        for name in symptom_names:
-            if name not in existing_symptom_names:
-                new_symptoms_to_create.append(Symptom(name=name))
-        
-        if new_symptoms_to_create:
-            Symptom.objects.bulk_create(new_symptoms_to_create)
-            symptoms_qs = Symptom.objects.filter(name__in=symptom_names)
-            
-        log.symptoms.set(symptoms_qs)
-        
-        log.symptom_severity = request.data.get('severity')
-        if 'notes' in request.data:
-            log.notes = request.data.get('notes')
-        log.save()
+        values, errors = validate_log_fields(symptom_log_fields(request.data))
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        save_symptom_log(request.user, values, request.data.get('symptoms', []))
         return Response(status=status.HTTP_200_OK)
 
 class MoodLogView(views.APIView):
     permission_classes = (IsAuthenticated,)
+    @method_decorator(idempotent)
     def post(self, request, *args, **kwargs):
-        log_date = now().date()
-        log, _ = DailyLog.objects.get_or_create(user=request.user, date=log_date)
-        log.mood = request.data.get('mood', '').upper()
-        log.energy_level = request.data.get('energy_level')
-        if 'notes' in request.data:
-            log.notes = request.data.get('notes')
-        log.save()
+        values, errors = validate_log_fields(mood_log_fields(request.data))
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        DailyLog.objects.update_or_create(user=request.user, date=now().date(), defaults=values)
         return Response(status=status.HTTP_200_OK)
     
\ No newline at end of file
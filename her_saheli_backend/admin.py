@@ -0,0 +1,60 @@
+"""
+Admin building blocks for tables with millions of rows.
+
+A changelist normally runs an exact COUNT(*) for its paginator and another
+one for the "N total" link, and both scan the whole table. On PostgreSQL,
+EstimatedCountPaginator takes the row count of an unfiltered list from the
+table statistics in pg_class and of a filtered one from the query planner,
+counting exactly only when the estimate is below ADMIN_EXACT_COUNT_LIMIT.
+"""
+import json
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_count(queryset):
+    """
+    PostgreSQL's estimate of the rows in `queryset`, or None on other databases.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+            # -1 until the table has been vacuumed or analyzed.
+            return int(row[0]) if row and row[0] >= 0 else None
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, 'query'):
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate >= settings.ADMIN_EXACT_COUNT_LIMIT:
+                return estimate
+        return super().count
+
+
+class UserDataAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin for a table of per-user rows: users are joined into the list
+    and picked with an autocomplete widget, searches look up the email index
+    by prefix, and the changelist counts with EstimatedCountPaginator.
+    """
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
+    search_fields = ('user__email__startswith',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,121 @@
+import io
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer
+
+
+class JSONResponse(HttpResponse):
+    """
+    HttpResponse carrying data rendered by the project's JSON renderer.
+    """
+    renderer = FastJSONRenderer()
+
+    def __init__(self, data=None, status=status.HTTP_200_OK, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(self.renderer.render(data), status=status, **kwargs)
+        if data is None:
+            # Same as DRF: an empty body carries no content type.
+            del self['Content-Type']
+
+
+class AsyncAPIView(View):
+    """
+    Native async counterpart of rest_framework's APIView for hot endpoints.
+
+    Handlers are `async def` methods taking the Django request, with the
+    authenticated user on `request.user` and the parsed body on
+    `request.data`. Authentication mirrors JWTAuthentication but looks the
+    user up with the async ORM, and errors are rendered the same way DRF's
+    exception handler renders them, so responses match the sync views.
+    """
+    authentication = JWTAuthentication()
+    parser = FastJSONParser()
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # JWT auth only, exactly like APIView which is csrf exempt too.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        handler = None
+        if request.method.lower() in self.http_method_names:
+            handler = getattr(self, request.method.lower(), None)
+
+        try:
+            request.user = await self.authenticate(request)
+            # Throttles hit the cache synchronously; keep that off the event loop.
+            await sync_to_async(self.check_throttles)(request)
+            request.data = self.parse(request)
+            if handler is None:
+                raise exceptions.MethodNotAllowed(request.method)
+            response = await handler(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            response = self.handle_exception(request, exc)
+
+        response['Allow'] = ', '.join(self._allowed_methods())
+        response['Vary'] = 'Accept'
+        return response
+
+    async def authenticate(self, request):
+        auth = self.authentication
+        header = auth.get_header(request)
+        raw_token = auth.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            raise exceptions.NotAuthenticated()
+
+        validated_token = auth.get_validated_token(raw_token)
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise exceptions.AuthenticationFailed('Token contained no recognizable user identification')
+
+        User = get_user_model()
+        try:
+            user = await User.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+        except User.DoesNotExist:
+            raise exceptions.AuthenticationFailed('User not found', code='user_not_found')
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise exceptions.AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
+
+    def check_throttles(self, request):
+        durations = []
+        for throttle_class in self.throttle_classes:
+            throttle = throttle_class()
+            if not throttle.allow_request(request, self):
+                durations.append(throttle.wait())
+        if durations:
+            raise exceptions.Throttled(max((d for d in durations if d is not None), default=None))
+
+    def parse(self, request):
+        if request.method not in ('POST', 'PUT', 'PATCH') or not request.body:
+            return {}
+        content_type = request.content_type or ''
+        if content_type == 'application/json':
+            return self.parser.parse(io.BytesIO(request.body), parser_context={'encoding': request.encoding or 'utf-8'})
+        if content_type in ('application/x-www-form-urlencoded', 'multipart/form-data'):
+            return request.POST
+        raise exceptions.UnsupportedMediaType(content_type)
+
+    def handle_exception(self, request, exc):
+        headers = {}
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            headers['WWW-Authenticate'] = self.authentication.authenticate_header(request)
+        if getattr(exc, 'wait', None):
+            headers['Retry-After'] = '%d' % exc.wait
+        if isinstance(exc.detail, (list, dict)):
+            data = exc.detail
+        else:
+            data = {'detail': exc.detail}
+        return JSONResponse(data, status=exc.status_code, headers=headers)
@@ -0,0 +1,359 @@
+"""
+Two-tier cache for computed responses.
+
+Values are looked up in the per-process LRU tier (caches['local']) first and
+then in the shared tier (caches['default'], Redis in production), which also
+fills the local tier. Keys live in namespaces such as 'user:<id>' or
+'content'; a namespace's version is part of every key in it and is kept in
+the shared tier, so `bump_namespace` invalidates the namespace in every
+process at once, local tiers included.
+
+Recomputation of a missing key is single-flight: within a process other
+callers wait for the first one, and across processes a short lock in the
+shared tier lets one process compute while the others poll for its result.
+"""
+import asyncio
+import functools
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.response import Response
+
+LOCAL_CACHE = 'local'
+SHARED_CACHE = 'default'
+
+# How often processes waiting on another process's recompute check for it.
+LOCK_POLL_INTERVAL = 0.05
+
+_missing = object()
+
+
+class CacheMetrics:
+    """
+    Per-process hit/miss counters, by cache name and outcome
+    ('local', 'shared', 'miss' or 'wait').
+    """
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, name, outcome):
+        with self._lock:
+            self._counts[name, outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            stats = {}
+            for (name, outcome), count in self._counts.items():
+                stats.setdefault(name, {})[outcome] = count
+            return stats
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+cache_metrics = CacheMetrics()
+
+
+def _version_key(namespace):
+    return f'cache:ns:{namespace}'
+
+
+def _initial_version():
+    # Time based, so a version key evicted from the shared tier comes back
+    # higher than before instead of resurrecting old entries.
+    return int(time.time() * 1000)
+
+
+def namespace_versions(namespaces):
+    """
+    Return {namespace: version} for `namespaces` with one shared-tier round trip.
+    """
+    shared = caches[SHARED_CACHE]
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    versions = {keys[key]: version for key, version in shared.get_many(keys).items()}
+    for key, namespace in keys.items():
+        if namespace not in versions:
+            shared.add(key, _initial_version(), timeout=None)
+            versions[namespace] = shared.get(key)
+    return versions
+
+
+def bump_namespace(namespace):
+    """
+    Invalidate every key in `namespace`, in every process.
+    """
+    shared = caches[SHARED_CACHE]
+    try:
+        shared.incr(_version_key(namespace))
+    except ValueError:
+        shared.set(_version_key(namespace), _initial_version(), timeout=None)
+
+
+def user_namespace(user_id):
+    return f'user:{user_id}'
+
+
+def invalidate_user_cache(user_id):
+    """
+    Invalidate `user_id`'s cached responses once the current transaction commits.
+    """
+    transaction.on_commit(lambda: bump_namespace(user_namespace(user_id)))
+
+
+def invalidate_namespace(namespace):
+    transaction.on_commit(lambda: bump_namespace(namespace))
+
+
+class TieredCache:
+    def __init__(self):
+        self._flights = {}
+        self._aflights = {}
+        self._lock = threading.Lock()
+
+    @property
+    def local(self):
+        return caches[LOCAL_CACHE]
+
+    @property
+    def shared(self):
+        return caches[SHARED_CACHE]
+
+    def lookup(self, key):
+        """
+        Return (value, tier) for `key`, or (_missing, None).
+        """
+        value = self.local.get(key, _missing)
+        if value is not _missing:
+            return value, 'local'
+        value = self.shared.get(key, _missing)
+        if value is not _missing:
+            self.local.set(key, value, timeout=settings.CACHE_LOCAL_TIMEOUT)
+            return value, 'shared'
+        return _missing, None
+
+    def store(self, key, value, timeout):
+        self.shared.set(key, value, timeout=timeout)
+        self.local.set(key, value, timeout=min(timeout, settings.CACHE_LOCAL_TIMEOUT))
+
+    def get_or_compute(self, key, compute, timeout, name):
+        """
+        Return (value, outcome) for `key`, computing and storing it with
+        `compute()` on a miss. `compute` may return _missing to skip storing.
+        """
+        value, tier = self.lookup(key)
+        if tier is not None:
+            cache_metrics.record(name, tier)
+            return value, tier
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = threading.Event()
+        if not leader:
+            flight.wait(settings.CACHE_LOCK_TIMEOUT)
+            value, tier = self.lookup(key)
+            if tier is not None:
+                cache_metrics.record(name, 'wait')
+                return value, 'wait'
+
+        try:
+            value = self._compute_once(key, compute, timeout)
+        finally:
+            if leader:
+                with self._lock:
+                    del self._flights[key]
+                flight.set()
+        cache_metrics.record(name, 'miss')
+        return value, 'miss'
+
+    def _compute_once(self, key, compute, timeout):
+        lock_key = f'{key}:lock'
+        locked = self.shared.add(lock_key, True, timeout=settings.CACHE_LOCK_TIMEOUT)
+        if not locked:
+            # Another process is computing; use its result if it lands in time.
+            deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL_INTERVAL)
+                value, tier = self.lookup(key)
+                if tier is not None:
+                    return value
+        try:
+            value = compute()
+            if value is not _missing:
+                self.store(key, value, timeout)
+            return value
+        finally:
+            if locked:
+                self.shared.delete(lock_key)
+
+    async def aget_or_compute(self, key, acompute, timeout, name):
+        """
+        Async get_or_compute; `acompute` is a coroutine function.
+        """
+        value, tier = await self._alookup(key)
+        if tier is not None:
+            cache_metrics.record(name, tier)
+            return value, tier
+
+        flight = self._aflights.get(key)
+        if flight is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(flight), settings.CACHE_LOCK_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+            value, tier = await self._alookup(key)
+            if tier is not None:
+                cache_metrics.record(name, 'wait')
+                return value, 'wait'
+
+        flight = self._aflights[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await self._acompute_once(key, acompute, timeout)
+        finally:
+            if self._aflights.get(key) is flight:
+                del self._aflights[key]
+            flight.set_result(None)
+        cache_metrics.record(name, 'miss')
+        return value, 'miss'
+
+    async def _alookup(self, key):
+        # The local tier is in-memory and never blocks, so skip the thread hop.
+        value = self.local.get(key, _missing)
+        if value is not _missing:
+            return value, 'local'
+        value = await self.shared.aget(key, _missing)
+        if value is not _missing:
+            self.local.set(key, value, timeout=settings.CACHE_LOCAL_TIMEOUT)
+            return value, 'shared'
+        return _missing, None
+
+    async def _acompute_once(self, key, acompute, timeout):
+        lock_key = f'{key}:lock'
+        locked = await self.shared.aadd(lock_key, True, timeout=settings.CACHE_LOCK_TIMEOUT)
+        if not locked:
+            deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                await asyncio.sleep(LOCK_POLL_INTERVAL)
+                value, tier = await self._alookup(key)
+                if tier is not None:
+                    return value
+        try:
+            value = await acompute()
+            if value is not _missing:
+                await self.shared.aset(key, value, timeout=timeout)
+                self.local.set(key, value, timeout=min(timeout, settings.CACHE_LOCAL_TIMEOUT))
+            return value
+        finally:
+            if locked:
+                await self.shared.adelete(lock_key)
+
+
+tiered_cache = TieredCache()
+
+
+def _freeze(response):
+    # Cache the data of DRF responses and the body of plain ones, 200s only.
+    if response.status_code != 200:
+        return _missing
+    if isinstance(response, Response):
+        return ('data', response.data)
+    return ('content', response.content, response['Content-Type'])
+
+
+def _thaw(entry):
+    if entry[0] == 'data':
+        return Response(entry[1])
+    return HttpResponse(entry[1], content_type=entry[2])
+
+
+def _view_name(view_func, request):
+    # Inherited handlers decorated with method_decorator(name=...) only know
+    # their base class, the resolved URL names the actual view.
+    match = getattr(request, 'resolver_match', None)
+    if match is not None:
+        return match.view_name
+    return f'{view_func.__module__}.{view_func.__qualname__}'
+
+
+def _response_key(name, request, namespaces, versions):
+    # Namespaces are named in the key, not just versioned: per-user views
+    # share paths, and two users' namespaces can hold the same version.
+    # Today's date is part of the key because responses derive from it.
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    scope = ','.join(f'{namespace}={versions[namespace]}' for namespace in namespaces)
+    return f'view:{name}:{scope}:{timezone.now().date()}:{path}'
+
+
+def cache_response(*namespaces, timeout=None):
+    """
+    Cache a view's successful responses in the tiered cache, keyed on the
+    request path and query string.
+
+    `namespaces` are bumped to invalidate; 'user' stands for the requesting
+    user's own namespace (see invalidate_user_cache). Works on sync and async
+    views; use method_decorator on class-based views. Responses carry an
+    X-Cache header with the outcome.
+    """
+    timeout = settings.CACHE_RESPONSE_TIMEOUT if timeout is None else timeout
+
+    def resolve(request):
+        if 'user' not in namespaces:
+            return namespaces
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return None
+        return tuple(user_namespace(user.pk) if ns == 'user' else ns for ns in namespaces)
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @functools.wraps(view_func)
+            async def _wrapped_view(request, *args, **kwargs):
+                resolved = resolve(request)
+                if resolved is None:
+                    return await view_func(request, *args, **kwargs)
+                name = _view_name(view_func, request)
+                versions = await sync_to_async(namespace_versions)(resolved)
+                key = _response_key(name, request, resolved, versions)
+                fresh = []
+
+                async def compute():
+                    response = await view_func(request, *args, **kwargs)
+                    fresh.append(response)
+                    return _freeze(response)
+
+                entry, outcome = await tiered_cache.aget_or_compute(key, compute, timeout, name)
+                response = fresh[0] if fresh else _thaw(entry)
+                response['X-Cache'] = outcome
+                return response
+        else:
+            @functools.wraps(view_func)
+            def _wrapped_view(request, *args, **kwargs):
+                resolved = resolve(request)
+                if resolved is None:
+                    return view_func(request, *args, **kwargs)
+                name = _view_name(view_func, request)
+                key = _response_key(name, request, resolved, namespace_versions(resolved))
+                fresh = []
+
+                def compute():
+                    response = view_func(request, *args, **kwargs)
+                    fresh.append(response)
+                    return _freeze(response)
+
+                entry, outcome = tiered_cache.get_or_compute(key, compute, timeout, name)
+                response = fresh[0] if fresh else _thaw(entry)
+                response['X-Cache'] = outcome
+                return response
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,106 @@
+"""
+Compression of large API responses.
+
+Static files, the pre-generated OpenAPI schema among them, are compressed
+once by collectstatic and served precompressed by WhiteNoise. API responses
+are built per request, so CompressionMiddleware compresses the JSON ones of
+at least RESPONSE_COMPRESSION_MIN_SIZE bytes on their way out: with brotli
+when it is installed and accepted, otherwise with gzip. Smaller responses
+aren't worth the CPU, and streamed ones (the chatbot's server-sent events)
+must not be buffered.
+"""
+import gzip
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # gzip only without brotli.
+    brotli = None
+
+# Content types worth compressing, matched by prefix.
+COMPRESSIBLE_TYPES = ('application/json', 'application/vnd.oai.openapi', 'text/csv')
+
+
+def accepted_encodings(request):
+    """
+    The content codings `request` accepts, from its Accept-Encoding header.
+    """
+    accepted = set()
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def best_encoding(request, available=('br', 'gzip')):
+    """
+    The preferred coding of `available` that `request` accepts, or None.
+    """
+    accepted = accepted_encodings(request)
+    for encoding in available:
+        if encoding == 'br' and brotli is None:
+            continue
+        if encoding in accepted or '*' in accepted:
+            return encoding
+    return None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.RESPONSE_COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=settings.RESPONSE_COMPRESSION_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+            or len(response.content) < settings.RESPONSE_COMPRESSION_MIN_SIZE
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = best_encoding(request)
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # The compressed body isn't byte-identical to what a strong ETag named.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
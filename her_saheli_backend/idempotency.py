@@ -0,0 +1,144 @@
+"""
+Idempotency-Key support for mutating endpoints.
+
+When a client sends an `Idempotency-Key` header, the first response for that
+key is kept in the shared cache for IDEMPOTENCY_KEY_TTL seconds and replayed,
+with an `Idempotent-Replayed: true` header, to every retry carrying the same
+key, without running the view again. Keys are per user. Reusing a key for a
+different request is rejected with 422, and a retry that arrives while the
+first request is still running gets 409. Server errors are not stored, so
+they can be retried.
+"""
+import functools
+import hashlib
+import json
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+from .async_views import JSONResponse
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+
+# How long a key stays reserved while its first request is running.
+IN_PROGRESS_TIMEOUT = 60
+
+
+def _cache_key(request, key):
+    return f'idempotency:{request.user.pk}:{hashlib.sha1(key.encode()).hexdigest()}'
+
+
+def _fingerprint(request):
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha1(f'{request.method} {request.get_full_path()} {payload}'.encode()).hexdigest()
+
+
+def _freeze(response):
+    if isinstance(response, Response):
+        return ('data', response.status_code, response.data)
+    return ('content', response.status_code, response.content, response.get('Content-Type'))
+
+
+def _thaw(entry):
+    if entry[0] == 'data':
+        response = Response(entry[2], status=entry[1])
+    else:
+        response = HttpResponse(entry[2], status=entry[1])
+        if entry[3] is None:
+            del response['Content-Type']
+        else:
+            response['Content-Type'] = entry[3]
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _begin(request):
+    """
+    Reserve the request's key. Returns (cache key, fingerprint, replay, error):
+    a stored response to replay, or (status, data) of an error to return
+    instead of running the view, or the reserved key to store the response under.
+    """
+    key = request.META[HEADER]
+    if len(key) > MAX_KEY_LENGTH:
+        error = {'detail': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters.'}
+        return None, None, None, (status.HTTP_400_BAD_REQUEST, error)
+
+    cache_key, fingerprint = _cache_key(request, key), _fingerprint(request)
+    if cache.add(cache_key, (fingerprint, None), timeout=IN_PROGRESS_TIMEOUT):
+        return cache_key, fingerprint, None, None
+
+    stored = cache.get(cache_key)
+    if stored is None:
+        # Expired in between; run the view without storing its response.
+        return None, None, None, None
+    if stored[0] != fingerprint:
+        error = {'detail': 'Idempotency-Key was already used for a different request.'}
+        return None, None, None, (status.HTTP_422_UNPROCESSABLE_ENTITY, error)
+    if stored[1] is None:
+        error = {'detail': 'A request with this Idempotency-Key is still being processed.'}
+        return None, None, None, (status.HTTP_409_CONFLICT, error)
+    return None, None, _thaw(stored[1]), None
+
+
+def _finish(cache_key, fingerprint, response):
+    if response is None or response.status_code >= 500:
+        cache.delete(cache_key)
+    else:
+        cache.set(cache_key, (fingerprint, _freeze(response)), timeout=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def _applies(request):
+    user = getattr(request, 'user', None)
+    return HEADER in request.META and user is not None and user.is_authenticated
+
+
+def idempotent(view_func):
+    """
+    Honour the Idempotency-Key header on a sync or async view; use
+    method_decorator on class-based views.
+    """
+    if iscoroutinefunction(view_func):
+        @functools.wraps(view_func)
+        async def _wrapped_view(request, *args, **kwargs):
+            if not _applies(request):
+                return await view_func(request, *args, **kwargs)
+            cache_key, fingerprint, replay, error = await sync_to_async(_begin)(request)
+            if error is not None:
+                return JSONResponse(error[1], status=error[0])
+            if replay is not None:
+                return replay
+            if cache_key is None:
+                return await view_func(request, *args, **kwargs)
+            response = None
+            try:
+                response = await view_func(request, *args, **kwargs)
+                return response
+            finally:
+                await sync_to_async(_finish)(cache_key, fingerprint, response)
+    else:
+        @functools.wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if not _applies(request):
+                return view_func(request, *args, **kwargs)
+            cache_key, fingerprint, replay, error = _begin(request)
+            if error is not None:
+                return Response(error[1], status=error[0])
+            if replay is not None:
+                return replay
+            if cache_key is None:
+                return view_func(request, *args, **kwargs)
+            response = None
+            try:
+                response = view_func(request, *args, **kwargs)
+                return response
+            finally:
+                _finish(cache_key, fingerprint, response)
+    return _wrapped_view
@@ -0,0 +1,67 @@
+import copy
+import importlib.util
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+
+
+class Command(BaseCommand):
+    help = 'Compares per-request database connection setup without reuse, with persistent connections and with a pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--requests', type=int, default=200, help='Simulated requests per mode.')
+
+    def _wrapper(self, alias, conn_max_age, pool=None):
+        # A private connection built from the configured settings, so the
+        # modes don't share state with each other or with `connections`.
+        settings_dict = copy.deepcopy(connections.settings[alias])
+        settings_dict['CONN_MAX_AGE'] = conn_max_age
+        settings_dict['OPTIONS'].pop('pool', None)
+        if pool is not None:
+            settings_dict['OPTIONS']['pool'] = pool
+        return load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, alias)
+
+    def _run(self, wrapper, requests):
+        timings = []
+        try:
+            for _ in range(requests):
+                # What a request does: the request_started/finished cleanup
+                # around a query on a (possibly new) connection.
+                start = time.perf_counter()
+                wrapper.close_if_unusable_or_obsolete()
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+                wrapper.close_if_unusable_or_obsolete()
+                timings.append(time.perf_counter() - start)
+        finally:
+            wrapper.close()
+            if wrapper.settings_dict['OPTIONS'].get('pool'):
+                wrapper.close_pool()
+        timings.sort()
+        return timings
+
+    def handle(self, *args, **options):
+        alias, requests = options['database'], options['requests']
+        vendor = connections[alias].vendor
+
+        modes = [
+            ('no reuse', self._wrapper(alias, 0)),
+            ('persistent', self._wrapper(alias, 600)),
+        ]
+        if vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(f'Pooling is only available on PostgreSQL, not {vendor}.'))
+        elif importlib.util.find_spec('psycopg_pool') is None:
+            self.stdout.write(self.style.WARNING('Pooling needs psycopg 3: pip install "psycopg[binary,pool]"'))
+        else:
+            modes.append(('pool', self._wrapper(alias, 0, pool={'min_size': 1, 'max_size': 4})))
+
+        self.stdout.write(f"{'mode':<12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, wrapper in modes:
+            timings = self._run(wrapper, requests)
+            pct = lambda p: timings[min(len(timings) - 1, int(len(timings) * p))] * 1000
+            mean = sum(timings) / len(timings) * 1000
+            self.stdout.write(f'{name:<12}{mean:>10.3f}{pct(0.5):>10.3f}{pct(0.95):>10.3f}{pct(0.99):>10.3f}')
@@ -0,0 +1,76 @@
+import io
+import timeit
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from her_saheli_backend.parsers import FastJSONParser
+from her_saheli_backend.renderers import FastJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = 'Compares stdlib and fast JSON rendering/parsing on the largest API payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=10, help='Years of period history in the period-date list.')
+        parser.add_argument('--number', type=int, default=200, help='Iterations per measurement.')
+
+    def _period_dates(self, years):
+        # Shape of CycleLogView.get: a flat list of every logged period day.
+        dates = []
+        start = date.today() - timedelta(days=365 * years)
+        while start < date.today():
+            for offset in range(5):
+                dates.append((start + timedelta(days=offset)).strftime('%Y-%m-%d'))
+            start += timedelta(days=28)
+        return dates
+
+    def _insights(self):
+        # Shape of InsightsView.get with a busy symptom history.
+        return {
+            'cycleLength': {
+                'labels': ['Jan', 'Feb', 'Mar', 'Apr', 'May'],
+                'data': [28, 29, 27, 30, 28],
+            },
+            'symptoms': [
+                {'name': f'Symptom {i}', 'frequency': f'{i % 100}%', 'trend': 'stable'}
+                for i in range(200)
+            ],
+            'patterns': [
+                {'title': 'Pre-Menstrual Fatigue', 'description': 'x' * 120, 'icon': 'moon'},
+                {'title': 'Menstrual Pain', 'description': 'y' * 120, 'icon': 'fitness'},
+            ],
+        }
+
+    def _time(self, func, number):
+        return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+    def handle(self, *args, **options):
+        number = options['number']
+        payloads = {
+            'period dates': self._period_dates(options['years']),
+            'insights': self._insights(),
+        }
+
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; the fast classes fall back to the stdlib.'))
+
+        stdlib_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+        stdlib_parser, fast_parser = JSONParser(), FastJSONParser()
+
+        for name, data in payloads.items():
+            body = stdlib_renderer.render(data)
+            if fast_renderer.render(data) != body:
+                self.stdout.write(self.style.ERROR(f'{name}: fast renderer output differs from the stdlib output'))
+
+            render_std = self._time(lambda: stdlib_renderer.render(data), number)
+            render_fast = self._time(lambda: fast_renderer.render(data), number)
+            parse_std = self._time(lambda: stdlib_parser.parse(io.BytesIO(body)), number)
+            parse_fast = self._time(lambda: fast_parser.parse(io.BytesIO(body)), number)
+
+            self.stdout.write(f'{name} ({len(body)} bytes)')
+            self.stdout.write(f'  render: stdlib {render_std:9.1f}us  fast {render_fast:9.1f}us  x{render_std / render_fast:.1f}')
+            self.stdout.write(f'  parse:  stdlib {parse_std:9.1f}us  fast {parse_fast:9.1f}us  x{parse_std / parse_fast:.1f}')
+
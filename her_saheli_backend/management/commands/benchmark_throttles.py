@@ -0,0 +1,48 @@
+import itertools
+import timeit
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from rest_framework.exceptions import Throttled
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from her_saheli_backend import throttling
+from users.models import User
+
+
+class BenchmarkView(APIView):
+    throttle_scope = 'day_log_toggle'
+    throttle_classes = (throttling.UserBucketThrottle, throttling.ScopedBucketThrottle)
+
+
+class Command(BaseCommand):
+    help = 'Measures the per-request cost of the token-bucket throttles with each bucket store'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=20000, help='Throttle checks per measurement.')
+        parser.add_argument('--users', type=int, default=1000, help='Distinct users the checks rotate through.')
+
+    def handle(self, *args, **options):
+        view = BenchmarkView()
+        factory = APIRequestFactory()
+        requests = []
+        for pk in range(1, options['users'] + 1):
+            request = view.initialize_request(factory.post('/api/cycle/day/'))
+            # Unsaved users are enough to key the buckets.
+            request.user = User(pk=pk)
+            requests.append(request)
+        rotation = itertools.cycle(requests)
+
+        def check():
+            # Both the user and the day_log_toggle bucket, as a request to DayLogToggleView.
+            try:
+                view.check_throttles(next(rotation))
+            except Throttled:
+                pass
+
+        self.stdout.write(f"{'store':<10}{'us/request':>12}")
+        for name, store_class in throttling.STORES.items():
+            with mock.patch.object(throttling, 'get_store', return_value=store_class()):
+                seconds = min(timeit.repeat(check, number=options['number'], repeat=3))
+            self.stdout.write(f"{name:<10}{seconds / options['number'] * 1e6:>12.1f}")
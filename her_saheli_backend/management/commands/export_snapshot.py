@@ -0,0 +1,217 @@
+import csv
+import json
+import multiprocessing
+import os
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Max, Min
+
+from cycles.models import Cycle, DailyLog
+from users.models import User
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # Only CSV snapshots without pyarrow.
+    pyarrow = None
+
+MANIFEST = 'manifest.json'
+
+# table: (queryset, user id lookup, date lookup, [(column lookup, arrow type)]).
+# The first column is the id the incremental mode is keyed on.
+TABLES = {
+    'daily_logs': (
+        lambda: DailyLog.objects.order_by(), 'user_id', 'date', [
+            ('id', 'int64'), ('user_id', 'int64'), ('date', 'date32'), ('mood', 'string'),
+            ('pain_level', 'int16'), ('symptom_severity', 'int16'), ('energy_level', 'int16'), ('notes', 'string'),
+            ('symptom_mask', 'int64'),
+        ],
+    ),
+    'daily_log_symptoms': (
+        lambda: DailyLog.symptoms.through.objects.order_by(), 'dailylog__user_id', 'dailylog__date', [
+            ('id', 'int64'), ('dailylog_id', 'int64'), ('dailylog__user_id', 'int64'), ('dailylog__date', 'date32'),
+            ('symptom_id', 'int64'), ('symptom__name', 'string'),
+        ],
+    ),
+    'cycles': (
+        lambda: Cycle.objects.order_by(), 'user_id', 'start_date', [
+            ('id', 'int64'), ('user_id', 'int64'), ('start_date', 'date32'), ('end_date', 'date32'),
+        ],
+    ),
+}
+
+
+class CSVWriter:
+    extension = 'csv'
+
+    def __init__(self, path, columns):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([name.replace('__', '_') for name, _ in columns])
+
+    def write(self, arrays):
+        self.writer.writerows(zip(*arrays))
+
+    def close(self):
+        self.file.close()
+
+
+class ArrowWriter:
+    extension = 'arrow'
+
+    def __init__(self, path, columns):
+        self.schema = pyarrow.schema([(name.replace('__', '_'), getattr(pyarrow, kind)()) for name, kind in columns])
+        self.writer = self._open(path)
+
+    def _open(self, path):
+        return pyarrow.ipc.new_file(path, self.schema)
+
+    def write(self, arrays):
+        self.writer.write_batch(pyarrow.RecordBatch.from_arrays(
+            [pyarrow.array(array, type=field.type) for array, field in zip(arrays, self.schema)], schema=self.schema,
+        ))
+
+    def close(self):
+        self.writer.close()
+
+
+class ParquetWriter(ArrowWriter):
+    extension = 'parquet'
+
+    def _open(self, path):
+        return pyarrow.parquet.ParquetWriter(path, self.schema, compression='zstd')
+
+
+WRITERS = {
+    'csv': CSVWriter,
+    'arrow': ArrowWriter,
+    'parquet': ParquetWriter,
+}
+
+
+def export_partition(job):
+    """
+    Write the rows of one table for users in [low, high) to a part file,
+    `chunk_size` rows at a time. Returns (table, rows, max id, max date).
+    """
+    table, low, high, after_id, after_date, path, writer_name, chunk_size = job
+    queryset_for, user_lookup, date_lookup, columns = TABLES[table]
+    queryset = queryset_for().filter(**{f'{user_lookup}__gte': low, f'{user_lookup}__lt': high})
+    if after_id is not None:
+        queryset = queryset.filter(id__gt=after_id)
+    if after_date is not None:
+        queryset = queryset.filter(**{f'{date_lookup}__gt': after_date})
+
+    # A server-side cursor on PostgreSQL, so memory stays at one chunk.
+    rows = queryset.values_list(*[name for name, _ in columns]).iterator(chunk_size=chunk_size)
+    date_index = [name for name, _ in columns].index(date_lookup)
+    writer, count, max_id, max_date = None, 0, None, None
+    chunk = []
+    try:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) < chunk_size:
+                continue
+            writer = writer or WRITERS[writer_name](path, columns)
+            count, max_id, max_date = _flush(writer, chunk, date_index, count, max_id, max_date)
+            chunk = []
+        if chunk:
+            writer = writer or WRITERS[writer_name](path, columns)
+            count, max_id, max_date = _flush(writer, chunk, date_index, count, max_id, max_date)
+    finally:
+        if writer is not None:
+            writer.close()
+    return table, count, max_id, max_date
+
+
+def _flush(writer, chunk, date_index, count, max_id, max_date):
+    arrays = list(zip(*chunk))
+    writer.write(arrays)
+    chunk_max_date = max(arrays[date_index])
+    return (
+        count + len(chunk),
+        max(arrays[0]) if max_id is None else max(max_id, max(arrays[0])),
+        chunk_max_date if max_date is None else max(max_date, chunk_max_date),
+    )
+
+
+class Command(BaseCommand):
+    help = ('Writes columnar snapshots of daily logs, their symptoms and cycles, one file per table and '
+            'user-id range, exporting the ranges in parallel. Parquet and Arrow IPC need pyarrow.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Snapshot directory; created if missing.')
+        parser.add_argument('--format', choices=WRITERS, help='Defaults to parquet, or csv without pyarrow.')
+        parser.add_argument('--tables', nargs='+', choices=TABLES, default=list(TABLES))
+        parser.add_argument('--incremental', choices=('id', 'date'),
+                            help='Only rows after the highest id or date of the previous export into OUTPUT.')
+        parser.add_argument('--partitions', type=int, default=os.cpu_count(), help='User-id ranges per table.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Processes exporting partitions.')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Rows fetched and written at a time.')
+
+    def handle(self, *args, **options):
+        writer_name = options['format'] or ('parquet' if pyarrow is not None else 'csv')
+        if writer_name != 'csv' and pyarrow is None:
+            raise CommandError(f'{writer_name} snapshots need pyarrow: pip install pyarrow')
+        if options['format'] is None and pyarrow is None:
+            self.stdout.write(self.style.WARNING('pyarrow is not installed, writing CSV.'))
+
+        output = options['output']
+        os.makedirs(output, exist_ok=True)
+        manifest_path = os.path.join(output, MANIFEST)
+        manifest = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+
+        bounds = User.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            self.stdout.write('No users to export.')
+            return
+        span = bounds['high'] + 1 - bounds['low']
+        partitions = max(1, min(options['partitions'], span))
+        edges = [bounds['low'] + span * i // partitions for i in range(partitions + 1)]
+
+        run = time.strftime('%Y%m%dT%H%M%S')
+        jobs = []
+        for table in options['tables']:
+            state = manifest.get(table, {})
+            after_id = state.get('max_id') if options['incremental'] == 'id' else None
+            after_date = state.get('max_date') if options['incremental'] == 'date' else None
+            os.makedirs(os.path.join(output, table), exist_ok=True)
+            for index in range(partitions):
+                path = os.path.join(output, table, f'part-{run}-{index:04d}.{WRITERS[writer_name].extension}')
+                jobs.append((
+                    table, edges[index], edges[index + 1], after_id, after_date and date.fromisoformat(after_date),
+                    path, writer_name, options['chunk_size'],
+                ))
+
+        started = time.perf_counter()
+        if options['workers'] > 1 and len(jobs) > 1:
+            # Forked workers must not share the parent's connections.
+            connections.close_all()
+            with multiprocessing.get_context('fork').Pool(options['workers']) as pool:
+                results = list(pool.imap_unordered(export_partition, jobs))
+        else:
+            results = [export_partition(job) for job in jobs]
+
+        totals = dict.fromkeys(options['tables'], 0)
+        for table, count, max_id, max_date in results:
+            totals[table] += count
+            state = manifest.setdefault(table, {})
+            if max_id is not None:
+                state['max_id'] = max(max_id, state.get('max_id') or 0)
+            if max_date is not None:
+                state['max_date'] = max(max_date.isoformat(), state.get('max_date') or '')
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+        for table, count in totals.items():
+            self.stdout.write(f'{table}: {count} rows')
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote a {writer_name} snapshot to {output} in {time.perf_counter() - started:.1f}s.'
+        ))
@@ -0,0 +1,97 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter per boot: what a new gunicorn worker does before
+# serving, stage by stage, then its first request.
+BOOT = '''
+import json, sys, time
+timings = []
+start = time.perf_counter()
+def stage(name):
+    global start
+    now = time.perf_counter()
+    timings.append((name, now - start))
+    start = now
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+stage('settings')
+django.setup(set_prefix=False)
+stage('apps')
+if sys.argv[1] == 'asgi':
+    from django.core.handlers.asgi import ASGIHandler
+    handler = ASGIHandler()
+else:
+    from django.core.handlers.wsgi import WSGIHandler
+    handler = WSGIHandler()
+stage('handler')
+from django.urls import get_resolver
+get_resolver().url_patterns
+stage('urls')
+if sys.argv[2]:
+    from django.test import Client, AsyncClient
+    host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h.strip('.*')), 'localhost')
+    if sys.argv[1] == 'asgi':
+        import asyncio
+        asyncio.run(AsyncClient(SERVER_NAME=host).get(sys.argv[2]))
+    else:
+        Client(SERVER_NAME=host).get(sys.argv[2])
+    stage('first request')
+print(json.dumps(timings))
+'''
+
+
+class Command(BaseCommand):
+    help = ('Profiles worker cold start: times each boot stage over fresh interpreters and lists the '
+            'imports that cost the most, from python -X importtime.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=('wsgi', 'asgi'), default='wsgi')
+        parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to time.')
+        parser.add_argument('--path', default='/api/schema/', help='First request to time; empty to skip.')
+        parser.add_argument('--imports', type=int, default=20, help='Slowest imports to list; 0 to skip.')
+
+    def _boot(self, options, *flags):
+        result = subprocess.run(
+            [sys.executable, *flags, '-c', BOOT, options['target'], options['path']],
+            cwd=settings.BASE_DIR, env=dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'her_saheli_backend.settings',
+            )),
+            capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f'Boot failed:\n{result.stderr[-2000:]}')
+        return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+    def handle(self, *args, **options):
+        runs = [self._boot(options)[0] for _ in range(options['runs'])]
+        self.stdout.write(f"{'stage':<16}{'median ms':>12}{'min ms':>10}")
+        for index, (name, _) in enumerate(runs[0]):
+            times = [run[index][1] * 1000 for run in runs]
+            self.stdout.write(f'{name:<16}{statistics.median(times):>12.1f}{min(times):>10.1f}')
+        totals = [sum(seconds for _, seconds in run) * 1000 for run in runs]
+        self.stdout.write(f"{'total':<16}{statistics.median(totals):>12.1f}{min(totals):>10.1f}")
+
+        if options['imports']:
+            _, report = self._boot(options, '-X', 'importtime')
+            modules, packages = [], Counter()
+            for line in report.splitlines():
+                match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)', line)
+                if match:
+                    own, cumulative, module = int(match[1]), int(match[2]), match[3]
+                    modules.append((cumulative, module))
+                    packages[module.split('.')[0]] += own
+            self.stdout.write(f"\n{'package':<40}{'own ms':>10}")
+            for package, own in packages.most_common(options['imports']):
+                self.stdout.write(f'{package:<40}{own / 1000:>10.1f}')
+            self.stdout.write(f"\n{'module':<60}{'cumulative ms':>14}")
+            for cumulative, module in sorted(modules, reverse=True)[:options['imports']]:
+                self.stdout.write(f'{module:<60}{cumulative / 1000:>14.1f}')
@@ -0,0 +1,130 @@
+"""
+Read-replica routing for the read-only endpoints.
+
+Views opt in with `use_replica`; every other query, and every write, stays on
+the primary. After a user writes, `ReplicaPinMiddleware` pins them to the
+primary for REPLICA_PIN_SECONDS so they always read their own writes, even if
+the replica lags behind.
+
+Routing is only active when a 'replica' database is configured
+(DATABASE_REPLICA_URL); without one everything runs on 'default'.
+"""
+import contextvars
+import functools
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB = 'replica'
+
+_read_db = contextvars.ContextVar('read_db', default=None)
+
+
+def replica_configured():
+    return REPLICA_DB in settings.DATABASES
+
+
+def _pin_key(user_id):
+    return f'db:primary-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """
+    Send `user_id`'s replica reads to the primary for REPLICA_PIN_SECONDS.
+    """
+    cache.set(_pin_key(user_id), True, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def _user_id(request):
+    user = getattr(request, 'user', None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+class ReplicaRouter:
+    """
+    Route reads to the replica inside views decorated with `use_replica`.
+    """
+    def db_for_read(self, model, **hints):
+        db = _read_db.get()
+        if db is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Reads in a transaction must see its own writes.
+            return None
+        return db
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary.
+        return True
+
+
+def use_replica(view_func):
+    """
+    Run a view's reads on the replica unless the user is pinned to the primary.
+    Works on sync and async views; use method_decorator on class-based views.
+    """
+    if iscoroutinefunction(view_func):
+        @functools.wraps(view_func)
+        async def _wrapped_view(request, *args, **kwargs):
+            user_id = _user_id(request)
+            pinned = user_id is not None and await cache.aget(_pin_key(user_id))
+            token = _read_db.set(None if pinned else REPLICA_DB)
+            try:
+                return await view_func(request, *args, **kwargs)
+            finally:
+                _read_db.reset(token)
+    else:
+        @functools.wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            user_id = _user_id(request)
+            pinned = user_id is not None and cache.get(_pin_key(user_id))
+            token = _read_db.set(None if pinned else REPLICA_DB)
+            try:
+                return view_func(request, *args, **kwargs)
+            finally:
+                _read_db.reset(token)
+
+    if not replica_configured():
+        return view_func
+    return _wrapped_view
+
+
+class ReplicaPinMiddleware:
+    """
+    Pin users to the primary after a successful write request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        user_id = self._writer_id(request, response)
+        if user_id is not None:
+            pin_to_primary(user_id)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        user_id = self._writer_id(request, response)
+        if user_id is not None:
+            await cache.aset(_pin_key(user_id), True, timeout=settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def _writer_id(self, request, response):
+        if request.method in ('GET', 'HEAD', 'OPTIONS') or response.status_code >= 400:
+            return None
+        # request.user is set by session auth, by DRF's JWT auth and by AsyncAPIView.
+        return _user_id(request)
@@ -0,0 +1,138 @@
+from operator import itemgetter
+
+from django.db import models
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+class ValuesSerializer:
+    """
+    Read-only serializer that works on `values_list()` rows instead of model
+    instances, for GET and list endpoints.
+
+    Subclasses set `model` and `fields` (output names, in output order) and
+    may map an output name to an ORM lookup with `sources`. Many-to-many
+    fields are emitted as lists of primary keys, like PrimaryKeyRelatedField.
+    The output matches the equivalent ModelSerializer exactly.
+    """
+    model = None
+    fields = ()
+    sources = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.model is not None:
+            cls._compile()
+
+    @classmethod
+    def _compile(cls):
+        cls._lookups = []
+        cls._extractors = []
+        cls._m2m = []
+        for name in cls.fields:
+            lookup = cls.sources.get(name, name)
+            field = cls._resolve(lookup)
+            if field.many_to_many:
+                cls._m2m.append((name, field))
+                continue
+            getter = itemgetter(len(cls._lookups))
+            cls._lookups.append(lookup)
+            if isinstance(field, models.DateField):
+                cls._extractors.append((name, getter, _isoformat))
+            else:
+                cls._extractors.append((name, getter, None))
+        # The pk is always fetched last so many-to-many values can be joined back.
+        cls._pk_getter = itemgetter(len(cls._lookups))
+
+    @classmethod
+    def _resolve(cls, lookup):
+        model = cls.model
+        *path, last = lookup.split('__')
+        for part in path:
+            model = model._meta.get_field(part).related_model
+        return model._meta.get_field(last)
+
+    @classmethod
+    def _rows(cls, queryset):
+        return queryset.values_list(*cls._lookups, 'pk')
+
+    @classmethod
+    def _pairs(cls, field, pks):
+        through = field.remote_field.through
+        source = field.m2m_field_name() + '_id'
+        target = field.m2m_reverse_field_name() + '_id'
+        pairs = through.objects.filter(**{source + '__in': pks}).order_by(source, target)
+        return pairs.values_list(source, target)
+
+    @classmethod
+    def _related(cls, pks):
+        related = {}
+        for name, field in cls._m2m:
+            values = related[name] = {pk: [] for pk in pks}
+            for owner, value in cls._pairs(field, pks):
+                values[owner].append(value)
+        return related
+
+    @classmethod
+    async def _arelated(cls, pks):
+        related = {}
+        for name, field in cls._m2m:
+            values = related[name] = {pk: [] for pk in pks}
+            async for owner, value in cls._pairs(field, pks):
+                values[owner].append(value)
+        return related
+
+    @classmethod
+    def _represent(cls, row, related):
+        ret = {}
+        for name, getter, convert in cls._extractors:
+            value = getter(row)
+            ret[name] = convert(value) if convert else value
+        if related:
+            pk = cls._pk_getter(row)
+            for name, _ in cls._m2m:
+                ret[name] = related[name][pk]
+        # Preserve the declared field order when many-to-many fields are interleaved.
+        return {name: ret[name] for name in cls.fields} if cls._m2m else ret
+
+    @classmethod
+    def list(cls, queryset):
+        """
+        Serialize every row of `queryset`.
+        """
+        rows = list(cls._rows(queryset))
+        related = cls._related([cls._pk_getter(row) for row in rows]) if cls._m2m and rows else {}
+        return [cls._represent(row, related) for row in rows]
+
+    @classmethod
+    def get(cls, queryset):
+        """
+        Serialize the single row of `queryset`, or return None if there is none.
+        """
+        rows = list(cls._rows(queryset)[:1])
+        if not rows:
+            return None
+        related = cls._related([cls._pk_getter(rows[0])]) if cls._m2m else {}
+        return cls._represent(rows[0], related)
+
+    @classmethod
+    async def alist(cls, queryset):
+        """
+        Async version of list() using the async ORM.
+        """
+        rows = [row async for row in cls._rows(queryset)]
+        related = await cls._arelated([cls._pk_getter(row) for row in rows]) if cls._m2m and rows else {}
+        return [cls._represent(row, related) for row in rows]
+
+    @classmethod
+    async def aget(cls, queryset):
+        """
+        Async version of get() using the async ORM.
+        """
+        row = await cls._rows(queryset).afirst()
+        if row is None:
+            return None
+        related = await cls._arelated([cls._pk_getter(row)]) if cls._m2m else {}
+        return cls._represent(row, related)
@@ -1,7 +1,10 @@
+import importlib.util
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 import dj_database_url
+from corsheaders.defaults import default_headers
 from datetime import timedelta
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -35,22 +38,27 @@ INSTALLED_APPS = [
     'drf_spectacular',
 
     # Local apps
+    'her_saheli_backend',
     'users',
     'cycles',
     'pregnancy',
     'postpartum',
     'content',
     'chatbot',
+    'tasks',
+    'analytics',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'her_saheli_backend.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'her_saheli_backend.replicas.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -75,14 +83,85 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'her_saheli_backend.wsgi.application'
 
+# Route the hot endpoints to their native async views (for ASGI deployments).
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False').lower() in ('true', '1', 't')
+
+# Connection reuse, all configurable from the environment:
+#   DB_POOL=True       psycopg 3 connection pool inside each process (needs psycopg[pool]).
+#                      Persistent connections are turned off, the pool owns reuse.
+#   DB_PGBOUNCER=True  running behind pgbouncer in transaction mode: no server-side
+#                      cursors and no persistent connections. Prepared statements
+#                      are already off (psycopg2, and psycopg 3 with client-side binding).
+#   DB_CONN_MAX_AGE    seconds a persistent connection is kept otherwise (default 600).
+DB_POOL = os.environ.get('DB_POOL', 'False').lower() in ('true', '1', 't')
+DB_PGBOUNCER = os.environ.get('DB_PGBOUNCER', 'False').lower() in ('true', '1', 't')
+
+DB_CONN_MAX_AGE = 0 if DB_POOL or DB_PGBOUNCER else int(os.environ.get('DB_CONN_MAX_AGE', 600))
+
 DATABASES = {
     'default': dj_database_url.config(
         default=os.environ.get('DATABASE_URL'),
-        conn_max_age=600,
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True,
+        ssl_require=not DEBUG
+    )
+}
+
+# Optional read replica for the read-only analytics and content endpoints
+# (see her_saheli_backend/replicas.py). Users who just wrote something read
+# from the primary for REPLICA_PIN_SECONDS.
+if os.environ.get('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = dj_database_url.parse(
+        os.environ['DATABASE_REPLICA_URL'],
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True,
         ssl_require=not DEBUG
     )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['her_saheli_backend.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 10))
+
+for database in DATABASES.values():
+    if database.get('ENGINE') != 'django.db.backends.postgresql':
+        continue
+    if DB_POOL:
+        database.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+    if DB_PGBOUNCER:
+        database['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# Shared cache tier: Redis when REDIS_URL is set, otherwise a file-based cache
+# that every worker process on the machine shares. 'local' is the in-process
+# LRU tier in front of it (see her_saheli_backend/caching.py).
+if os.environ.get('REDIS_URL'):
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'her-saheli-cache')),
+    }
+
+CACHES = {
+    'default': SHARED_CACHE,
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_LOCAL_MAX_ENTRIES', 10000))},
+    },
 }
 
+# Seconds cached responses live in the shared and local tiers.
+CACHE_RESPONSE_TIMEOUT = int(os.environ.get('CACHE_RESPONSE_TIMEOUT', 300))
+CACHE_LOCAL_TIMEOUT = int(os.environ.get('CACHE_LOCAL_TIMEOUT', 60))
+# Longest a request waits for another one recomputing the same entry.
+CACHE_LOCK_TIMEOUT = 5
+
 AUTH_USER_MODEL = 'users.User'
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -99,10 +178,18 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Hashed names, cached as immutable by WhiteNoise, and gzip (plus brotli when
+# installed) copies written by collectstatic. STATICFILES_STORAGE is ignored
+# since Django 5.1.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+THROTTLE_ENABLED = os.environ.get('THROTTLE_ENABLED', 'True').lower() in ('true', '1', 't')
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -110,7 +197,32 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson backed JSON; falls back to the stdlib when orjson is missing.
+    'DEFAULT_RENDERER_CLASSES': (
+        'her_saheli_backend.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'her_saheli_backend.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Token-bucket throttles (her_saheli_backend/throttling.py). Views opt into
+    # a stricter limit with `throttle_scope`.
+    'DEFAULT_THROTTLE_CLASSES': (
+        'her_saheli_backend.throttling.AnonBucketThrottle',
+        'her_saheli_backend.throttling.UserBucketThrottle',
+        'her_saheli_backend.throttling.ScopedBucketThrottle',
+    ) if THROTTLE_ENABLED else (),
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': os.environ.get('THROTTLE_ANON_RATE', '120/min'),
+        'user': os.environ.get('THROTTLE_USER_RATE', '600/min'),
+        'day_log_toggle': os.environ.get('THROTTLE_DAY_LOG_TOGGLE_RATE', '60/min'),
+        'registration': os.environ.get('THROTTLE_REGISTRATION_RATE', '20/hour'),
+    },
+    # 'memory' keeps buckets per process, 'cache' shares them through the cache.
+    'THROTTLE_STORE': os.environ.get('THROTTLE_STORE', 'cache' if os.environ.get('REDIS_URL') else 'memory'),
 }
 
 SIMPLE_JWT = {
@@ -118,13 +230,64 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login is still kept, coalesced by the users.tasks.record_logins task.
+    'UPDATE_LAST_LOGIN': False,
 } 
 CORS_ALLOW_ALL_ORIGINS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
  
+# Chatbot assistant backend and per-user limits.
+CHATBOT_PROVIDER = os.environ.get('CHATBOT_PROVIDER', 'chatbot.providers.LocalProvider')
+CHATBOT_PROVIDER_OPTIONS = {}
+CHATBOT_MAX_CONCURRENT_CHATS = int(os.environ.get('CHATBOT_MAX_CONCURRENT_CHATS', 1))
+CHATBOT_HISTORY_TURNS = 10
+CHATBOT_HISTORY_MAX_USERS = 10000
+# Cosine similarity above which a question is answered straight from an FAQ.
+CHATBOT_FAQ_MATCH_THRESHOLD = float(os.environ.get('CHATBOT_FAQ_MATCH_THRESHOLD', 0.6))
+CHATBOT_REPLY_CACHE_SIZE = 5000
+# Approximate size limit of the per-user health summary given to the provider.
+CHATBOT_CONTEXT_TOKEN_BUDGET = 300
+
+# Seconds the first response to an Idempotency-Key is replayed to retries.
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+# Background tasks: 'inprocess' runs them on a thread in every web process,
+# 'database' queues them for `manage.py run_tasks` workers.
+TASKS_BACKEND = os.environ.get('TASKS_BACKEND', 'inprocess')
+# Seconds between in-process runs; calls queued meanwhile are batched together.
+TASKS_BATCH_INTERVAL = float(os.environ.get('TASKS_BATCH_INTERVAL', 1.0))
+TASKS_MAX_ATTEMPTS = 5
+
+# Population statistics leave out histogram cells counted fewer times than
+# this, so small groups of users can't be singled out.
+ANALYTICS_MIN_CELL_COUNT = int(os.environ.get('ANALYTICS_MIN_CELL_COUNT', 5))
+
+# Admin changelists on PostgreSQL show estimated row counts, counting exactly
+# only below this many rows.
+ADMIN_EXACT_COUNT_LIMIT = int(os.environ.get('ADMIN_EXACT_COUNT_LIMIT', 10000))
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Her-Saheli API',
     'DESCRIPTION': 'API documentation for the Her-Saheli project.',
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
-}
\ No newline at end of file
+}
+
+# Where build.sh writes the pre-generated OpenAPI schema that /api/schema/ serves.
+# collectstatic then compresses it with the other static files.
+OPENAPI_SCHEMA_DIR = BASE_DIR / 'openapi'
+STATICFILES_DIRS = [('openapi', OPENAPI_SCHEMA_DIR)] if OPENAPI_SCHEMA_DIR.is_dir() else []
+
+# Swagger UI and ReDoc assets from drf-spectacular-sidecar are collected and
+# served precompressed by WhiteNoise instead of loaded from a CDN.
+if importlib.util.find_spec('drf_spectacular_sidecar') is not None:
+    INSTALLED_APPS.append('drf_spectacular_sidecar')
+    SPECTACULAR_SETTINGS.update(SWAGGER_UI_DIST='SIDECAR', SWAGGER_UI_FAVICON_HREF='SIDECAR', REDOC_DIST='SIDECAR')
+
+# API responses of JSON of at least this many bytes are compressed
+# (her_saheli_backend/compression.py), with brotli at the given quality
+# (0-11) when it's installed and accepted, otherwise with gzip at the given
+# level (1-9).
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.environ.get('RESPONSE_COMPRESSION_MIN_SIZE', 1024))
+RESPONSE_COMPRESSION_LEVEL = int(os.environ.get('RESPONSE_COMPRESSION_LEVEL', 5))
+RESPONSE_COMPRESSION_BROTLI_QUALITY = int(os.environ.get('RESPONSE_COMPRESSION_BROTLI_QUALITY', 4))
\ No newline at end of file
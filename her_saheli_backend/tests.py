@@ -0,0 +1,451 @@
+import asyncio
+import gzip
+import io
+import os
+import runpy
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import router
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils.decorators import method_decorator
+from django.views import View
+from rest_framework import views
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from cycles.models import Cycle
+from users.models import User
+from . import settings as project_settings
+from . import views as project_views
+from .admin import EstimatedCountPaginator, estimated_count
+from .caching import TieredCache, _missing, bump_namespace, cache_response
+from .compression import CompressionMiddleware, accepted_encodings
+from .idempotency import idempotent
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer
+from .replicas import REPLICA_DB, ReplicaPinMiddleware, use_replica
+from .throttling import CacheBucketStore, MemoryBucketStore, UserBucketThrottle
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-shared'},
+    'local': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-local'},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch.dict(settings.DATABASES, {REPLICA_DB: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}})
+class ReplicaRoutingTests(SimpleTestCase):
+    """
+    Routing with a replica that is a database of its own, not a test mirror.
+    Nothing here runs queries: the router's choice is read off QuerySet.db.
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = User(pk=7, email='reader@example.com')
+        self.factory = RequestFactory()
+
+    def request(self, method='get'):
+        request = getattr(self.factory, method)('/')
+        request.user = self.user
+        return request
+
+    def routed(self, request):
+        @use_replica
+        def view(request):
+            return HttpResponse(f'{Cycle.objects.all().db} {router.db_for_write(Cycle)}')
+        return view(request).content.decode()
+
+    def test_reads_go_to_the_replica_and_writes_to_the_primary(self):
+        self.assertEqual(self.routed(self.request()), 'replica default')
+        self.assertEqual(Cycle.objects.all().db, 'default')
+
+    def test_writers_are_pinned_to_the_primary(self):
+        middleware = ReplicaPinMiddleware(lambda request: HttpResponse(status=201))
+        middleware(self.request('post'))
+        self.assertEqual(self.routed(self.request()), 'default default')
+
+    def test_failed_writes_and_reads_do_not_pin(self):
+        ReplicaPinMiddleware(lambda request: HttpResponse(status=400))(self.request('post'))
+        ReplicaPinMiddleware(lambda request: HttpResponse())(self.request())
+        self.assertEqual(self.routed(self.request()), 'replica default')
+
+
+class CountingView(views.APIView):
+    """
+    Counts its calls; posting {'retry': true} retries the request from
+    inside the view, while the first one is still running.
+    """
+    calls = 0
+
+    @method_decorator(idempotent)
+    def post(self, request):
+        CountingView.calls += 1
+        if request.data.get('retry'):
+            return Response({'retry': post(request.data, request.user).status_code})
+        return Response({'calls': CountingView.calls}, status=request.data.get('status', 201))
+
+
+def post(data, user, key='key-1'):
+    request = APIRequestFactory().post('/', data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+    force_authenticate(request, user)
+    return CountingView.as_view()(request)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class IdempotencyTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        CountingView.calls = 0
+        self.user = User(pk=3, email='retrier@example.com')
+
+    def test_retries_replay_the_first_response(self):
+        first = post({'mood': 'happy'}, self.user)
+        replay = post({'mood': 'happy'}, self.user)
+        self.assertEqual((replay.status_code, replay.data), (201, {'calls': 1}))
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first)
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_keys_are_per_user_and_per_key(self):
+        post({'mood': 'happy'}, self.user)
+        self.assertEqual(post({'mood': 'happy'}, User(pk=4)).data, {'calls': 2})
+        self.assertEqual(post({'mood': 'happy'}, self.user, key='key-2').data, {'calls': 3})
+
+    def test_reused_key_for_a_different_request(self):
+        post({'mood': 'happy'}, self.user)
+        self.assertEqual(post({'mood': 'sad'}, self.user).status_code, 422)
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_retry_while_the_first_is_running(self):
+        self.assertEqual(post({'retry': True}, self.user).data, {'retry': 409})
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_server_errors_are_not_stored(self):
+        self.assertEqual(post({'status': 503}, self.user).status_code, 503)
+        self.assertEqual(post({'status': 503}, self.user).data, {'calls': 2})
+
+    def test_overlong_key(self):
+        self.assertEqual(post({}, self.user, key='k' * 256).status_code, 400)
+        self.assertEqual(CountingView.calls, 0)
+
+
+class FastJSONTests(SimpleTestCase):
+    """
+    The orjson renderer and parser behave like DRF's, with orjson and without.
+    """
+    data = {
+        'text': 'Ünïcode "quoted" \u2028 line separator',
+        'day': date(2025, 3, 1),
+        'at': datetime(2025, 3, 1, 9, 30, 15, 123456, tzinfo=timezone.utc),
+        'amount': Decimal('1.50'),
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'huge': 2 ** 70,
+        'nested': [None, True, 1.5, {1: 'int key'}],
+    }
+
+    def test_renders_like_drf(self):
+        expected = JSONRenderer().render(self.data)
+        self.assertEqual(FastJSONRenderer().render(self.data), expected)
+        with mock.patch('her_saheli_backend.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(self.data), expected)
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_indented_output_uses_drf(self):
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, 'application/json; indent=2'),
+            JSONRenderer().render(self.data, 'application/json; indent=2'),
+        )
+
+    def parse(self, body, encoding='utf-8'):
+        return FastJSONParser().parse(io.BytesIO(body), parser_context={'encoding': encoding})
+
+    def test_parses_like_drf(self):
+        body = '{"text": "Ünïcode", "values": [1, 2.5, null, true]}'.encode()
+        expected = JSONParser().parse(io.BytesIO(body))
+        self.assertEqual(self.parse(body), expected)
+        with mock.patch('her_saheli_backend.parsers.orjson', None):
+            self.assertEqual(self.parse(body), expected)
+        self.assertEqual(self.parse('{"text": "é"}'.encode('latin-1'), encoding='latin-1'), {'text': 'é'})
+
+    def test_rejects_what_drf_rejects(self):
+        for body in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                self.parse(body)
+
+
+class ConnectionSettingsTests(SimpleTestCase):
+    def databases_with(self, **environ):
+        environ = {'DATABASE_URL': 'postgres://app@db/app', **environ}
+        with mock.patch.dict(os.environ, environ):
+            return runpy.run_path(project_settings.__file__)['DATABASES']['default']
+
+    def test_persistent_connections_by_default(self):
+        database = self.databases_with()
+        self.assertEqual((database['CONN_MAX_AGE'], database['CONN_HEALTH_CHECKS']), (600, True))
+        self.assertNotIn('pool', database.get('OPTIONS', {}))
+
+    def test_pool(self):
+        database = self.databases_with(DB_POOL='True', DB_POOL_MAX_SIZE='4')
+        self.assertEqual(database['CONN_MAX_AGE'], 0)
+        self.assertEqual(database['OPTIONS']['pool'], {'min_size': 2, 'max_size': 4, 'timeout': 10.0})
+
+    def test_pgbouncer(self):
+        database = self.databases_with(DB_PGBOUNCER='True')
+        self.assertEqual((database['CONN_MAX_AGE'], database['DISABLE_SERVER_SIDE_CURSORS']), (0, True))
+
+
+class BenchmarkConnectionsTests(TestCase):
+    def test_times_each_mode(self):
+        out = io.StringIO()
+        call_command('benchmark_connections', requests=5, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertIn('Pooling is only available on PostgreSQL', lines[0])
+        self.assertEqual([line.split()[0] for line in lines[2:]], ['no', 'persistent'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        for tier in caches.all():
+            tier.clear()
+        self.tiered = TieredCache()
+        self.computed = 0
+
+    def compute(self, value='fresh', delay=0):
+        def compute():
+            self.computed += 1
+            time.sleep(delay)
+            return value
+        return compute
+
+    def test_tiers(self):
+        self.assertEqual(self.tiered.get_or_compute('k', self.compute(), 60, 'test'), ('fresh', 'miss'))
+        self.assertEqual(self.tiered.get_or_compute('k', self.compute(), 60, 'test'), ('fresh', 'local'))
+        self.tiered.local.clear()
+        self.assertEqual(self.tiered.get_or_compute('k', self.compute(), 60, 'test'), ('fresh', 'shared'))
+        self.assertEqual(self.computed, 1)
+
+    def test_missing_is_not_stored(self):
+        for _ in range(2):
+            self.assertEqual(self.tiered.get_or_compute('k', self.compute(_missing), 60, 'test')[1], 'miss')
+        self.assertEqual(self.computed, 2)
+
+    def test_concurrent_misses_compute_once(self):
+        outcomes = []
+        threads = [
+            threading.Thread(target=lambda: outcomes.append(self.tiered.get_or_compute('k', self.compute(delay=0.2), 60, 'test')))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.computed, 1)
+        self.assertEqual(sorted(outcomes), [('fresh', 'miss')] + [('fresh', 'wait')] * 4)
+
+    def test_concurrent_async_misses_compute_once(self):
+        async def acompute():
+            self.computed += 1
+            await asyncio.sleep(0.1)
+            return 'fresh'
+
+        async def race():
+            return await asyncio.gather(*(self.tiered.aget_or_compute('k', acompute, 60, 'test') for _ in range(5)))
+
+        self.assertEqual(sorted(asyncio.run(race())), [('fresh', 'miss')] + [('fresh', 'wait')] * 4)
+        self.assertEqual(self.computed, 1)
+
+    def test_waits_for_another_process(self):
+        # Another process holds the lock and stores its result shortly.
+        self.tiered.shared.add('k:lock', True)
+        threading.Timer(0.1, lambda: self.tiered.shared.set('k', 'theirs')).start()
+        self.assertEqual(self.tiered.get_or_compute('k', self.compute(), 60, 'test'), ('theirs', 'miss'))
+        self.assertEqual(self.computed, 0)
+
+    def test_bumped_namespace_is_recomputed(self):
+        @cache_response('content')
+        def view(request):
+            self.computed += 1
+            return HttpResponse(str(self.computed))
+
+        request = RequestFactory().get('/tips/')
+        self.assertEqual(view(request)['X-Cache'], 'miss')
+        self.assertEqual(view(request).content, b'1')
+        bump_namespace('content')
+        response = view(request)
+        self.assertEqual((response['X-Cache'], response.content), ('miss', b'2'))
+
+
+class ThreePerSecond(UserBucketThrottle):
+    rate = '3/sec'
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_refill(self):
+        for store in (MemoryBucketStore(), CacheBucketStore()):
+            take = lambda now: store.take('bucket', 3, 1.0, now)[0]
+            self.assertEqual([take(0), take(0), take(0), take(0)], [True, True, True, False])
+            self.assertFalse(take(0.5))
+            self.assertTrue(take(1.5))
+            # Idle time refills up to capacity, never past it.
+            self.assertEqual([take(100) for _ in range(4)], [True, True, True, False])
+
+    def test_memory_store_evicts_least_recently_used(self):
+        store = MemoryBucketStore(max_keys=2)
+        for key in ('a', 'b', 'a', 'c'):
+            store.take(key, 1, 1.0, 0)
+        self.assertEqual(list(store._buckets), ['a', 'c'])
+        self.assertEqual(store.take('b', 1, 1.0, 0), (True, 0))
+
+    def test_throttle(self):
+        request = RequestFactory().get('/')
+        request.user = User(pk=9)
+        throttle = ThreePerSecond()
+        with mock.patch.object(ThreePerSecond, 'timer', return_value=1000.0), \
+                mock.patch('her_saheli_backend.throttling.get_store', return_value=MemoryBucketStore()):
+            self.assertEqual([throttle.allow_request(request, None) for _ in range(4)], [True, True, True, False])
+        self.assertAlmostEqual(throttle.wait(), 1 / 3)
+
+
+@override_settings(ADMIN_EXACT_COUNT_LIMIT=100)
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(3):
+            User.objects.create_user(email=f'listed{index}@example.com', password='pw123456')
+
+    def count(self, estimate):
+        with mock.patch('her_saheli_backend.admin.estimated_count', return_value=estimate):
+            return EstimatedCountPaginator(User.objects.order_by('pk'), 2).count
+
+    def test_counts_exactly_below_the_limit(self):
+        self.assertIsNone(estimated_count(User.objects.all()))  # Not PostgreSQL.
+        self.assertEqual([self.count(None), self.count(50)], [3, 3])
+
+    def test_large_tables_use_the_estimate(self):
+        self.assertEqual(self.count(250000), 250000)
+        paginator = EstimatedCountPaginator(User.objects.order_by('pk'), 2)
+        with mock.patch('her_saheli_backend.admin.estimated_count', return_value=250000):
+            self.assertEqual(paginator.num_pages, 125000)
+            self.assertEqual(len(paginator.page(2).object_list), 1)
+
+    def test_lists_are_counted(self):
+        self.assertEqual(EstimatedCountPaginator([1, 2, 3], 2).count, 3)
+
+    # No collectstatic manifest in tests.
+    @override_settings(STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}})
+    def test_changelist(self):
+        admin = User.objects.create_superuser(email='admin@example.com', password='pw123456')
+        self.client.force_login(admin)
+        with mock.patch('her_saheli_backend.admin.estimated_count', return_value=250000):
+            response = self.client.get('/admin/users/user/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 250000)
+
+
+class LabelView(View):
+    label = None
+
+    def get(self, request):
+        return HttpResponse(self.label)
+
+
+class LazyViewTests(SimpleTestCase):
+    def test_imported_and_configured_on_first_use(self):
+        labels = []
+        view = project_views.lazy_view(f'{__name__}.LabelView', label=lambda: labels.append('lazy') or 'lazy')
+        self.assertEqual(labels, [])
+        for _ in range(2):
+            self.assertEqual(view(RequestFactory().get('/')).content, b'lazy')
+        self.assertEqual(labels, ['lazy'])
+
+
+class SchemaViewTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.schema_dir = Path(directory.name)
+        for name, suffix, body in (('schema.json', '', b'{"openapi": "3.0.3"}'), ('schema.json', '.gz', b'gzipped'),
+                                   ('schema.yaml', '', b'openapi: 3.0.3')):
+            (self.schema_dir / f'{name}{suffix}').write_bytes(body)
+        # Not collected, so the files are read from OPENAPI_SCHEMA_DIR.
+        for patcher in (
+            mock.patch.dict(project_views._schemas, clear=True),
+            mock.patch.object(project_views.staticfiles_storage, 'stored_name', side_effect=ValueError),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get(self, **headers):
+        with override_settings(DEBUG=False, OPENAPI_SCHEMA_DIR=self.schema_dir):
+            return project_views.schema_view(RequestFactory().get('/api/schema/', headers=headers))
+
+    def test_formats_and_encodings(self):
+        response = self.get()
+        self.assertEqual((response['Content-Type'], response.content), ('application/vnd.oai.openapi; charset=utf-8', b'openapi: 3.0.3'))
+        response = self.get(accept='application/json', accept_encoding='br, gzip')
+        self.assertEqual((response['Content-Encoding'], response.content), ('gzip', b'gzipped'))
+        self.assertTrue(response['ETag'].endswith('-gzip"'))
+        self.assertEqual(response['Vary'], 'Accept, Accept-Encoding')
+        self.assertIn('max-age=300', response['Cache-Control'])
+
+    def test_not_modified(self):
+        etag = self.get(accept='application/json')['ETag']
+        response = self.get(accept='application/json', if_none_match=etag)
+        self.assertEqual((response.status_code, response['ETag'], response.content), (304, etag, b''))
+        # The gzip variant has an ETag of its own.
+        self.assertEqual(self.get(accept='application/json', accept_encoding='gzip', if_none_match=etag).status_code, 200)
+
+
+class CompressionTests(SimpleTestCase):
+    body = b'{"days": [' + b', '.join(b'"2025-01-01"' for _ in range(200)) + b']}'
+
+    def respond(self, response, accept_encoding):
+        request = RequestFactory().get('/', headers={'accept-encoding': accept_encoding})
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def json(self, body=None, **headers):
+        return HttpResponse(self.body if body is None else body, content_type='application/json', headers=headers)
+
+    def test_accepted_encodings(self):
+        request = RequestFactory().get('/', headers={'accept-encoding': 'gzip;q=0, br;q=0.0, deflate;q=0.5, identity;q=x'})
+        self.assertEqual(accepted_encodings(request), {'deflate'})
+
+    @mock.patch('her_saheli_backend.compression.brotli', None)
+    def test_gzip(self):
+        response = self.respond(self.json(ETag='"abc"'), 'br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual((response['Content-Length'], response['ETag']), (str(len(response.content)), 'W/"abc"'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_refused_codings_are_not_used(self):
+        for accept_encoding in ('gzip;q=0, br;q=0', '', 'identity'):
+            response = self.respond(self.json(), accept_encoding)
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(response.content, self.body)
+
+    def test_skipped_responses(self):
+        streamed = StreamingHttpResponse(iter([self.body]), content_type='application/json')
+        self.assertIs(self.respond(streamed, 'gzip'), streamed)
+        self.assertEqual(b''.join(streamed.streaming_content), self.body)
+        for response in (self.json(b'{}'), HttpResponse(self.body, content_type='text/html')):
+            self.assertFalse(self.respond(response, 'gzip').has_header('Content-Encoding'))
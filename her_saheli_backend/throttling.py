@@ -0,0 +1,121 @@
+"""
+Token-bucket throttles.
+
+A rate of 'N/period' gives every (scope, ident) pair a bucket of N tokens
+that refills continuously at N per period; each request takes one token.
+Unlike DRF's SimpleRateThrottle, which keeps the timestamp of every request
+in the window, a bucket is two numbers, so a check costs the same at any
+rate. Buckets live in process memory or in the shared cache, as selected by
+REST_FRAMEWORK['THROTTLE_STORE'] ('memory' or 'cache').
+"""
+import functools
+import math
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import AnonRateThrottle, ScopedRateThrottle, SimpleRateThrottle, UserRateThrottle
+
+
+def _refill(tokens, stamp, capacity, rate, now):
+    return min(capacity, tokens + (now - stamp) * rate)
+
+
+class MemoryBucketStore:
+    """
+    Buckets in this process only, least recently used evicted past `max_keys`.
+    An evicted bucket is simply full again.
+    """
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, now):
+        """
+        Take a token from `key`'s bucket. Returns (allowed, tokens left).
+        """
+        with self._lock:
+            tokens, stamp = self._buckets.pop(key, (capacity, now))
+            tokens = _refill(tokens, stamp, capacity, rate, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, tokens
+
+
+class CacheBucketStore:
+    """
+    Buckets in the shared cache, so limits hold across processes. Like DRF's
+    throttles the read-modify-write is not atomic, which can admit a few
+    extra requests under heavy concurrency for the same key.
+    """
+    def take(self, key, capacity, rate, now):
+        tokens, stamp = cache.get(key, (capacity, now))
+        tokens = _refill(tokens, stamp, capacity, rate, now)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # Expire once the bucket would be full again anyway.
+        cache.set(key, (tokens, now), timeout=math.ceil((capacity - tokens) / rate) + 1)
+        return allowed, tokens
+
+
+STORES = {
+    'memory': MemoryBucketStore,
+    'cache': CacheBucketStore,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _store(name):
+    return STORES[name]()
+
+
+def get_store():
+    return _store(getattr(settings, 'REST_FRAMEWORK', {}).get('THROTTLE_STORE', 'memory'))
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    cache_format = 'throttle_bucket_%(scope)s_%(ident)s'
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        allowed, self.tokens = get_store().take(
+            self.key, self.num_requests, self.num_requests / self.duration, self.timer()
+        )
+        return allowed
+
+    def wait(self):
+        """
+        Seconds until the bucket holds a whole token again.
+        """
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class AnonBucketThrottle(AnonRateThrottle, TokenBucketThrottle):
+    """
+    Limits anonymous requests per IP address, scope 'anon'.
+    """
+
+
+class UserBucketThrottle(UserRateThrottle, TokenBucketThrottle):
+    """
+    Limits requests per user (per IP address for anonymous ones), scope 'user'.
+    """
+
+
+class ScopedBucketThrottle(ScopedRateThrottle, TokenBucketThrottle):
+    """
+    Limits requests to views with a `throttle_scope`, per user or IP address.
+    """
@@ -1,8 +1,12 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 from users.views import UserProfileView # Import the view directly
 from cycles.views import SymptomLogView, MoodLogView # <-- ADD THIS IMPORT
+from .views import CacheMetricsView, collected_schema_url, lazy_view, schema_view
+
+if settings.ASYNC_VIEWS:
+    from cycles.async_views import AsyncSymptomLogView as SymptomLogView, AsyncMoodLogView as MoodLogView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -17,13 +21,16 @@ urlpatterns = [
     path('api/postpartum/', include('postpartum.urls')),
     path('api/content/', include('content.urls')),
     path('api/chatbot/', include('chatbot.urls')),
+    path('api/analytics/', include('analytics.urls')),
     
     #URLS FOR LOGGING 
     path('api/symptoms/', SymptomLogView.as_view(), name='log-symptoms'),
     path('api/mood/', MoodLogView.as_view(), name='log-mood'),
 
-    # API Documentation URLs
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    path('api/cache/metrics/', CacheMetricsView.as_view(), name='cache-metrics'),
+
+    # API Documentation URLs; drf_spectacular is only imported once they're used.
+    path('api/schema/', schema_view, name='schema'),
+    path('api/schema/swagger-ui/', lazy_view('drf_spectacular.views.SpectacularSwaggerView', url_name='schema', url=collected_schema_url), name='swagger-ui'),
+    path('api/schema/redoc/', lazy_view('drf_spectacular.views.SpectacularRedocView', url_name='schema', url=collected_schema_url), name='redoc'),
 ]
\ No newline at end of file
@@ -0,0 +1,128 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import views
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .caching import cache_metrics
+from .compression import best_encoding
+
+# format: (file name, content type), as SpectacularAPIView renders them.
+SCHEMA_FORMATS = {
+    'yaml': ('schema.yaml', 'application/vnd.oai.openapi; charset=utf-8'),
+    'json': ('schema.json', 'application/vnd.oai.openapi+json; charset=utf-8'),
+}
+
+# The static directory the schema files are collected into (STATICFILES_DIRS).
+SCHEMA_STATIC_DIR = 'openapi'
+SCHEMA_MAX_AGE = 300
+
+_schemas = {}
+
+
+class CacheMetricsView(views.APIView):
+    """
+    Hit/miss counts of the response cache in the worker serving the request.
+    """
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(cache_metrics.snapshot())
+
+
+def lazy_view(view_path, **initkwargs):
+    """
+    A view for the class-based view at `view_path` that imports it on first
+    use, so modules only the API docs need stay out of worker boot. Callable
+    `initkwargs` are called then too.
+    """
+    view = None
+
+    @csrf_exempt
+    def lazy(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(view_path).as_view(**{
+                key: value() if callable(value) else value for key, value in initkwargs.items()
+            })
+        return view(request, *args, **kwargs)
+    return lazy
+
+
+_generate_schema = lazy_view('drf_spectacular.views.SpectacularAPIView')
+
+
+def _schema_format(request):
+    if request.GET.get('format') in SCHEMA_FORMATS:
+        return request.GET['format']
+    return 'json' if 'json' in request.headers.get('Accept', '') else 'yaml'
+
+
+def collected_schema_url():
+    """
+    The hashed static URL of the collected JSON schema, served precompressed
+    and cached as immutable by WhiteNoise; None with DEBUG on or before
+    collectstatic, for the docs pages to use /api/schema/.
+    """
+    if settings.DEBUG:
+        return None
+    try:
+        return staticfiles_storage.url(f'{SCHEMA_STATIC_DIR}/{SCHEMA_FORMATS["json"][0]}')
+    except ValueError:
+        return None
+
+
+def _read_schema(schema_format):
+    """
+    {content coding: body} of the pre-generated schema in `schema_format`,
+    with the brotli and gzip variants collectstatic compressed, or None.
+    """
+    if schema_format not in _schemas:
+        name, _ = SCHEMA_FORMATS[schema_format]
+        try:
+            path = staticfiles_storage.path(staticfiles_storage.stored_name(f'{SCHEMA_STATIC_DIR}/{name}'))
+        except ValueError:  # Not collected; uncompressed from OPENAPI_SCHEMA_DIR.
+            path = settings.OPENAPI_SCHEMA_DIR / name
+        variants = {}
+        for encoding, suffix in (('identity', ''), ('br', '.br'), ('gzip', '.gz')):
+            try:
+                with open(f'{path}{suffix}', 'rb') as f:
+                    variants[encoding] = f.read()
+            except FileNotFoundError:
+                pass
+        _schemas[schema_format] = variants if 'identity' in variants else None
+    return _schemas[schema_format]
+
+
+@csrf_exempt
+def schema_view(request):
+    """
+    The OpenAPI schema, as written to OPENAPI_SCHEMA_DIR by `manage.py
+    spectacular` at build time (see build.sh), precompressed when collected.
+    Without those files, and always with DEBUG on, it is generated per
+    request by SpectacularAPIView.
+    """
+    schema_format = _schema_format(request)
+    variants = None if settings.DEBUG else _read_schema(schema_format)
+    if variants is None:
+        return _generate_schema(request)
+    name, content_type = SCHEMA_FORMATS[schema_format]
+    encoding = best_encoding(request, [encoding for encoding in ('br', 'gzip') if encoding in variants])
+    etag = f'"{hashlib.md5(variants["identity"]).hexdigest()}{"-" + encoding if encoding else ""}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(variants[encoding or 'identity'], content_type=content_type)
+        response['Content-Disposition'] = f'inline; filename="{name}"'
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+    patch_cache_control(response, public=True, max_age=SCHEMA_MAX_AGE)
+    return response
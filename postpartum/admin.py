@@ -1,8 +1,9 @@
 from django.contrib import admin
+from her_saheli_backend.admin import UserDataAdmin
 from .models import PostpartumMoodLog
 
 @admin.register(PostpartumMoodLog)
-class PostpartumMoodLogAdmin(admin.ModelAdmin):
+class PostpartumMoodLogAdmin(UserDataAdmin):
     list_display = ('user', 'date', 'mood')
-    search_fields = ('user__username',)
-    list_filter = ('mood', 'date')
\ No newline at end of file
+    list_filter = ('mood',)
+    date_hierarchy = 'date'
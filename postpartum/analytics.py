@@ -0,0 +1,106 @@
+from datetime import timedelta
+from itertools import accumulate
+
+from django.core.cache import cache
+
+from .models import PostpartumMoodLog
+
+WINDOWS = (7, 14)
+# Days of rolling distributions returned for trend charts.
+SERIES_DAYS = 28
+DISTRESS_MOODS = (PostpartumMoodLog.Mood.ANXIOUS, PostpartumMoodLog.Mood.OVERWHELMED)
+
+# Mood code 0 marks a day without a log.
+MOODS = tuple(PostpartumMoodLog.Mood.values)
+MOOD_CODES = {mood: code for code, mood in enumerate(MOODS, start=1)}
+
+
+def _cache_key(user_id, today):
+    # Keyed by day as well, so windows roll forward at midnight on their own.
+    return f'postpartum:mood-trends:{user_id}:{today.isoformat()}'
+
+
+def _distribution(prefix, start, end):
+    counts = {mood: prefix[code][end] - prefix[code][start] for code, mood in enumerate(MOODS, start=1)}
+    counts['days_logged'] = sum(counts.values())
+    return counts
+
+
+def compute_mood_trends(user_id, today):
+    """
+    Rolling 7/14-day mood distributions and distress streaks for a user.
+
+    One ordered scan fills a date-indexed array of mood codes, one byte per
+    day. Per-mood prefix sums over that array turn every window count into
+    a subtraction, so the cost is linear in days covered, not in windows.
+    """
+    rows = list(
+        PostpartumMoodLog.objects.filter(user_id=user_id, date__lte=today).order_by('date').values_list('date', 'mood')
+    )
+    first_day = rows[0][0] if rows else today
+    first_day = min(first_day, today - timedelta(days=SERIES_DAYS + max(WINDOWS)))
+    days = bytearray((today - first_day).days + 1)
+    for date, mood in rows:
+        days[(date - first_day).days] = MOOD_CODES.get(mood, 0)
+
+    prefix = [None] + [
+        list(accumulate((day == code for day in days), initial=0))
+        for code in range(1, len(MOODS) + 1)
+    ]
+    end = len(days)
+
+    windows = {}
+    for size in WINDOWS:
+        series = []
+        for offset in range(SERIES_DAYS - 1, -1, -1):
+            stop = end - offset
+            entry = _distribution(prefix, stop - size, stop)
+            entry['date'] = (first_day + timedelta(days=stop - 1)).isoformat()
+            series.append(entry)
+        windows[str(size)] = {
+            'current': _distribution(prefix, end - size, end),
+            'series': series,
+        }
+
+    distress = {MOOD_CODES[mood] for mood in DISTRESS_MOODS}
+    longest = run = 0
+    longest_end = None
+    for index, day in enumerate(days):
+        run = run + 1 if day in distress else 0
+        if run > longest:
+            longest, longest_end = run, index
+
+    return {
+        'windows': windows,
+        'distress_streaks': {
+            'moods': list(DISTRESS_MOODS),
+            # A streak still counts as current if today just isn't logged yet.
+            'current': run if days[-1] else _run_ending_at(days, end - 2, distress),
+            'longest': longest,
+            'longest_ended_on': (first_day + timedelta(days=longest_end)).isoformat() if longest else None,
+        },
+    }
+
+
+def _run_ending_at(days, index, distress):
+    run = 0
+    while index >= 0 and days[index] in distress:
+        run += 1
+        index -= 1
+    return run
+
+
+def mood_trends(user_id, today):
+    """
+    Cached compute_mood_trends(); invalidated by invalidate_mood_trends().
+    """
+    key = _cache_key(user_id, today)
+    trends = cache.get(key)
+    if trends is None:
+        trends = compute_mood_trends(user_id, today)
+        cache.set(key, trends, timeout=60 * 60 * 24)
+    return trends
+
+
+def invalidate_mood_trends(user_id, today):
+    cache.delete(_cache_key(user_id, today))
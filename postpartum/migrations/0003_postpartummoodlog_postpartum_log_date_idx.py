@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postpartum', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='postpartummoodlog',
+            index=models.Index(fields=['date'], name='postpartum_log_date_idx'),
+        ),
+    ]
@@ -16,6 +16,7 @@ class PostpartumMoodLog(models.Model):
     class Meta:
         ordering = ['-date']
         unique_together = ('user', 'date')
+        indexes = [models.Index(fields=['date'], name='postpartum_log_date_idx')]
 
     def __str__(self):
-        return f"Postpartum log for {self.user.username} on {self.date}"
\ No newline at end of file
+        return f"Postpartum log for {self.user.email} on {self.date}"
\ No newline at end of file
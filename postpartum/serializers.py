@@ -1,7 +1,12 @@
 from rest_framework import serializers
+from her_saheli_backend.serializers import ValuesSerializer
 from .models import PostpartumMoodLog
 
 class PostpartumMoodLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = PostpartumMoodLog
-        fields = ('date', 'mood')
\ No newline at end of file
+        fields = ('date', 'mood')
+
+class PostpartumMoodLogReadSerializer(ValuesSerializer):
+    model = PostpartumMoodLog
+    fields = PostpartumMoodLogSerializer.Meta.fields
@@ -1,3 +1,87 @@
+import random
+from collections import Counter
+from datetime import date, timedelta
+
 from django.test import TestCase
 
-# Create your tests here.
+from her_saheli_backend.renderers import FastJSONRenderer
+from users.models import User
+from .analytics import SERIES_DAYS, WINDOWS, compute_mood_trends
+from .models import PostpartumMoodLog
+from .serializers import PostpartumMoodLogReadSerializer, PostpartumMoodLogSerializer
+
+
+class PostpartumMoodLogReadSerializerTests(TestCase):
+    """
+    PostpartumMoodLogReadSerializer renders byte for byte what PostpartumMoodLogSerializer does.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(email='mother@example.com', password='pw123456')
+        for day, mood in ((date(2025, 4, 1), 'TIRED'), (date(2025, 4, 2), 'JOYFUL')):
+            PostpartumMoodLog.objects.create(user=user, date=day, mood=mood)
+        cls.logs = PostpartumMoodLog.objects.filter(user=user)
+
+    def test_get(self):
+        render = FastJSONRenderer().render
+        for log in self.logs:
+            self.assertEqual(
+                render(PostpartumMoodLogReadSerializer.get(self.logs.filter(pk=log.pk))),
+                render(PostpartumMoodLogSerializer(log).data),
+            )
+
+    def test_list(self):
+        render = FastJSONRenderer().render
+        self.assertEqual(
+            render(PostpartumMoodLogReadSerializer.list(self.logs)),
+            render(PostpartumMoodLogSerializer(self.logs, many=True).data),
+        )
+
+
+class MoodTrendTests(TestCase):
+    today = date(2025, 6, 30)
+
+    def log(self, user, days_ago, mood):
+        PostpartumMoodLog.objects.create(user=user, date=self.today - timedelta(days=days_ago), mood=mood)
+
+    def test_windows_match_counting_the_logs(self):
+        user = User.objects.create_user(email='trends@example.com', password='pw123456')
+        rng = random.Random(3)
+        for days_ago in rng.sample(range(80), 50):
+            self.log(user, days_ago, rng.choice(PostpartumMoodLog.Mood.values))
+        logs = dict(PostpartumMoodLog.objects.filter(user=user).values_list('date', 'mood'))
+
+        def counted(size, end):
+            counts = Counter(logs.get(end - timedelta(days=i)) for i in range(size))
+            distribution = {mood: counts[mood] for mood in PostpartumMoodLog.Mood.values}
+            distribution['days_logged'] = sum(distribution.values())
+            return distribution
+
+        windows = compute_mood_trends(user.pk, self.today)['windows']
+        for size in WINDOWS:
+            self.assertEqual(windows[str(size)]['current'], counted(size, self.today))
+            series = windows[str(size)]['series']
+            self.assertEqual(len(series), SERIES_DAYS)
+            for entry in series:
+                end = date.fromisoformat(entry.pop('date'))
+                self.assertEqual(entry, counted(size, end))
+            self.assertEqual(end, self.today)
+
+    def test_distress_streaks(self):
+        user = User.objects.create_user(email='streaks@example.com', password='pw123456')
+        for days_ago, mood in ((9, 'ANXIOUS'), (8, 'OVERWHELMED'), (7, 'ANXIOUS'), (6, 'HAPPY'), (2, 'ANXIOUS'), (1, 'OVERWHELMED')):
+            self.log(user, days_ago, mood)
+        streaks = compute_mood_trends(user.pk, self.today)['distress_streaks']
+        # Today isn't logged yet, so yesterday's streak is still current.
+        self.assertEqual((streaks['current'], streaks['longest']), (2, 3))
+        self.assertEqual(streaks['longest_ended_on'], '2025-06-23')
+
+        self.log(user, 0, 'JOYFUL')
+        self.assertEqual(compute_mood_trends(user.pk, self.today)['distress_streaks']['current'], 0)
+
+    def test_no_logs(self):
+        trends = compute_mood_trends(User.objects.create_user(email='new@example.com', password='pw').pk, self.today)
+        self.assertEqual(trends['windows']['7']['current']['days_logged'], 0)
+        self.assertEqual(trends['distress_streaks'], {
+            'moods': ['ANXIOUS', 'OVERWHELMED'], 'current': 0, 'longest': 0, 'longest_ended_on': None,
+        })
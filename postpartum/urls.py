@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import PostpartumMoodLogView
+from .views import PostpartumMoodLogView, PostpartumMoodTrendsView
 
 urlpatterns = [
     path('logs/<str:date_str>/', PostpartumMoodLogView.as_view(), name='postpartum-log'),
+    # Maps to /api/postpartum/trends/
+    path('trends/', PostpartumMoodTrendsView.as_view(), name='postpartum-trends'),
 ]
\ No newline at end of file
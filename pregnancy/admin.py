@@ -1,7 +1,7 @@
 from django.contrib import admin
+from her_saheli_backend.admin import UserDataAdmin
 from .models import PregnancyProfile
 
 @admin.register(PregnancyProfile)
-class PregnancyProfileAdmin(admin.ModelAdmin):
+class PregnancyProfileAdmin(UserDataAdmin):
     list_display = ('user', 'estimated_due_date')
-    search_fields = ('user__username',)
\ No newline at end of file
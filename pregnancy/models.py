@@ -6,4 +6,4 @@ class PregnancyProfile(models.Model):
     estimated_due_date = models.DateField(null=True, blank=True)
 
     def __str__(self):
-        return f"Pregnancy Profile for {self.user.username}"
\ No newline at end of file
+        return f"Pregnancy Profile for {self.user.email}"
\ No newline at end of file
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from content.models import StaticContent
+from her_saheli_backend.caching import invalidate_user_cache
+from .models import PregnancyProfile
+from .timeline import invalidate_week_bundles
+
+
+@receiver([post_save, post_delete], sender=StaticContent)
+def static_content_changed(sender, instance, **kwargs):
+    invalidate_week_bundles()
+
+
+@receiver([post_save, post_delete], sender=PregnancyProfile)
+def pregnancy_profile_changed(sender, instance, **kwargs):
+    invalidate_user_cache(instance.user_id)
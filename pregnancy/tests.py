@@ -1,3 +1,22 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from content.models import StaticContent
+from .timeline import week_bundles
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class WeekBundleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bundles_are_dropped_when_content_commits(self):
+        self.assertEqual(week_bundles(), {})
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            StaticContent.objects.create(
+                title='Week 8', body='Raspberry sized.', content_type='GUIDE', relevant_mode='pregnancy', week_of_pregnancy=8,
+            )
+            # Not before the write commits.
+            self.assertEqual(week_bundles(), {})
+        self.assertTrue(callbacks)
+        self.assertEqual([guide['title'] for guide in week_bundles()[8]], ['Week 8'])
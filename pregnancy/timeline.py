@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from content.models import StaticContent
+from content.serializers import StaticContentReadSerializer
+from users.models import UserProfile
+
+WEEK_BUNDLES_KEY = 'pregnancy:week-bundles'
+
+PREGNANCY_DAYS = 280
+MAX_WEEK = 42
+
+
+def pregnancy_timeline(due_date, today):
+    """
+    Derive the current week, trimester and days remaining from the due date,
+    counting 280 days (40 weeks) from the start of the pregnancy.
+    """
+    days_remaining = (due_date - today).days
+    current_week = (PREGNANCY_DAYS - days_remaining) // 7 + 1
+    current_week = min(max(current_week, 1), MAX_WEEK)
+
+    if current_week <= 13:
+        trimester = 1
+    elif current_week <= 27:
+        trimester = 2
+    else:
+        trimester = 3
+
+    return {
+        'estimated_due_date': due_date.isoformat(),
+        'current_week': current_week,
+        'trimester': trimester,
+        'days_remaining': max(days_remaining, 0),
+    }
+
+
+def week_bundles():
+    """
+    Return {week: [guide, ...]} for every pregnancy week, built with a single
+    query and kept in the cache until pregnancy content changes.
+    """
+    bundles = cache.get(WEEK_BUNDLES_KEY)
+    if bundles is None:
+        queryset = StaticContent.objects.filter(
+            relevant_mode=UserProfile.HealthMode.PREGNANCY,
+            week_of_pregnancy__isnull=False,
+        ).order_by('week_of_pregnancy', 'id')
+        bundles = {}
+        for guide in StaticContentReadSerializer.list(queryset):
+            bundles.setdefault(guide['week_of_pregnancy'], []).append(guide)
+        cache.set(WEEK_BUNDLES_KEY, bundles, timeout=None)
+    return bundles
+
+
+def invalidate_week_bundles():
+    """
+    Drop the cached bundles once the current transaction commits, so no
+    reader can cache them again from content that is about to change.
+    """
+    transaction.on_commit(lambda: cache.delete(WEEK_BUNDLES_KEY))
@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import PregnancyProfileView
+from .views import PregnancyProfileView, PregnancyTimelineView
 
 urlpatterns = [
     path('profile/', PregnancyProfileView.as_view(), name='pregnancy-profile'),
-]
\ No newline at end of file
+    # Maps to /api/pregnancy/timeline/
+    path('timeline/', PregnancyTimelineView.as_view(), name='pregnancy-timeline'),
+]
@@ -1,8 +1,15 @@
-from rest_framework import generics
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from rest_framework import generics, status, views
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from content.signals import CONTENT_NAMESPACE
+from her_saheli_backend.caching import cache_response
 from .models import PregnancyProfile
 from .serializers import PregnancyProfileSerializer
+from .timeline import pregnancy_timeline, week_bundles
 
+@method_decorator(cache_response('user'), name='retrieve')
 class PregnancyProfileView(generics.RetrieveUpdateAPIView):
     """
     Retrieve or update the pregnancy profile for the authenticated user.
@@ -14,4 +21,21 @@ class PregnancyProfileView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         # Retrieve or create a pregnancy profile for the logged-in user
         profile, created = PregnancyProfile.objects.get_or_create(user=self.request.user)
-        return profile
\ No newline at end of file
+        return profile
+
+class PregnancyTimelineView(views.APIView):
+    """
+    Current week, trimester and days remaining derived from the due date,
+    together with that week's guides, for the pregnancy home screen.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    @method_decorator(cache_response('user', CONTENT_NAMESPACE))
+    def get(self, request):
+        due_date = PregnancyProfile.objects.filter(user=request.user).values_list('estimated_due_date', flat=True).first()
+        if due_date is None:
+            return Response({"detail": "No estimated due date set."}, status=status.HTTP_404_NOT_FOUND)
+
+        timeline = pregnancy_timeline(due_date, timezone.now().date())
+        timeline['guides'] = week_bundles().get(timeline['current_week'], [])
+        return Response(timeline)
@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import Task
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'attempts', 'run_after', 'failed', 'created_at')
+    list_filter = ('name', 'failed')
+    readonly_fields = ('created_at',)
@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tasks.queue import get_backend
+
+
+class Command(BaseCommand):
+    help = "Runs background tasks queued with TASKS_BACKEND='database'"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Tasks claimed per transaction.')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Exit once no task is due.')
+
+    def handle(self, *args, **options):
+        if settings.TASKS_BACKEND != 'database':
+            self.stdout.write(self.style.WARNING(
+                f"TASKS_BACKEND is '{settings.TASKS_BACKEND}'; web processes run their own tasks, "
+                "this worker only sees tasks queued with the 'database' backend."
+            ))
+        backend = get_backend('database')
+        total = 0
+        while True:
+            count = backend.run_pending(options['batch_size'])
+            total += count
+            close_old_connections()
+            if count:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(f'Ran {total} tasks.')
@@ -0,0 +1,22 @@
+from django.db import models
+from django.utils import timezone
+
+class Task(models.Model):
+    """
+    A queued call of a registered task, used by the 'database' backend.
+    Rows are deleted once the task succeeds; tasks that exhaust their
+    attempts are kept with `failed` set for inspection.
+    """
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    failed = models.BooleanField(default=False)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['failed', 'run_after'])]
+
+    def __str__(self):
+        return f"{self.name}{tuple(self.args)}"
@@ -0,0 +1,208 @@
+"""
+Background tasks for side effects that don't need to finish inside a request.
+
+A function decorated with `@task` is run later with `func.enqueue(*args)`;
+arguments must be JSON serializable. Where tasks run depends on TASKS_BACKEND:
+
+- 'inprocess': a daemon thread in each process runs due tasks every
+  TASKS_BATCH_INTERVAL seconds. Nothing extra to deploy, but tasks still
+  queued when a process is killed are lost.
+- 'database': tasks are stored in the Task table, in the same transaction as
+  the request's writes, and run by `manage.py run_tasks` workers.
+
+`@task(batch=True)` functions receive the argument lists of every due call at
+once, so one run can coalesce them into a few bulk queries. Failing tasks are
+retried with exponential backoff, up to `max_attempts` runs.
+"""
+import atexit
+import functools
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+class RegisteredTask:
+    def __init__(self, func, name, batch, max_attempts):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = name
+        self.batch = batch
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args):
+        return self.func(*args)
+
+    def enqueue(self, *args):
+        get_backend().enqueue(self.name, list(args))
+
+    def run(self, calls):
+        """
+        Run queued `calls` (argument lists), each batch or call in its own
+        transaction. Returns {index of failed call: exception}.
+        """
+        if self.batch:
+            try:
+                with transaction.atomic():
+                    self.func(calls)
+                return {}
+            except Exception as exc:
+                logger.exception('Task %s failed for a batch of %d calls', self.name, len(calls))
+                return dict.fromkeys(range(len(calls)), exc)
+
+        failed = {}
+        for index, args in enumerate(calls):
+            try:
+                with transaction.atomic():
+                    self.func(*args)
+            except Exception as exc:
+                logger.exception('Task %s failed', self.name)
+                failed[index] = exc
+        return failed
+
+
+def task(func=None, *, name=None, batch=False, max_attempts=None):
+    """
+    Register `func` as a background task.
+    """
+    def decorator(func):
+        registered = RegisteredTask(
+            func,
+            name or f'{func.__module__}.{func.__qualname__}',
+            batch,
+            max_attempts or settings.TASKS_MAX_ATTEMPTS,
+        )
+        registry[registered.name] = registered
+        return registered
+    return decorator(func) if func is not None else decorator
+
+
+def retry_delay(attempts):
+    return 2 ** attempts
+
+
+def _run_group(name, calls):
+    registered = registry.get(name)
+    if registered is None:
+        logger.error('Unknown task %s', name)
+        return dict.fromkeys(range(len(calls)), LookupError(f'Unknown task {name}'))
+    return registered.run(calls)
+
+
+def _max_attempts(name):
+    registered = registry.get(name)
+    return registered.max_attempts if registered is not None else 1
+
+
+class InProcessBackend:
+    def __init__(self):
+        # (run_after, name, args, attempts) on the time.monotonic() clock.
+        self._pending = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def enqueue(self, name, args):
+        transaction.on_commit(lambda: self.push(name, args))
+
+    def push(self, name, args, attempts=0, delay=0):
+        with self._lock:
+            self._pending.append((time.monotonic() + delay, name, args, attempts))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name='tasks', daemon=True)
+                self._thread.start()
+                atexit.register(self.run_pending)
+
+    def _work(self):
+        while True:
+            time.sleep(settings.TASKS_BATCH_INTERVAL)
+            try:
+                self.run_pending()
+            finally:
+                close_old_connections()
+
+    def run_pending(self):
+        """
+        Run every due task now. Returns how many calls were run.
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = [item for item in self._pending if item[0] <= now]
+            self._pending = [item for item in self._pending if item[0] > now]
+
+        groups = defaultdict(list)
+        for _, name, args, attempts in due:
+            groups[name].append((args, attempts))
+        for name, items in groups.items():
+            failed = _run_group(name, [args for args, _ in items])
+            for index in failed:
+                args, attempts = items[index]
+                if attempts + 1 < _max_attempts(name):
+                    self.push(name, args, attempts + 1, retry_delay(attempts + 1))
+                else:
+                    logger.error('Task %s%s gave up after %d attempts', name, tuple(args), attempts + 1)
+        return len(due)
+
+
+class DatabaseBackend:
+    def enqueue(self, name, args):
+        from .models import Task
+        Task.objects.create(name=name, args=args)
+
+    def run_pending(self, limit=100):
+        """
+        Claim up to `limit` due tasks and run them. Returns how many were run.
+        Concurrent workers skip each other's claimed rows on PostgreSQL.
+        """
+        from .models import Task
+        with transaction.atomic():
+            claimed = list(
+                Task.objects.select_for_update(skip_locked=True)
+                .filter(failed=False, run_after__lte=timezone.now())
+                .order_by('run_after', 'id')[:limit]
+            )
+            groups = defaultdict(list)
+            for row in claimed:
+                groups[row.name].append(row)
+
+            done, retried = [], []
+            for name, rows in groups.items():
+                failed = _run_group(name, [row.args for row in rows])
+                for index, row in enumerate(rows):
+                    if index not in failed:
+                        done.append(row.pk)
+                        continue
+                    row.attempts += 1
+                    row.last_error = repr(failed[index])
+                    if row.attempts >= _max_attempts(name):
+                        row.failed = True
+                    else:
+                        row.run_after = timezone.now() + timedelta(seconds=retry_delay(row.attempts))
+                    retried.append(row)
+
+            Task.objects.filter(pk__in=done).delete()
+            Task.objects.bulk_update(retried, ['attempts', 'last_error', 'failed', 'run_after'])
+        return len(claimed)
+
+
+BACKENDS = {
+    'inprocess': InProcessBackend,
+    'database': DatabaseBackend,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _backend(name):
+    return BACKENDS[name]()
+
+
+def get_backend(name=None):
+    return _backend(name or settings.TASKS_BACKEND)
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from her_saheli_backend.admin import EstimatedCountPaginator
 from .models import User, UserProfile
 
 class UserProfileInline(admin.StackedInline):
@@ -10,7 +11,10 @@ class UserProfileInline(admin.StackedInline):
 class CustomUserAdmin(UserAdmin):
     # --- Configuration for the User List View in Admin ---
     list_display = ('email', 'is_staff', 'date_joined')
-    search_fields = ('email',)
+    # Prefix matches use the email index; the log admins autocomplete users with it.
+    search_fields = ('email__startswith',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     ordering = ('email',)
 
     # --- Configuration for the User EDIT page ---
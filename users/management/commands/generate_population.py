@@ -0,0 +1,49 @@
+import random
+import time
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.synthetic import SYNTHETIC_DOMAIN, SYNTHETIC_PASSWORD, generate_batch, next_index
+
+
+class Command(BaseCommand):
+    help = ('Generates synthetic users with profiles, years of cycles, daily logs with moods, pain and '
+            f'symptoms, and pregnancy and postpartum records, for scale and load testing. Users get '
+            f'@{SYNTHETIC_DOMAIN} emails and the password "{SYNTHETIC_PASSWORD}". Works offline on '
+            'SQLite and PostgreSQL.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Users to add.')
+        parser.add_argument('--years', type=float, default=2, help='Years of cycle history per user.')
+        parser.add_argument('--log-rate', type=float, default=0.4, help='Average share of days with a daily log.')
+        parser.add_argument('--users-per-batch', type=int, default=500, help='Users created per transaction.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk insert.')
+        parser.add_argument('--seed', type=int, help='Random seed, for a reproducible population.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rng = random.Random(options['seed'])
+        today = timezone.now().date()
+        # Hashing is slow on purpose; every synthetic user shares one hash.
+        password_hash = make_password(SYNTHETIC_PASSWORD)
+        first_index = next_index()
+
+        totals = Counter()
+        size = options['users_per_batch']
+        for offset in range(0, options['users'], size):
+            totals.update(generate_batch(
+                rng, first_index + offset, min(size, options['users'] - offset), today,
+                years=options['years'], log_rate=options['log_rate'],
+                batch_size=options['batch_size'], password_hash=password_hash,
+            ))
+            self.stdout.write(f'{totals["users"]}/{options["users"]} users')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(', '.join(f'{count} {name.replace("_", " ")}' for name, count in totals.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {totals["users"]} users in {elapsed:.1f}s. '
+            'Run backfill_rollups to include them in population statistics.'
+        ))
@@ -0,0 +1,284 @@
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from cycles.models import Cycle
+from users.models import UserProfile
+from users.synthetic import SYNTHETIC_DOMAIN, SYNTHETIC_PASSWORD
+
+User = get_user_model()
+
+LOADTEST_EMAIL = 'loadtest@her-saheli.local'
+
+# (method, path, body) requests replayed round-robin by every client.
+SCENARIO = (
+    ('GET', '/api/cycle/', None),
+    ('GET', '/api/cycle/predictions/', None),
+    ('GET', '/api/cycle/logs/{today}/', None),
+    ('GET', '/api/content/?mode=menstrual', None),
+    ('POST', '/api/mood/', {'mood': 'HAPPY', 'energy_level': 3}),
+    ('POST', '/api/symptoms/', {'symptoms': ['Cramps'], 'severity': 2}),
+)
+
+# The mobile session mix: (weight, modes the session is for or None for
+# all, requests). Every client is one synthetic user (generate_population)
+# and replays sessions drawn for its mode.
+MOBILE_SESSIONS = (
+    # Opening the app on the home and calendar screens.
+    (40, None, (
+        ('GET', '/api/user/profile/', None),
+        ('GET', '/api/cycle/', None),
+        ('GET', '/api/cycle/predictions/', None),
+        ('GET', '/api/cycle/logs/{today}/', None),
+        ('GET', '/api/content/?mode={mode}', None),
+    )),
+    # Logging today from the mood and symptom screens.
+    (25, ('menstrual', 'ttc'), (
+        ('GET', '/api/cycle/logs/{today}/', None),
+        ('POST', '/api/mood/', {'mood': 'HAPPY', 'energy_level': 3}),
+        ('POST', '/api/symptoms/', {'symptoms': ['Cramps', 'Bloating'], 'severity': 2}),
+        ('GET', '/api/cycle/', None),
+    )),
+    (10, ('menstrual', 'ttc'), (
+        ('GET', '/api/cycle/insights/', None),
+        ('GET', '/api/cycle/predictions/', None),
+    )),
+    (15, ('pregnancy',), (
+        ('GET', '/api/pregnancy/profile/', None),
+        ('GET', '/api/pregnancy/timeline/', None),
+    )),
+    (15, ('postpartum',), (
+        ('GET', '/api/postpartum/trends/', None),
+        ('POST', '/api/postpartum/logs/{today}/', {'mood': 'TIRED'}),
+        ('GET', '/api/postpartum/logs/{today}/', None),
+    )),
+    (4, None, (
+        ('POST', '/api/chatbot/query/', {'message': 'What helps with cramps?'}),
+    )),
+    # A fresh install or expired session logging in; hashes the password.
+    (2, None, (
+        ('POST', '/api/auth/login/', {'email': '{email}', 'password': SYNTHETIC_PASSWORD}),
+    )),
+)
+
+
+class Command(BaseCommand):
+    help = ('Load-tests the hot endpoints, or replays the mobile session mix with synthetic users, under '
+            'gunicorn in WSGI and ASGI (uvicorn worker) modes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=('wsgi', 'asgi', 'both'), default='both')
+        parser.add_argument('--base-url', help='Test an already running server instead of starting one, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent client connections.')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run each mode.')
+        parser.add_argument('--scenario', choices=('hot', 'mobile'), default='hot',
+                            help='hot: one user cycling through the hot endpoints. mobile: the mobile session mix, '
+                                 'one synthetic user per client (run generate_population first).')
+        parser.add_argument('--sessions', type=int, default=50, help='Sessions drawn per client in the mobile scenario.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for drawing mobile sessions.')
+
+    def handle(self, *args, **options):
+        if options['scenario'] == 'mobile':
+            scripts = self._mobile_scripts(options)
+        else:
+            token = self._token()
+            scripts = [(token, None, None, SCENARIO)] * options['concurrency']
+        if options['base_url']:
+            host, port = self._split_url(options['base_url'])
+            results = [('server', asyncio.run(self._run(host, port, scripts, options)))]
+        else:
+            modes = ('wsgi', 'asgi') if options['mode'] == 'both' else (options['mode'],)
+            results = [(mode, self._run_mode(mode, scripts, options)) for mode in modes]
+
+        self.stdout.write(f"{'mode':<8}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for mode, (latencies, errors, elapsed) in results:
+            latencies.sort()
+            count = len(latencies)
+            pct = lambda p: latencies[min(count - 1, int(count * p))] * 1000 if count else 0
+            self.stdout.write(
+                f'{mode:<8}{count:>10}{errors:>8}{count / elapsed:>10.1f}{pct(0.5):>10.1f}{pct(0.95):>10.1f}{pct(0.99):>10.1f}'
+            )
+
+    def _token(self):
+        user, created = User.objects.get_or_create(email=LOADTEST_EMAIL)
+        if created:
+            user.set_unusable_password()
+            user.save()
+        UserProfile.objects.get_or_create(user=user, defaults={'name': 'Load Test'})
+        if not Cycle.objects.filter(user=user).exists():
+            # A few past periods so the prediction endpoint has data to work with.
+            today = timezone.now().date()
+            Cycle.objects.bulk_create(
+                Cycle(user=user, start_date=today - timedelta(days=28 * n), end_date=today - timedelta(days=28 * n - 4))
+                for n in range(1, 4)
+            )
+        return str(RefreshToken.for_user(user).access_token)
+
+    def _mobile_scripts(self, options):
+        """
+        A (token, email, mode, requests) script per client: `sessions` sessions
+        drawn by weight from those for the client's user's mode.
+        """
+        users = list(
+            User.objects.filter(email__endswith=f'@{SYNTHETIC_DOMAIN}', profile__isnull=False)
+            .order_by('pk').values_list('pk', 'email', 'profile__selected_mode')[:options['concurrency']]
+        )
+        if not users:
+            raise CommandError('The mobile scenario needs synthetic users: run manage.py generate_population first.')
+        rng = random.Random(options['seed'])
+        scripts = []
+        for index in range(options['concurrency']):
+            pk, email, mode = users[index % len(users)]
+            sessions = [(weight, steps) for weight, modes, steps in MOBILE_SESSIONS if modes is None or mode in modes]
+            drawn = rng.choices([steps for _, steps in sessions], [weight for weight, _ in sessions], k=options['sessions'])
+            token = str(RefreshToken.for_user(User(pk=pk, email=email)).access_token)
+            scripts.append((token, email, mode, [step for steps in drawn for step in steps]))
+        return scripts
+
+    def _split_url(self, url):
+        address = url.split('://', 1)[-1].rstrip('/')
+        host, _, port = address.partition(':')
+        return host, int(port or 80)
+
+    def _run_mode(self, mode, scripts, options):
+        host, port = options['host'], options['port']
+        command = [
+            sys.executable, '-m', 'gunicorn',
+            '--workers', str(options['workers']),
+            '--bind', f'{host}:{port}',
+            '--log-level', 'warning',
+        ]
+        env = dict(os.environ)
+        env['ALLOWED_HOSTS'] = ','.join(settings.ALLOWED_HOSTS + [host])
+        # One user hammering the API is exactly what the throttles stop.
+        env['THROTTLE_ENABLED'] = 'False'
+        if mode == 'asgi':
+            if importlib.util.find_spec('uvicorn') is None:
+                raise CommandError('ASGI mode needs uvicorn: pip install uvicorn')
+            command += ['--worker-class', 'uvicorn.workers.UvicornWorker', 'her_saheli_backend.asgi:application']
+            env['ASYNC_VIEWS'] = 'True'
+        else:
+            command += ['her_saheli_backend.wsgi:application']
+            env['ASYNC_VIEWS'] = 'False'
+
+        self.stdout.write(f'Starting {mode} server on {host}:{port}...')
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+        try:
+            self._wait_for_port(host, port)
+            return asyncio.run(self._run(host, port, scripts, options))
+        finally:
+            server.terminate()
+            server.wait()
+
+    def _wait_for_port(self, host, port, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection((host, port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'Server did not start listening on {host}:{port}')
+
+    async def _run(self, host, port, scripts, options):
+        today = timezone.now().date().isoformat()
+        encoded = {}
+        for script in scripts:
+            if id(script) not in encoded:
+                token, email, mode, steps = script
+                encoded[id(script)] = [
+                    self._encode(method, path.format(today=today, mode=mode), self._fill(body, email), host, token)
+                    for method, path, body in steps
+                ]
+        latencies, errors = [], [0]
+        start = time.monotonic()
+        deadline = start + options['duration']
+
+        async def client(offset):
+            requests = encoded[id(scripts[offset])]
+            reader = writer = None
+            i = offset
+            while time.monotonic() < deadline:
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(host, port)
+                    sent = time.monotonic()
+                    writer.write(requests[i % len(requests)])
+                    await writer.drain()
+                    status, keep_alive = await self._read_response(reader)
+                    latencies.append(time.monotonic() - sent)
+                    if status >= 400:
+                        errors[0] += 1
+                    if not keep_alive:
+                        writer.close()
+                        reader = writer = None
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    errors[0] += 1
+                    if writer is not None:
+                        writer.close()
+                    reader = writer = None
+                i += 1
+            if writer is not None:
+                writer.close()
+
+        await asyncio.gather(*(client(n) for n in range(options['concurrency'])))
+        return latencies, errors[0], time.monotonic() - start
+
+    def _fill(self, body, email):
+        if body is None or email is None:
+            return body
+        return {key: value.format(email=email) if isinstance(value, str) else value for key, value in body.items()}
+
+    def _encode(self, method, path, body, host, token):
+        payload = json.dumps(body).encode() if body is not None else b''
+        lines = [
+            f'{method} {path} HTTP/1.1',
+            f'Host: {host}',
+            f'Authorization: Bearer {token}',
+            'Accept: application/json',
+            'Connection: keep-alive',
+            f'Content-Length: {len(payload)}',
+        ]
+        if body is not None:
+            lines.append('Content-Type: application/json')
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode() + payload
+
+    async def _read_response(self, reader):
+        status_line = await reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+
+        if headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif 'content-length' in headers:
+            await reader.readexactly(int(headers['content-length']))
+        else:
+            await reader.read()
+            return status, False
+        return status, headers.get('connection') != 'close'
@@ -1,6 +1,9 @@
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from her_saheli_backend.serializers import ValuesSerializer
 from .models import User, UserProfile
+from .tasks import record_logins
 
 class UserProfileSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(source='user.email', read_only=True)
@@ -13,6 +16,11 @@ class UserProfileSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ('email', 'menstrual_mode')
 
+class UserProfileReadSerializer(ValuesSerializer):
+    model = UserProfile
+    fields = UserProfileSerializer.Meta.fields
+    sources = {'email': 'user__email'}
+
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
@@ -21,6 +29,8 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
 
     def validate(self, attrs):
         data = super().validate(attrs)
+        # UPDATE_LAST_LOGIN is off; logins are written in batches instead.
+        record_logins.enqueue(self.user.pk, timezone.now().isoformat())
         
         serializer = UserProfileSerializer(self.user.profile)
         
@@ -0,0 +1,220 @@
+"""
+Synthetic users for local load and scale testing.
+
+`generate_batch` creates users with profiles, years of cycles with
+per-user and per-cycle variance, daily logs whose moods, pain and symptoms
+follow the cycle phase, and pregnancy or postpartum records for users in
+those modes. Everything is written with bulk_create, so no signals run:
+symptom masks are filled in directly, and population rollups need a
+`manage.py backfill_rollups` afterwards.
+
+Synthetic users have emails at SYNTHETIC_DOMAIN and all share
+SYNTHETIC_PASSWORD, which `manage.py loadtest` uses to log them in.
+"""
+import re
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from cycles.models import Cycle, DailyLog
+from cycles.symptoms import mask_of, resolve_symptoms
+from postpartum.models import PostpartumMoodLog
+from pregnancy.models import PregnancyProfile
+from .models import User, UserProfile
+
+SYNTHETIC_DOMAIN = 'synthetic.her-saheli.local'
+SYNTHETIC_PASSWORD = 'synthetic-password'
+
+# selected_mode: share of users.
+MODE_MIX = (
+    (UserProfile.HealthMode.MENSTRUAL, 0.78),
+    (UserProfile.HealthMode.TTC, 0.08),
+    (UserProfile.HealthMode.PREGNANCY, 0.06),
+    (UserProfile.HealthMode.POSTPARTUM, 0.06),
+    (UserProfile.HealthMode.MENOPAUSE, 0.02),
+)
+
+NAMES = ('Aarohi', 'Ananya', 'Diya', 'Isha', 'Kavya', 'Meera', 'Nisha', 'Priya', 'Riya', 'Saanvi', 'Tara', 'Zoya')
+
+# Phase: (mood weights, symptom chances).
+PHASE_LOGS = {
+    'menstrual': (
+        {'FATIGUED': 4, 'IRRITABLE': 3, 'SAD': 2, 'ANXIOUS': 1, 'HAPPY': 1, 'ENERGETIC': 0.5},
+        {'Cramps': 0.7, 'Back pain': 0.35, 'Bloating': 0.3, 'Fatigue': 0.4, 'Headache': 0.2, 'Nausea': 0.1},
+    ),
+    'follicular': (
+        {'HAPPY': 4, 'ENERGETIC': 4, 'ANXIOUS': 1, 'SAD': 0.5, 'IRRITABLE': 0.5, 'FATIGUED': 0.5},
+        {'Headache': 0.05, 'Acne': 0.05, 'Insomnia': 0.05},
+    ),
+    'ovulation': (
+        {'ENERGETIC': 4, 'HAPPY': 4, 'ANXIOUS': 1, 'IRRITABLE': 0.5},
+        {'Breast tenderness': 0.15, 'Spotting': 0.1, 'Bloating': 0.1},
+    ),
+    'premenstrual': (
+        {'IRRITABLE': 3, 'ANXIOUS': 3, 'FATIGUED': 3, 'SAD': 2, 'HAPPY': 1},
+        {'Cravings': 0.55, 'Bloating': 0.45, 'Mood swings': 0.4, 'Acne': 0.3, 'Breast tenderness': 0.3, 'Fatigue': 0.3},
+    ),
+}
+
+POSTPARTUM_MOODS = {'HAPPY': 3, 'JOYFUL': 2, 'TIRED': 4, 'ANXIOUS': 2, 'OVERWHELMED': 2}
+
+
+def _choice(rng, weights):
+    return rng.choices(list(weights), list(weights.values()))[0]
+
+
+def _cycles(rng, start, end):
+    """
+    (start_date, end_date) periods from `start` to `end` with a per-user mean
+    cycle length and period length and per-cycle jitter.
+    """
+    mean_length = min(max(rng.gauss(28.5, 2.5), 22), 36)
+    spread = rng.uniform(1, 4)
+    mean_period = rng.choice((3, 4, 5, 5, 5, 6, 6, 7))
+    periods = []
+    day = start + timedelta(days=rng.randrange(int(mean_length)))
+    while day <= end:
+        period = max(2, min(8, round(rng.gauss(mean_period, 1))))
+        periods.append((day, day + timedelta(days=period - 1)))
+        day += timedelta(days=max(18, round(rng.gauss(mean_length, spread))))
+    return periods
+
+
+def _phase(day, period_start, period_end, next_start):
+    if day <= period_end:
+        return 'menstrual'
+    if next_start is not None and (next_start - day).days <= 5:
+        return 'premenstrual'
+    if next_start is not None and abs((next_start - timedelta(days=14) - day).days) <= 1:
+        return 'ovulation'
+    return 'follicular'
+
+
+def _daily_logs(rng, user, periods, log_rate, end, symptoms):
+    """
+    DailyLogs and their symptom ids for `user` over `periods`, on a share of
+    days that varies per user around `log_rate`.
+    """
+    rate = min(1.0, max(0.02, rng.gauss(log_rate, log_rate / 3)))
+    logs = []
+    for index, (start, period_end) in enumerate(periods):
+        next_start = periods[index + 1][0] if index + 1 < len(periods) else None
+        last = (next_start - timedelta(days=1)) if next_start else min(end, start + timedelta(days=27))
+        day = start
+        while day <= min(last, end):
+            if rng.random() < rate:
+                moods, chances = PHASE_LOGS[_phase(day, start, period_end, next_start)]
+                names = [name for name, chance in chances.items() if rng.random() < chance]
+                menstrual = day <= period_end
+                logs.append((DailyLog(
+                    user=user,
+                    date=day,
+                    mood=_choice(rng, moods) if rng.random() < 0.85 else None,
+                    pain_level=min(5, max(0, round(rng.gauss(3.2 if (day - start).days < 2 else 1.8, 1)))) if menstrual else (
+                        rng.choice((0, 0, 0, 1, 1, 2)) if rng.random() < 0.4 else None
+                    ),
+                    symptom_severity=rng.randint(1, 5) if names else None,
+                    energy_level=rng.randint(1, 3) if menstrual else rng.randint(2, 5),
+                    notes='Synthetic note' if rng.random() < 0.05 else None,
+                    symptom_mask=mask_of(symptoms[name].bit for name in names),
+                ), [symptoms[name].pk for name in names]))
+            day += timedelta(days=1)
+    return logs
+
+
+def next_index():
+    """
+    The number after the highest one among existing synthetic users, so new
+    ones never reuse an email even after some were deleted.
+    """
+    # Same prefix and domain, so the longest email, then the last, is the highest.
+    email = User.objects.filter(email__regex=rf'^user[0-9]+@{re.escape(SYNTHETIC_DOMAIN)}$').order_by(
+        Length('email').desc(), '-email',
+    ).values_list('email', flat=True).first()
+    return int(email[4:email.index('@')]) + 1 if email else 0
+
+
+def generate_batch(rng, first_index, count, today, years=2, log_rate=0.4, batch_size=2000, password_hash=None):
+    """
+    Create `count` synthetic users numbered from `first_index`, with all their
+    data, in one transaction. Returns a dict of rows created per model.
+    """
+    password_hash = password_hash or make_password(SYNTHETIC_PASSWORD)
+    symptoms = {symptom.name: symptom for symptom in resolve_symptoms(
+        {name for _, chances in PHASE_LOGS.values() for name in chances},
+    )}
+    history_start = today - timedelta(days=round(365 * years))
+    joined = timezone.now() - timedelta(days=round(365 * years))
+    modes = [mode for mode, _ in MODE_MIX]
+    mode_weights = [weight for _, weight in MODE_MIX]
+
+    with transaction.atomic():
+        users = User.objects.bulk_create(
+            [
+                User(email=f'user{index}@{SYNTHETIC_DOMAIN}', password=password_hash, date_joined=joined)
+                for index in range(first_index, first_index + count)
+            ],
+            batch_size=batch_size,
+        )
+        if users and users[0].pk is None:
+            # Databases that don't return ids from bulk inserts.
+            ids = dict(User.objects.filter(email__in=[user.email for user in users]).values_list('email', 'pk'))
+            for user in users:
+                user.pk = ids[user.email]
+
+        profiles, cycles, logs, pregnancies, postpartum = [], [], [], [], []
+        for user in users:
+            mode = rng.choices(modes, mode_weights)[0]
+            age = rng.randint(18, 44) if mode != UserProfile.HealthMode.MENOPAUSE else rng.randint(45, 55)
+            end = today
+            if mode == UserProfile.HealthMode.PREGNANCY:
+                due = today + timedelta(days=rng.randint(1, 270))
+                pregnancies.append(PregnancyProfile(user=user, estimated_due_date=due))
+                end = due - timedelta(days=281)
+            elif mode == UserProfile.HealthMode.POSTPARTUM:
+                birth = today - timedelta(days=rng.randint(1, 180))
+                pregnancies.append(PregnancyProfile(user=user, estimated_due_date=birth))
+                end = birth - timedelta(days=281)
+                day = birth
+                while day <= today:
+                    if rng.random() < 0.6:
+                        postpartum.append(PostpartumMoodLog(user=user, date=day, mood=_choice(rng, POSTPARTUM_MOODS)))
+                    day += timedelta(days=1)
+            elif mode == UserProfile.HealthMode.MENOPAUSE:
+                end = today - timedelta(days=rng.randint(90, 365))
+
+            periods = _cycles(rng, history_start, end)
+            for start, period_end in periods:
+                # The latest period may still be going on.
+                cycles.append(Cycle(user=user, start_date=start, end_date=period_end if period_end < today else None))
+            logs.extend(_daily_logs(rng, user, periods, log_rate, min(end, today), symptoms))
+            lengths = [(b[0] - a[0]).days for a, b in zip(periods, periods[1:])]
+            profiles.append(UserProfile(
+                user=user, name=rng.choice(NAMES), age=age, selected_mode=mode,
+                menstrual_mode=mode == UserProfile.HealthMode.MENSTRUAL,
+                average_cycle=round(sum(lengths) / len(lengths)) if lengths else 28,
+            ))
+
+        UserProfile.objects.bulk_create(profiles, batch_size=batch_size)
+        Cycle.objects.bulk_create(cycles, batch_size=batch_size)
+        PregnancyProfile.objects.bulk_create(pregnancies, batch_size=batch_size)
+        PostpartumMoodLog.objects.bulk_create(postpartum, batch_size=batch_size)
+        created = DailyLog.objects.bulk_create([log for log, _ in logs], batch_size=batch_size)
+        if created and created[0].pk is None:
+            ids = {
+                (user_id, day): pk for pk, user_id, day in
+                DailyLog.objects.filter(user__in=users).values_list('pk', 'user_id', 'date')
+            }
+            for log in created:
+                log.pk = ids[log.user_id, log.date]
+        Through = DailyLog.symptoms.through
+        through = [Through(dailylog_id=log.pk, symptom_id=symptom_id) for log, symptom_ids in logs for symptom_id in symptom_ids]
+        Through.objects.bulk_create(through, batch_size=batch_size)
+
+    return {
+        'users': len(users), 'cycles': len(cycles), 'daily_logs': len(logs), 'log_symptoms': len(through),
+        'pregnancy_profiles': len(pregnancies), 'postpartum_logs': len(postpartum),
+    }
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+
+from tasks.queue import task
+
+User = get_user_model()
+
+
+@task(batch=True)
+def record_logins(calls):
+    """
+    Write the last_login of every queued login with a single UPDATE,
+    keeping only the latest login per user.
+    """
+    latest = {}
+    for user_id, logged_in_at in calls:
+        logged_in_at = datetime.fromisoformat(logged_in_at)
+        if user_id not in latest or logged_in_at > latest[user_id]:
+            latest[user_id] = logged_in_at
+    existing = set(User.objects.filter(pk__in=latest).values_list('pk', flat=True))
+    User.objects.bulk_update(
+        [User(pk=user_id, last_login=latest[user_id]) for user_id in existing],
+        ['last_login'],
+    )
+
@@ -1,3 +1,64 @@
+import random
+from datetime import date
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from her_saheli_backend.renderers import FastJSONRenderer
+from .models import User, UserProfile
+from .serializers import UserProfileReadSerializer, UserProfileSerializer
+from .synthetic import SYNTHETIC_DOMAIN, generate_batch, next_index
+
+
+class UserProfileReadSerializerTests(TestCase):
+    """
+    UserProfileReadSerializer renders byte for byte what UserProfileSerializer does.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        for email, age, mode in (('one@example.com', 31, UserProfile.HealthMode.PREGNANCY), ('two@example.com', None, UserProfile.HealthMode.MENSTRUAL)):
+            user = User.objects.create_user(email=email, password='pw123456')
+            UserProfile.objects.create(user=user, name='Ānanya "A"', age=age, selected_mode=mode)
+        cls.profiles = UserProfile.objects.order_by('pk')
+
+    def test_get(self):
+        render = FastJSONRenderer().render
+        for profile in self.profiles:
+            self.assertEqual(
+                render(UserProfileReadSerializer.get(self.profiles.filter(pk=profile.pk))),
+                render(UserProfileSerializer(profile).data),
+            )
+
+    def test_list(self):
+        render = FastJSONRenderer().render
+        self.assertEqual(
+            render(UserProfileReadSerializer.list(self.profiles)),
+            render(UserProfileSerializer(self.profiles, many=True).data),
+        )
+
+
+class LogoutTests(TestCase):
+    def test_logged_out_refresh_token_is_rejected_at_once(self):
+        user = User.objects.create_user(email='leaving@example.com', password='pw123456')
+        refresh = str(RefreshToken.for_user(user))
+        client = APIClient()
+        client.force_authenticate(user)
+        self.assertEqual(client.post('/api/auth/logout/', {'refresh': refresh}, format='json').status_code, 205)
+        with self.assertRaises(TokenError):
+            RefreshToken(refresh)
+
+
+class SyntheticUserTests(TestCase):
+    def test_next_index(self):
+        self.assertEqual(next_index(), 0)
+        for email in ('user99@example.com', f'user@{SYNTHETIC_DOMAIN}', f'admin7@{SYNTHETIC_DOMAIN}'):
+            User.objects.create_user(email=email, password='pw123456')
+        self.assertEqual(next_index(), 0)
 
-# Create your tests here.
+        generate_batch(random.Random(1), 0, 12, date(2025, 6, 1), years=0.2, password_hash='!')
+        # user11 sorts before user9 as text.
+        self.assertEqual(next_index(), 12)
+        User.objects.filter(email__in=[f'user5@{SYNTHETIC_DOMAIN}', f'user11@{SYNTHETIC_DOMAIN}']).delete()
+        self.assertEqual(next_index(), 11)
@@ -1,10 +1,13 @@
+from django.utils.decorators import method_decorator
 from rest_framework import generics, status, views
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 
-from .serializers import UserRegistrationSerializer, UserProfileSerializer, MyTokenObtainPairSerializer
+from her_saheli_backend.caching import cache_response
+from .serializers import UserRegistrationSerializer, UserProfileSerializer, UserProfileReadSerializer, MyTokenObtainPairSerializer
 from .models import UserProfile
 
 class MyTokenObtainPairView(TokenObtainPairView):
@@ -13,6 +16,7 @@ class MyTokenObtainPairView(TokenObtainPairView):
 class UserRegistrationView(generics.CreateAPIView):
     serializer_class = UserRegistrationSerializer
     permission_classes = (AllowAny,)
+    throttle_scope = 'registration'
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -43,14 +47,23 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         profile, created = UserProfile.objects.get_or_create(user=self.request.user)
         return profile
 
+    @method_decorator(cache_response('user'))
+    def retrieve(self, request, *args, **kwargs):
+        data = UserProfileReadSerializer.get(UserProfile.objects.filter(user=request.user))
+        if data is None:
+            # First access creates the profile through get_object().
+            return super().retrieve(request, *args, **kwargs)
+        return Response(data)
+
 class LogoutView(views.APIView):
     permission_classes = (IsAuthenticated,)
 
     def post(self, request):
         try:
-            refresh_token = request.data["refresh"]
-            token = RefreshToken(refresh_token)
-            token.blacklist()
-            return Response(status=status.HTTP_205_RESET_CONTENT)
-        except Exception as e:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+            token = RefreshToken(request.data["refresh"])
+        except (KeyError, TypeError, TokenError):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        # Blacklisted before responding: a queued blacklist could be lost,
+        # leaving the logged-out token usable.
+        token.blacklist()
+        return Response(status=status.HTTP_205_RESET_CONTENT)
\ No newline at end of file